@@ -0,0 +1,114 @@
+"""
+Benchmark concurrent checkpointing with a single shared SqliteSaver connection versus the
+pooled checkpointer used by the graph factories.
+
+Each simulated session runs several turns of a small graph whose state grows every turn,
+so every turn reads the latest checkpoint and writes new ones, like a real chat session.
+
+Usage:
+    python benchmarks/bench_checkpointer.py --sessions 32 --turns 10 --workers 16
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import operator
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import StateGraph
+from typing_extensions import TypedDict
+from maeser.graphs.checkpointer import PooledSqliteSaver
+from maeser.sqlite_pool import SQLitePool
+
+
+class State(TypedDict):
+    messages: Annotated[list, operator.add]
+
+
+def build_graph(checkpointer, answer_seconds: float):
+    def answer(state: State) -> dict:
+        time.sleep(answer_seconds)  # stands in for the LLM call
+        return {"messages": ["answer " * 50]}
+
+    builder = StateGraph(State)
+    builder.add_node("answer", answer)
+    builder.set_entry_point("answer")
+    builder.set_finish_point("answer")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def run(name: str, checkpointer, sessions: int, turns: int, workers: int, answer_seconds: float) -> dict:
+    graph = build_graph(checkpointer, answer_seconds)
+    latencies = []
+    errors = []
+
+    def session(thread_id: int) -> None:
+        for turn in range(turns):
+            start = time.perf_counter()
+            try:
+                graph.invoke({"messages": [f"question {turn} " * 20]}, {"configurable": {"thread_id": str(thread_id)}})
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(session, range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "checkpointer": name,
+        "turns": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "seconds": round(elapsed, 3),
+        "turns_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--max-connections", type=int, default=8)
+    parser.add_argument("--answer-ms", type=float, default=0.0, help="simulated LLM time per turn")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        shared = SqliteSaver.from_conn_string(os.path.join(directory, "shared.db"))
+        results.append(run("SqliteSaver (one connection)", shared, args.sessions, args.turns, args.workers, args.answer_ms / 1000))
+        pool = SQLitePool(os.path.join(directory, "pooled.db"), max_connections=args.max_connections)
+        pooled = PooledSqliteSaver(pool)
+        results.append(run("PooledSqliteSaver", pooled, args.sessions, args.turns, args.workers, args.answer_ms / 1000))
+        shared.conn.close()
+        pool.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
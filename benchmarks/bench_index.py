@@ -0,0 +1,161 @@
+"""
+Benchmark recall against latency and memory for the FAISS index types that the ingestion
+tooling can build, to choose index settings for a large vector store.
+
+A synthetic corpus of clustered, normalized vectors stands in for chunk embeddings, and
+queries are perturbed copies of corpus vectors. Every index is built from a flat
+vectorstore with maeser.ingestion.indexes.reindex_vectorstore, like the ingestion scripts
+do, then searched one query at a time (as a retriever does) for each nprobe or efSearch
+setting. Recall is the fraction of the exact top k found by the index.
+
+Usage:
+    python benchmarks/bench_index.py --vectors 200000 --dim 1536 --output index.json
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.docstore.in_memory import InMemoryDocstore  # noqa: E402
+from langchain_community.vectorstores import FAISS  # noqa: E402
+from langchain_core.embeddings.fake import DeterministicFakeEmbedding  # noqa: E402
+from maeser.ingestion.indexes import INDEX_TYPES, configure_search, describe_index, reindex_vectorstore  # noqa: E402
+
+NPROBE_SWEEP = (1, 4, 16, 64, 256)
+EF_SEARCH_SWEEP = (16, 32, 64, 128, 256)
+
+
+def synthetic_corpus(vectors: int, dim: int, queries: int, clusters: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """Clustered unit vectors, like embeddings of chunks about a limited number of topics."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    corpus = centers[rng.integers(clusters, size=vectors)] + rng.standard_normal((vectors, dim), dtype=np.float32)
+    faiss.normalize_L2(corpus)
+    # Queries are about as far from their closest chunk as chunks of one topic are from each other
+    picked = corpus[rng.integers(vectors, size=queries)]
+    query_vectors = picked + rng.standard_normal((queries, dim), dtype=np.float32) / np.float32(np.sqrt(dim))
+    faiss.normalize_L2(query_vectors)
+    return corpus, query_vectors
+
+
+def flat_store(corpus: np.ndarray) -> FAISS:
+    """A vectorstore holding only vectors, which is all the indexes need."""
+    index = faiss.IndexFlatL2(corpus.shape[1])
+    index.add(corpus)
+    return FAISS(DeterministicFakeEmbedding(size=corpus.shape[1]), index, InMemoryDocstore(), {})
+
+
+def measure(index: faiss.Index, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        _, found = index.search(query[None], k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(found[0]) & set(expected))
+    latencies.sort()
+    return {
+        "recall": round(hits / truth.size, 4),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def run(index_type: str, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, args) -> list:
+    store = flat_store(corpus)
+    start = time.perf_counter()
+    if index_type != "flat":
+        reindex_vectorstore(store, index_type, nlist=args.nlist, pq_m=args.pq_m, hnsw_m=args.hnsw_m)
+    build_seconds = time.perf_counter() - start
+    index = store.index
+    index_bytes = faiss.serialize_index(index).nbytes
+    base = {
+        **describe_index(index),
+        "build_seconds": round(build_seconds, 2),
+        "megabytes": round(index_bytes / 1e6, 1),
+        "bytes_per_vector": round(index_bytes / index.ntotal, 1),
+    }
+
+    if index_type == "hnsw":
+        sweep = [{"ef_search": ef_search} for ef_search in EF_SEARCH_SWEEP]
+    elif index_type != "flat":
+        nlist = base["nlist"]
+        sweep = [{"nprobe": nprobe} for nprobe in NPROBE_SWEEP if nprobe <= nlist]
+    else:
+        sweep = [{}]
+    # Build with every core, like the ingestion scripts, but search with the threads of one request
+    build_threads = faiss.omp_get_max_threads()
+    faiss.omp_set_num_threads(args.threads)
+    results = []
+    for params in sweep:
+        configure_search(index, **params)
+        results.append({**base, **describe_index(index), **measure(index, queries, truth, args.k)})
+    faiss.omp_set_num_threads(build_threads)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a smoke test")
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=768, help="1536 for text-embedding-3-small, 3072 for -large")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--clusters", type=int, default=1000, help="topics in the synthetic corpus")
+    parser.add_argument("--k", type=int, default=4, help="documents retrieved per query, like retriever_k")
+    parser.add_argument("--index-types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--nlist", type=int, help="IVF lists (default: about 4 * sqrt(vectors))")
+    parser.add_argument("--pq-m", type=int, help="PQ bytes per vector (default: dim / 4)")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=1, help="FAISS threads per search; one matches a busy server")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+    if args.quick:
+        args.vectors, args.dim, args.queries, args.clusters = 20_000, 64, 200, 200
+
+    corpus, queries = synthetic_corpus(args.vectors, args.dim, args.queries, args.clusters, args.seed)
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+
+    results = {
+        "vectors": args.vectors,
+        "dim": args.dim,
+        "queries": args.queries,
+        "k": args.k,
+        "threads": args.threads,
+        "results": [row for index_type in args.index_types for row in run(index_type, corpus, queries, truth, args)],
+    }
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
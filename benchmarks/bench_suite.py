@@ -0,0 +1,283 @@
+"""
+Offline benchmark suite for Maeser's own overhead, separate from OpenAI latency.
+
+The OpenAI chat and embedding models are replaced by the deterministic fakes in
+benchmarks/fakes.py and the vector stores are built from a synthetic corpus, so the suite
+runs on a CPU-only machine without network access. It measures:
+
+- graph_build: time to build the simple and pipeline RAG graphs (startup cost)
+- ask_question: ChatSessionManager.ask_question latency with an instant LLM, with and without chat logging
+- log_write: time of one ChatLogsManager log write as the session grows
+- pages: latency of the /logs and / pages as the number of stored sessions grows
+- user_db: UserManager operations per second
+
+Results are printed (or written with --output) as JSON that includes the git commit, so
+runs can be compared across commits with benchmarks/compare.py.
+
+Usage:
+    python benchmarks/bench_suite.py --output before.json
+    python benchmarks/bench_suite.py --quick --only ask_question log_write
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+from fakes import StubGraph, build_corpus, patch_openai, synthetic_texts  # noqa: E402
+from maeser.blueprints import App_Manager  # noqa: E402
+from maeser.chat.chat_logs import ChatLogsManager  # noqa: E402
+from maeser.chat.chat_session_manager import ChatSessionManager  # noqa: E402
+from maeser.graphs.pipeline_rag import get_pipeline_rag  # noqa: E402
+from maeser.graphs.simple_rag import get_simple_rag  # noqa: E402
+from maeser.user_manager import BaseAuthenticator, LoginStyle, UserManager  # noqa: E402
+
+TOPICS = ["homework", "labs", "exams"]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize durations in seconds as milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[max(int(len(ordered) * 0.95) - 1, 0)] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def timed(function: Callable[[], object], repeat: int) -> List[float]:
+    """Run a function several times and return the duration of every run."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+@contextlib.contextmanager
+def quiet() -> object:
+    """Hide the progress output that Maeser prints, such as the output of UserManager.authenticate."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_graph_build(directory: str, corpus: Dict[str, str], repeat: int) -> dict:
+    counter = iter(range(10**9))
+
+    def simple():
+        get_simple_rag(corpus[TOPICS[0]], "index", os.path.join(directory, f"build{next(counter)}.db"))
+
+    def pipeline():
+        get_pipeline_rag(corpus, os.path.join(directory, f"build{next(counter)}.db"), topic_router="embedding")
+
+    return {
+        "simple_rag": summarize(timed(simple, repeat)),
+        "pipeline_rag": summarize(timed(pipeline, repeat)),
+    }
+
+
+def bench_ask_question(directory: str, corpus: Dict[str, str], questions: int) -> dict:
+    results = {}
+    texts = synthetic_texts(questions, words_per_text=12, seed=99)
+    for name, logs in (("no_logging", None), ("logging", ChatLogsManager(os.path.join(directory, "ask_logs")))):
+        manager = ChatSessionManager(chat_logs_manager=logs)
+        manager.register_branch("simple", "Simple", get_simple_rag(corpus[TOPICS[0]], "index", os.path.join(directory, f"ask_{name}.db")))
+        manager.register_branch("pipeline", "Pipeline", get_pipeline_rag(corpus, os.path.join(directory, f"ask_{name}.db"), topic_router="embedding"))
+        for branch in ("simple", "pipeline"):
+            samples = []
+            # Five-turn sessions, so the checkpoint grows like a real conversation
+            session = manager.get_new_session_id(branch)
+            for i, text in enumerate(texts):
+                if i % 5 == 0:
+                    session = manager.get_new_session_id(branch)
+                start = time.perf_counter()
+                manager.ask_question(text, branch, session)
+                samples.append(time.perf_counter() - start)
+            results[f"{branch}_{name}"] = summarize(samples)
+    return results
+
+
+def bench_log_write(directory: str, max_turns: int) -> dict:
+    logs = ChatLogsManager(os.path.join(directory, "write_logs"))
+    logs.log("simple", "session", {"user": None})
+    context = [Document(text) for text in synthetic_texts(4, seed=7)]
+    messages: List[str] = []
+    checkpoints = sorted({1, 10, 25, 50, 100, 200, max_turns} & set(range(1, max_turns + 1)))
+    results = {}
+    for turn in range(1, max_turns + 1):
+        messages += [f"question {turn}", "answer " * 60]
+        data = {"messages": messages, "retrieved_context": context, "execution_time": 0.5, "tokens_used": 900, "cost": 0.0002}
+        start = time.perf_counter()
+        logs.log("simple", "session", data)
+        elapsed = time.perf_counter() - start
+        if turn in checkpoints:
+            results[f"turn_{turn}_ms"] = round(elapsed * 1000, 3)
+    return results
+
+
+def bench_pages(directory: str, session_counts: List[int], turns_per_session: int, repeat: int) -> dict:
+    results = {}
+    context = [Document(text) for text in synthetic_texts(2, seed=3)]
+    for count in session_counts:
+        log_dir = os.path.join(directory, f"page_logs_{count}")
+        logs = ChatLogsManager(log_dir)
+        manager = ChatSessionManager(chat_logs_manager=logs)
+        manager.register_branch("simple", "Simple", StubGraph())  # type: ignore
+        for i in range(count):
+            session = manager.get_new_session_id("simple")
+            messages: List[str] = []
+            for turn in range(turns_per_session):
+                messages += [f"question {i} {turn}", "answer " * 60]
+                logs.log("simple", session, {"messages": messages, "retrieved_context": context, "tokens_used": 900, "cost": 0.0002})
+
+        app = Flask(__name__)
+        App_Manager(app=app, app_name="Bench", flask_secret_key="bench", chat_session_manager=manager, warm_up=False).add_flask_blueprint()
+        client = app.test_client()
+        for route in ("/logs", "/"):
+            assert client.get(route).status_code == 200, route
+            results[f"{route}@{count}"] = summarize(timed(lambda: client.get(route), repeat))
+    return results
+
+
+class BenchAuthenticator(BaseAuthenticator):
+    """Authenticator that accepts every user, so the benchmark only measures the user database."""
+
+    def __init__(self) -> None:
+        pass
+
+    def __str__(self) -> str:
+        return "BenchAuthenticator"
+
+    def authenticate(self, ident: str, password: str):
+        return ident, f"Student {ident}", "student"
+
+    def fetch_user(self, ident: str):
+        return None
+
+    @property
+    def style(self) -> LoginStyle:
+        return LoginStyle("person", "login")
+
+
+def bench_user_db(directory: str, users: int) -> dict:
+    manager = UserManager(os.path.join(directory, "users.db"))
+    manager.register_authenticator("bench", BenchAuthenticator())
+    idents = [f"user{i}" for i in range(users)]
+    operations = {
+        "authenticate": lambda ident: manager.authenticate("bench", ident, "password"),
+        "get_user": lambda ident: manager.get_user("bench", ident),
+        "decrease_requests": lambda ident: manager.decrease_requests("bench", ident),
+        "get_requests_remaining": lambda ident: manager.get_requests_remaining("bench", ident),
+    }
+    results = {}
+    with quiet():
+        for name, operation in operations.items():
+            start = time.perf_counter()
+            for ident in idents:
+                operation(ident)
+            results[f"{name}_ops_per_second"] = round(users / (time.perf_counter() - start), 1)
+        start = time.perf_counter()
+        for _ in range(10):
+            manager.list_users()
+        results["list_users_ms"] = round((time.perf_counter() - start) * 100, 3)
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+BENCHMARKS = ("graph_build", "ask_question", "log_write", "pages", "user_db")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a smoke test")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--chunks", type=int, default=None, help="chunks per synthetic vector store")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    sizes = {
+        "chunks": args.chunks or (200 if args.quick else 2000),
+        "repeat": 3 if args.quick else 10,
+        "questions": 20 if args.quick else 200,
+        "log_turns": 25 if args.quick else 100,
+        "sessions": [10, 50] if args.quick else [10, 100, 500],
+        "page_repeat": 3 if args.quick else 5,
+        "users": 100 if args.quick else 1000,
+    }
+
+    results: dict = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as directory, patch_openai():
+        corpus = build_corpus(os.path.join(directory, "stores"), TOPICS, sizes["chunks"])
+        for name in args.only:
+            start = time.perf_counter()
+            if name == "graph_build":
+                result = bench_graph_build(directory, corpus, sizes["repeat"])
+            elif name == "ask_question":
+                result = bench_ask_question(directory, corpus, sizes["questions"])
+            elif name == "log_write":
+                result = bench_log_write(directory, sizes["log_turns"])
+            elif name == "pages":
+                result = bench_pages(directory, sizes["sessions"], 5, sizes["page_repeat"])
+            else:
+                result = bench_user_db(directory, sizes["users"])
+            results["results"][name] = result
+            print(f"{name} finished in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
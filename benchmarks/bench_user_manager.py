@@ -0,0 +1,143 @@
+"""
+Benchmark the user database overhead of authenticated requests with many concurrent users,
+opening a new SQLite connection per operation versus the UserManager's connection pool,
+with and without its user cache.
+
+Every simulated request loads its user, as Flask-Login's user loader does. Some requests
+are questions, which also decrease the user's remaining requests and read them back, like
+the chat endpoint. The per-operation baseline reproduces the previous UserManager, which
+called sqlite3.connect for every operation on a database in the default rollback journal
+mode and had no user cache.
+
+Usage:
+    python benchmarks/bench_user_manager.py --users 128 --requests 50
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from maeser.sqlite_pool import SQLitePool  # noqa: E402
+from maeser.user_manager import GithubAuthenticator, UserManager  # noqa: E402
+
+
+class PerOperationUserManager(UserManager):
+    """UserManager as it was before connection pooling: one new connection per operation, no WAL."""
+
+    connections_opened = 0
+
+    def _open_pool(self, max_connections):
+        # Only used to satisfy the constructor; leaves the database in rollback journal mode
+        return SQLitePool(self.db_file_path, max_connections=1, pragmas={})
+
+    @property
+    def db_connection(self):
+        type(self).connections_opened += 1
+        return sqlite3.connect(self.db_file_path)
+
+
+def run(name: str, manager: UserManager, users: int, requests: int, question_every: int, think_seconds: float) -> dict:
+    manager.register_authenticator("github", GithubAuthenticator("id", "secret", "http://localhost/callback"))
+    idents = [f"student{i}" for i in range(users)]
+    for ident in idents:
+        manager._create_or_update_user("github", ident, ident.title(), "guest")
+    manager.refresh_requests(manager.max_requests)
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(users)
+
+    def user_session(ident: str) -> None:
+        start_barrier.wait()
+        for request in range(requests):
+            start = time.perf_counter()
+            try:
+                manager.get_user("github", ident)
+                if request % question_every == 0:
+                    manager.decrease_requests("github", ident)
+                    manager.get_requests_remaining("github", ident)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+            if think_seconds:
+                time.sleep(think_seconds)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(user_session, idents))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pool_size = manager._pool.size if not isinstance(manager, PerOperationUserManager) else None
+    return {
+        "user_manager": name,
+        "users": users,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+        "connections_opened": PerOperationUserManager.connections_opened if pool_size is None else pool_size,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=128, help="concurrent users, one thread each")
+    parser.add_argument("--requests", type=int, default=50, help="authenticated requests per user")
+    parser.add_argument("--question-every", type=int, default=4,
+                        help="every nth request is a question, which also updates the user's remaining requests")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between a user's requests")
+    parser.add_argument("--max-connections", type=int, default=8)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        managers = {
+            "connection per operation": PerOperationUserManager(
+                os.path.join(directory, "per_operation.db"), max_requests=args.requests, user_cache_ttl=0),
+            "pooled (WAL)": UserManager(
+                os.path.join(directory, "pooled.db"), max_requests=args.requests, max_connections=args.max_connections,
+                user_cache_ttl=0),
+            "pooled (WAL) with user cache": UserManager(
+                os.path.join(directory, "cached.db"), max_requests=args.requests, max_connections=args.max_connections),
+        }
+        for name, manager in managers.items():
+            results.append(run(name, manager, args.users, args.requests, args.question_every, args.think_ms / 1000))
+            manager.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare two result files of benchmarks/bench_suite.py, for example from before and after a change.
+
+Every numeric result present in both files is listed with its relative change. Timings
+(keys ending in _ms) improve when they go down; rates (keys ending in _per_second) improve
+when they go up. Changes beyond --threshold are flagged.
+
+Usage:
+    python benchmarks/compare.py before.json after.json --threshold 10
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+from typing import Dict
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    """Flatten nested results to {'benchmark.case.metric': value} for the numeric values."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and not key == "n":
+            flat[name] = float(value)
+    return flat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change to flag")
+    args = parser.parse_args()
+
+    with open(args.before) as file:
+        before = json.load(file)
+    with open(args.after) as file:
+        after = json.load(file)
+
+    print(f"before: {before.get('commit')} ({before.get('timestamp')})")
+    print(f"after:  {after.get('commit')} ({after.get('timestamp')})")
+    if before.get("sizes") != after.get("sizes"):
+        print("\x1b[33mWarning: the runs used different sizes, results may not be comparable.\x1b[0m")
+
+    old, new = flatten(before["results"]), flatten(after["results"])
+    width = max((len(name) for name in old.keys() & new.keys()), default=10)
+    for name in sorted(old.keys() & new.keys()):
+        change = (new[name] - old[name]) / old[name] * 100 if old[name] else 0.0
+        higher_is_better = name.endswith("_per_second")
+        improved = change > 0 if higher_is_better else change < 0
+        flag = ""
+        if abs(change) >= args.threshold:
+            flag = "  faster" if improved else "  SLOWER"
+        print(f"{name:<{width}}  {old[name]:>12.3f}  {new[name]:>12.3f}  {change:>+8.1f}%{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Deterministic offline stand-ins for ChatOpenAI and OpenAIEmbeddings, and a synthetic corpus
+builder, so that Maeser's own overhead can be measured without network access or a GPU.
+
+The benchmarks patch these classes into the graph modules in place of the OpenAI ones:
+
+    with patch_openai():
+        graph = get_simple_rag(...)
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List
+from unittest.mock import patch
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from maeser.graphs.bm25 import BM25Index, bm25_path
+
+WORDS = (
+    "algorithm array binary boolean branch buffer cache class compiler constant debug "
+    "exception file function graph hash heap index integer interface iterator kernel lambda "
+    "list loop memory method module object operator parser pointer process queue recursion "
+    "register return scope socket stack string syntax thread tree tuple type variable vector"
+).split()
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Hashed bag-of-words embeddings. Texts sharing words get similar vectors, so retrieval
+    results are meaningful, and the same text always gets the same vector.
+    """
+
+    def __init__(self, dimensions: int = 256, latency_seconds: float = 0.0, **kwargs: Any) -> None:
+        self.dimensions = dimensions
+        self.latency_seconds = latency_seconds
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeChatOpenAI(BaseChatModel):
+    """
+    Chat model that answers instantly (or after ``latency_seconds``) with a fixed reply and
+    reports OpenAI-style token usage, so the cost accounting of ``ask_question`` still runs.
+    Topic extraction prompts of the pipeline graph are answered with the first listed topic.
+    """
+
+    model_name: str = "gpt-4o-mini"
+    temperature: float = 0.7
+    response: str = "Here is an answer based on the course material."
+    latency_seconds: float = 0.0
+
+    def __init__(self, model: str = "gpt-4o-mini", api_key: Any = None, **kwargs: Any) -> None:
+        super().__init__(model_name=model, **kwargs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-openai-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: List[str] | None = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        prompt = "\n".join(str(message.content) for message in messages)
+        topic = re.search(r"Using these topics exactly \('([^']+)'", prompt)
+        response = topic.group(1) if topic else self.response
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(response) // 4
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=response))],
+            llm_output={
+                "model_name": self.model_name,
+                "token_usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        )
+
+
+class StubGraph:
+    """
+    Stand-in for a compiled graph: keeps each thread's messages in memory and answers after a fixed delay,
+    without retrieval or checkpointing.
+    """
+
+    def __init__(self, answer_seconds: float = 0.0) -> None:
+        self.answer_seconds = answer_seconds
+        self.context = [Document(text) for text in synthetic_texts(4, seed=5)]
+        self._threads: Dict[str, list] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def invoke(self, state: dict, config: dict) -> dict:
+        if self.answer_seconds:
+            time.sleep(self.answer_seconds)
+        with self._lock:
+            messages = self._threads[config["configurable"]["thread_id"]]
+            messages += state["messages"] + ["Here is an answer based on the course material. " * 8]
+            return {"messages": list(messages), "retrieved_context": self.context, "message_count": len(messages)}
+
+    def get_state(self, config: dict) -> SimpleNamespace:
+        with self._lock:
+            messages = list(self._threads.get(config["configurable"]["thread_id"], []))
+        return SimpleNamespace(values={"messages": messages}, metadata={})
+
+    def update_state(self, config: dict, values: dict, as_node: str | None = None) -> None:
+        with self._lock:
+            self._threads[config["configurable"]["thread_id"]] += values.get("messages", [])
+
+
+@contextmanager
+def patch_openai(llm_latency_seconds: float = 0.0, embedding_latency_seconds: float = 0.0) -> Iterator[None]:
+    """
+    Replace ChatOpenAI and OpenAIEmbeddings in the graph modules with the fakes.
+
+    Args:
+        llm_latency_seconds (float): Simulated latency of every LLM call. Defaults to 0.
+        embedding_latency_seconds (float): Simulated latency of every embedding call. Defaults to 0.
+    """
+    def chat(*args: Any, **kwargs: Any) -> FakeChatOpenAI:
+        return FakeChatOpenAI(*args, latency_seconds=llm_latency_seconds, **kwargs)
+
+    def embeddings(*args: Any, **kwargs: Any) -> FakeEmbeddings:
+        return FakeEmbeddings(latency_seconds=embedding_latency_seconds)
+
+    with ExitStack() as stack:
+        for module in ("maeser.graphs.simple_rag", "maeser.graphs.pipeline_rag"):
+            stack.enter_context(patch(f"{module}.ChatOpenAI", chat))
+            stack.enter_context(patch(f"{module}.OpenAIEmbeddings", embeddings))
+        yield
+
+
+def synthetic_texts(count: int, words_per_text: int = 120, seed: int = 0) -> List[str]:
+    """
+    Generate reproducible pseudo course material.
+
+    Args:
+        count (int): Number of texts.
+        words_per_text (int): Words per text. Defaults to 120.
+        seed (int): Random seed. Defaults to 0.
+
+    Returns:
+        List[str]: The texts.
+    """
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_text)) for _ in range(count)]
+
+
+def build_corpus(directory: str, topics: List[str], chunks_per_topic: int = 500, seed: int = 0) -> Dict[str, str]:
+    """
+    Build and save one FAISS vector store, with its BM25 index, per topic.
+
+    Args:
+        directory (str): Directory to save the vector stores in.
+        topics (List[str]): Topic names, one vector store each.
+        chunks_per_topic (int): Number of chunks per vector store. Defaults to 500.
+        seed (int): Random seed. Defaults to 0.
+
+    Returns:
+        Dict[str, str]: Mapping of topic to vector store path, as expected by get_pipeline_rag.
+    """
+    config = {}
+    for offset, topic in enumerate(topics):
+        texts = synthetic_texts(chunks_per_topic, seed=seed + offset)
+        store = FAISS.from_texts(
+            texts, FakeEmbeddings(), metadatas=[{"source": f"{topic}/{i}.txt"} for i in range(len(texts))]
+        )
+        path = os.path.join(directory, topic)
+        store.save_local(path)
+        BM25Index.from_vectorstore(store).save(bm25_path(path))
+        config[topic] = path
+    return config
@@ -0,0 +1,205 @@
+"""
+HTTP load test of a Maeser Flask app, to find where the Flask layer, the user database or
+the chat log store saturate.
+
+The script boots App_Manager on a local threaded Werkzeug server, with user management and
+chat logging enabled and stub graphs registered through ChatSessionManager.register_branch.
+Concurrent simulated students then log in, load the chat page, open sessions, send several
+messages, leave feedback, reload the conversation history and poll their remaining
+requests, like the chat interface does. Throughput and p50/p95/p99 latency are reported
+per endpoint as JSON.
+
+Usage:
+    python benchmarks/load_test.py --students 32 --sessions 2 --turns 5
+    python benchmarks/load_test.py --graph rag --answer-ms 0 --output load.json
+    python benchmarks/load_test.py --burst --coalesce --answer-ms 2000 --sessions 1 --turns 1
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests  # noqa: E402
+from flask import Flask  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+from bench_suite import BenchAuthenticator  # noqa: E402
+from fakes import StubGraph, build_corpus, patch_openai, synthetic_texts  # noqa: E402
+from maeser.blueprints import App_Manager  # noqa: E402
+from maeser.chat.chat_logs import ChatLogsManager  # noqa: E402
+from maeser.chat.chat_session_manager import ChatSessionManager  # noqa: E402
+from maeser.graphs.simple_rag import get_simple_rag  # noqa: E402
+from maeser.user_manager import UserManager  # noqa: E402
+
+BRANCHES = {"homework": "Homework Help", "labs": "Lab Help"}
+
+
+class Recorder:
+    """Thread-safe collection of request latencies and status codes per endpoint."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def request(self, client: requests.Session, endpoint: str, method: str, url: str, **kwargs) -> requests.Response | None:
+        start = time.perf_counter()
+        try:
+            response = client.request(method, url, timeout=120, **kwargs)
+            status = str(response.status_code)
+        except requests.RequestException as e:
+            response, status = None, type(e).__name__
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            self.statuses[endpoint][status] += 1
+        return response
+
+    def report(self, seconds: float) -> Dict[str, dict]:
+        def percentile(ordered: List[float], fraction: float) -> float:
+            return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000, 2)
+
+        report = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            report[endpoint] = {
+                "requests": len(ordered),
+                "requests_per_second": round(len(ordered) / seconds, 1),
+                "statuses": dict(self.statuses[endpoint]),
+                "p50_ms": percentile(ordered, 0.50),
+                "p95_ms": percentile(ordered, 0.95),
+                "p99_ms": percentile(ordered, 0.99),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+        return report
+
+
+def student(base_url: str, number: int, args: argparse.Namespace, recorder: Recorder) -> None:
+    """Simulate one student using the chat interface."""
+    rng = random.Random(number)
+    client = requests.Session()
+    recorder.request(client, "POST /login", "POST", f"{base_url}/login", allow_redirects=False,
+                     data={"username": f"student{number}", "password": "password", "authvalidator": "bench"})
+    recorder.request(client, "GET /", "GET", f"{base_url}/")
+
+    for _ in range(args.sessions):
+        branch = list(BRANCHES)[0] if args.burst else rng.choice(list(BRANCHES))
+        response = recorder.request(client, "POST /req_session", "POST", f"{base_url}/req_session",
+                                    json={"action": branch, "type": "new"})
+        if response is None or response.status_code != 200:
+            continue
+        session = response.json()["response"]
+
+        for turn in range(args.turns):
+            time.sleep(rng.uniform(0, 2 * args.think_ms / 1000))
+            seed = turn if args.burst and turn == 0 else number * 1000 + turn
+            response = recorder.request(client, "POST /msg/<session>", "POST", f"{base_url}/msg/{session}",
+                                        json={"action": branch, "message": synthetic_texts(1, 15, seed=seed)[0]})
+            recorder.request(client, "GET /get_requests_remaining", "GET", f"{base_url}/get_requests_remaining")
+            if response is not None and response.status_code == 200 and rng.random() < args.feedback_rate:
+                recorder.request(client, "POST /feedback", "POST", f"{base_url}/feedback", json={
+                    "branch": branch, "session_id": session, "message": "", "like": rng.random() < 0.8,
+                    "index": response.json()["index"],
+                })
+
+        recorder.request(client, "POST /conversation_history", "POST", f"{base_url}/conversation_history",
+                         json={"session": session, "branch": branch})
+
+
+def build_app(directory: str, args: argparse.Namespace) -> Flask:
+    chat_logs = ChatLogsManager(os.path.join(directory, "chat_logs"))
+    sessions = ChatSessionManager(chat_logs_manager=chat_logs, coalesce_requests=args.coalesce)
+    if args.graph == "rag":
+        corpus = build_corpus(os.path.join(directory, "stores"), list(BRANCHES), args.chunks)
+        for branch, label in BRANCHES.items():
+            sessions.register_branch(branch, label, get_simple_rag(corpus[branch], "index", os.path.join(directory, "memory.db")))
+    else:
+        for branch, label in BRANCHES.items():
+            sessions.register_branch(branch, label, StubGraph(args.answer_ms / 1000))  # type: ignore
+
+    users = UserManager(os.path.join(directory, "users.db"), max_requests=args.max_requests)
+    users.register_authenticator("bench", BenchAuthenticator())
+
+    app = Flask(__name__)
+    App_Manager(app=app, app_name="Load Test", flask_secret_key="load-test",
+                chat_session_manager=sessions, user_manager=users).add_flask_blueprint()
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--students", type=int, default=32, help="concurrent simulated students")
+    parser.add_argument("--sessions", type=int, default=2, help="chat sessions per student")
+    parser.add_argument("--turns", type=int, default=5, help="messages per session")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause before each message")
+    parser.add_argument("--feedback-rate", type=float, default=0.3, help="fraction of answers that get feedback")
+    parser.add_argument("--graph", choices=("stub", "rag"), default="stub",
+                        help="'stub' answers from memory, 'rag' runs the simple RAG graph with fake OpenAI models")
+    parser.add_argument("--answer-ms", type=float, default=0.0, help="simulated LLM time per call")
+    parser.add_argument("--chunks", type=int, default=500, help="chunks per synthetic vector store for --graph rag")
+    parser.add_argument("--burst", action="store_true", help="every student asks the same first question, like after a class announcement")
+    parser.add_argument("--coalesce", action="store_true", help="share one graph run between identical concurrent first questions")
+    parser.add_argument("--max-requests", type=int, default=10000, help="rate limit per student")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    # Werkzeug logs every request, and Maeser prints on every login and feedback
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory, patch_openai(args.answer_ms / 1000), contextlib.redirect_stdout(io.StringIO()):
+        app = build_app(directory, args)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        recorder = Recorder()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.students) as executor:
+            list(executor.map(lambda number: student(base_url, number, args, recorder), range(args.students)))
+        seconds = time.perf_counter() - start
+        server.shutdown()
+
+    results = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "seconds": round(seconds, 2),
+        "requests_per_second": round(sum(len(samples) for samples in recorder.latencies.values()) / seconds, 1),
+        "endpoints": recorder.report(seconds),
+    }
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -36,9 +36,20 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
 documents = text_splitter.create_documents([text])
 
-# Save the vectorized text to a local FAISS vectorstore
+# Save the vectorized text to a local FAISS vectorstore, embedding batches concurrently.
+# Rate limits slow the stage down instead of failing it, and completed batches are
+# checkpointed, so rerunning after an error only embeds what is left.
 
-from langchain_community.vectorstores import FAISS
+from maeser.ingestion.embedding import EmbeddingStage, build_vectorstore
 
-db = FAISS.from_documents(documents, OpenAIEmbeddings())
+embeddings = OpenAIEmbeddings(max_retries=0)
+stage = EmbeddingStage(embeddings, checkpoint_dir="vectorstores/.checkpoints/maeser")
+db = build_vectorstore(documents, embeddings, stage=stage)
 db.save_local("vectorstores/maeser")
+stage.clear_checkpoints()
+
+# Save a BM25 keyword index next to the vectorstore for hybrid retrieval
+
+from maeser.graphs.bm25 import BM25Index, bm25_path
+
+BM25Index.from_vectorstore(db).save(bm25_path("vectorstores/maeser"))
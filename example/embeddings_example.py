@@ -30,4 +30,8 @@ vectorstore = FAISS.from_texts(
 )
 
 # Persist to disk
-vectorstore.save_local("my_vectorstore")
\ No newline at end of file
+vectorstore.save_local("my_vectorstore")
+
+# Persist a BM25 keyword index next to it for hybrid retrieval
+from maeser.graphs.bm25 import BM25Index, bm25_path
+BM25Index.from_vectorstore(vectorstore).save(bm25_path("my_vectorstore"))
\ No newline at end of file
@@ -39,9 +39,8 @@ pipeline_prompt: str = """You are speaking from the perspective of Karl G. Maese
 
     {context}
 """
-from maeser.graphs.simple_rag import get_simple_rag
+from functools import partial
 from maeser.graphs.pipeline_rag import get_pipeline_rag
-from langgraph.graph.graph import CompiledGraph
 
 # One for the history of BYU and one for the life of Karl G. Maeser.
 # Ensure that topics are all lower case and spaces between words
@@ -50,14 +49,25 @@ vectorstore_config = {
     "karl g maeser": f"{VEC_STORE_PATH}/maeser"  # Vectorstore for Karl G. Maeser.
 }
 
-byu_maeser_pipeline_rag: CompiledGraph = get_pipeline_rag(
-    vectorstore_config=vectorstore_config, 
-    memory_filepath=f"{VEC_STORE_PATH}/pipeline_memory.db",
-    api_key=OPENAI_API_KEY, 
-    system_prompt_text=(pipeline_prompt),
-    model=LLM_MODEL_NAME)
-  
-sessions_manager.register_branch(branch_name="pipeline", branch_label="Pipeline", graph=byu_maeser_pipeline_rag)
+# Build the graph in the background once the app starts, so Flask can serve /healthz right away;
+# /readyz reports when the vector stores and memory database are loaded.
+sessions_manager.register_branch(
+    branch_name="pipeline",
+    branch_label="Pipeline",
+    graph_factory=partial(
+        get_pipeline_rag,
+        vectorstore_config=vectorstore_config,
+        memory_filepath=f"{VEC_STORE_PATH}/pipeline_memory.db",
+        api_key=OPENAI_API_KEY,
+        system_prompt_text=pipeline_prompt,
+        model=LLM_MODEL_NAME,
+    ),
+)
+
+from maeser.graphs.checkpointer import CheckpointMaintainer
+
+# Keep only the latest checkpoint of each conversation and forget conversations idle for 30 days
+CheckpointMaintainer(f"{VEC_STORE_PATH}/pipeline_memory.db", ttl_seconds=30 * 24 * 60 * 60).start()
 
 from flask import Flask
 
@@ -70,7 +80,9 @@ app_manager = App_Manager(
     app_name="Maeser Test App -- NO USER MANAGER",
     flask_secret_key="secret",
     chat_session_manager=sessions_manager,
-    chat_head="/static/Karl_G_Maeser.png"
+    chat_head="/static/Karl_G_Maeser.png",
+    # Build the branch graphs in the background as soon as the app starts
+    warm_up=True,
     # Note that you can change other aspects too! Heres some examples below
     # main_logo_login="/static/main_logo_login.png",
     # favicon="/static/favicon.png",
@@ -29,9 +29,14 @@ You should have received a copy of the GNU Lesser General Public License along w
 Maeser. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from . import chat
-from . import controllers
-from . import user_manager
-from . import render
+import importlib
 
 __all__ = ['chat', 'controllers', 'user_manager', 'render']
+
+
+def __getattr__(name: str):
+    # Subpackages are imported on first use, so scripts that only need one of them do not
+    # pay for Flask, LangChain and LDAP at import time
+    if name in __all__:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
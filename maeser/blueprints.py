@@ -48,6 +48,8 @@ from .controllers import (
     remaining_requests_api,
     manage_users_view,
     user_management_api,
+    metrics_api,
+    health_api,
 )
 
 
@@ -79,6 +81,11 @@ class App_Manager:
         logout_button (str, optional): Color of the logout button. Defaults to "#333".
         new_chat_button (str, optional): Color of the new chat button. Defaults to "#333".
         help_train_button (str, optional): Color of the help train button. Defaults to "#eee".
+        enable_metrics (bool, optional): Whether to record per-route request metrics and serve all metrics in the
+            Prometheus text format at /metrics. Defaults to False.
+        warm_up (bool, optional): Whether add_flask_blueprint starts building the branch graphs and opening their
+            checkpointers in the background, so the app can serve /healthz while /readyz reports when every
+            branch is loaded. A branch's warm-up question, if any, costs one LLM call. Defaults to False.
     """
 
     def __init__(
@@ -113,6 +120,10 @@ class App_Manager:
         logout_button: str = "#000000",
         new_chat_button: str = "#000000",
         help_train_button: str = "#a8a8a8",
+        # monitoring
+        enable_metrics: bool = False,
+        # startup
+        warm_up: bool = False,
     ):
         self.app = app
         self.app_name = app_name
@@ -144,6 +155,9 @@ class App_Manager:
         self.new_chat_button = new_chat_button
         self.help_train_button = help_train_button
 
+        self.enable_metrics = enable_metrics
+        self.warm_up = warm_up
+
         self.current_dir = os.path.dirname(os.path.abspath(__file__ + "/."))
 
         # The following functions with no code are work in progress and will be added soon
@@ -403,5 +417,26 @@ class App_Manager:
                 """Route for getting conversation history."""
                 return conversation_history_api.controller(self.chat_session_manager)
 
+        @maeser_blueprint.route("/healthz")
+        def healthz():
+            """Route for liveness checks."""
+            return health_api.liveness_controller()
+
+        @maeser_blueprint.route("/readyz")
+        def readyz():
+            """Route for readiness checks."""
+            return health_api.readiness_controller(self.chat_session_manager)
+
+        if self.warm_up:
+            self.chat_session_manager.warm_up(background=True)
+
+        if self.enable_metrics:
+            metrics_api.track_requests(self.app)
+
+            @maeser_blueprint.route("/metrics")
+            def metrics():
+                """Route for Prometheus metrics."""
+                return metrics_api.controller()
+
         self.app.register_blueprint(maeser_blueprint)
         return self.app
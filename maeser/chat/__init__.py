@@ -22,7 +22,13 @@ You should have received a copy of the GNU Lesser General Public License along w
 Maeser. If not, see <https://www.gnu.org/licenses/>.
 """
 
-from . import chat_logs
-from . import chat_session_manager
+import importlib
 
-__all__ = ["chat_logs", "chat_session_manager"]
\ No newline at end of file
+__all__ = ["chat_logs", "chat_session_manager"]
+
+
+def __getattr__(name: str):
+    # Importing chat_logs alone, e.g. for a log export job, should not load LangChain
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -26,7 +26,6 @@ import time
 import yaml
 from os import path, stat, walk, mkdir, makedirs
 import subprocess
-from flask import abort, render_template
 import platform
 
 
@@ -353,6 +352,8 @@ class ChatLogsManager(BaseChatLogsManager):
         Returns:
             str: The rendered template for the log file.
         """
+        # Flask is only needed to render logs, not to read or write them
+        from flask import abort, render_template
 
         def process_messages(messages: dict) -> dict:
             """
@@ -617,6 +618,7 @@ class ChatLogsManager(BaseChatLogsManager):
                     "execution_time": log_data.get("execution_time", 0),
                     "tokens_used": log_data.get("tokens_used", 0),
                     "cost": log_data.get("cost", 0),
+                    "node_metrics": log_data.get("node_metrics", []),
                 }
             )
 
@@ -19,10 +19,53 @@ Maeser. If not, see <https://www.gnu.org/licenses/>.
 
 from maeser.chat.chat_logs import BaseChatLogsManager
 from maeser.user_manager import User
+import copy
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
 from uuid import uuid4 as uid
-from langchain_community.callbacks import get_openai_callback
-from langgraph.graph.graph import CompiledGraph
+from maeser.graphs.instrumentation import observe_node_metrics, record_node_metrics
+from maeser.metrics import LATENCY_BUCKETS, REGISTRY
+
+if TYPE_CHECKING:
+    from langgraph.graph.graph import CompiledGraph
+
+QUESTIONS_IN_FLIGHT = REGISTRY.gauge(
+    'maeser_questions_in_flight', 'Questions currently being answered, each waiting on one or more LLM calls.', ('branch',))
+QUESTION_SECONDS = REGISTRY.histogram(
+    'maeser_question_seconds', 'Time to answer a question, including all LLM calls.', LATENCY_BUCKETS, ('branch',))
+LLM_TOKENS = REGISTRY.counter('maeser_llm_tokens_total', 'LLM tokens used.', ('branch',))
+LLM_COST = REGISTRY.counter('maeser_llm_cost_dollars_total', 'LLM cost in US dollars.', ('branch',))
+COALESCED_QUESTIONS = REGISTRY.counter(
+    'maeser_coalesced_questions_total', 'First-turn questions answered with the result of an identical in-flight question.', ('branch',))
+
+
+def get_openai_callback():
+    """
+    Opens a callback that counts the tokens and cost of the OpenAI calls made inside it.
+
+    LangChain's callback module is imported on the first question rather than with this
+    module, since importing it takes about a second.
+
+    Returns:
+        ContextManager[OpenAICallbackHandler]: The ``langchain_community`` OpenAI callback context manager.
+    """
+    from langchain_community.callbacks import get_openai_callback as openai_callback
+    return openai_callback()
+
+
+class _Flight:
+    """
+    A graph run for a first-turn question that identical concurrent questions wait on.
+    """
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.response: dict | None = None
+        self.state: dict | None = None
+        self.as_node: str | None = None
+        self.error: BaseException | None = None
 
 class ChatSessionManager:
     """
@@ -32,36 +75,206 @@ class ChatSessionManager:
     def __init__(
         self,
         chat_logs_manager: BaseChatLogsManager | None = None,
+        coalesce_requests: bool = False,
     ) -> None:
         """
         Initializes the chat session manager.
 
         Args:
             chat_logs_manager (BaseChatLogsManager | None): The chat logs manager to use for logging chat data.
+            coalesce_requests (bool): Whether identical first-turn questions asked concurrently in the same branch
+                share one graph run. Each session still gets its own copy of the answer, history and log. Defaults to False.
 
         Returns:
             None
         """
         self.chat_logs_manager: BaseChatLogsManager | None = chat_logs_manager
         self.graphs: dict = {}
+        self.coalesce_requests: bool = coalesce_requests
+        self._flights: dict[tuple[str, str], _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._build_locks: dict[str, threading.Lock] = {}
+        self._warmup_lock = threading.Lock()
+        self._warmup_thread: threading.Thread | None = None
+        self._warmup_started = False
 
-    def register_branch(self, branch_name: str, branch_label: str, graph: CompiledGraph) -> None:
+    def register_branch(
+        self,
+        branch_name: str,
+        branch_label: str,
+        graph: 'CompiledGraph | None' = None,
+        graph_factory: 'Callable[[], CompiledGraph] | None' = None,
+        warmup_question: str | None = None,
+    ) -> None:
         """
         Registers a branch with its information and graph.
 
+        Building a graph loads its vector stores and opens its checkpointer, which can take a while. Passing
+        graph_factory instead of graph defers that work to ``warm_up`` or, failing that, to the first question.
+        A branch registered with a built graph is ready at once; one registered with a factory becomes ready
+        when its graph is built.
+
         Args:
             branch_name (str): The name of the branch.
             branch_label (str): The label of the branch.
-            graph (CompiledGraph): The graph for the branch.
-        
+            graph (CompiledGraph | None): The graph for the branch. Defaults to None.
+            graph_factory (Callable[[], CompiledGraph] | None): Builds the graph for the branch, used when graph
+                is None. Defaults to None.
+            warmup_question (str | None): Question asked once by ``warm_up`` to prime the branch's caches.
+                Defaults to None (no question is asked).
+
+        Raises:
+            ValueError: If neither or both of graph and graph_factory are given.
+
         Returns:
             None
         """
+        if (graph is None) == (graph_factory is None):
+            raise ValueError(f'Branch "{branch_name}" needs either a graph or a graph_factory')
         self.graphs[branch_name] = {
             'label': branch_label,
-            'graph': graph
+            'graph': graph,
+            'graph_factory': graph_factory,
+            'warmup_question': warmup_question,
+            'status': 'pending' if graph is None else 'ready',
+            'error': None,
+        }
+        self._build_locks[branch_name] = threading.Lock()
+
+    def get_graph(self, branch_name: str) -> 'CompiledGraph':
+        """
+        Gets the graph of a branch, building it first if it was registered with a graph factory.
+
+        The branch's status is 'loading' while its graph is built, then 'ready', or 'failed' if the factory raised.
+        A failed build is tried again on the next call.
+
+        Args:
+            branch_name (str): The name of the branch.
+
+        Returns:
+            CompiledGraph: The graph for the branch.
+        """
+        branch = self.graphs[branch_name]
+        if branch.get('graph') is None:
+            with self._build_locks.setdefault(branch_name, threading.Lock()):
+                if branch.get('graph') is None:
+                    branch['status'] = 'loading'
+                    try:
+                        branch['graph'] = branch['graph_factory']()
+                    except Exception as e:
+                        branch['status'] = 'failed'
+                        branch['error'] = f'{type(e).__name__}: {e}'
+                        raise
+                    branch['status'] = 'ready'
+                    branch['error'] = None
+        return branch['graph']
+
+    def warm_up(self, background: bool = True) -> threading.Thread | None:
+        """
+        Builds every branch graph, opens its checkpointer and asks its warm-up question, if any.
+
+        Branches are warmed up concurrently. Only the first call does anything. Branches registered later,
+        or never warmed up, are built by ``build_pending`` or on their first question instead.
+
+        Args:
+            background (bool): Whether to return immediately and warm up in a daemon thread. Defaults to True.
+
+        Returns:
+            threading.Thread | None: The warm-up thread when running in the background, otherwise None.
+        """
+        with self._warmup_lock:
+            if self._warmup_started:
+                return self._warmup_thread
+            self._warmup_started = True
+            if background:
+                self._warmup_thread = threading.Thread(target=self._warm_up_branches, name='maeser-warmup', daemon=True)
+                self._warmup_thread.start()
+                return self._warmup_thread
+        self._warm_up_branches()
+        return None
+
+    def build_pending(self) -> None:
+        """
+        Starts building the graph of every branch that is still waiting for its first question or warm-up.
+
+        Each graph is built in its own daemon thread, without asking a warm-up question. The readiness
+        route calls this, so an app without warm-up still becomes ready before it is sent any question.
+
+        Returns:
+            None
+        """
+        with self._warmup_lock:
+            pending = [name for name, branch in self.graphs.items() if branch.get('status') == 'pending']
+            for name in pending:
+                # Claimed here so concurrent probes start one build per branch
+                self.graphs[name]['status'] = 'loading'
+        for name in pending:
+            threading.Thread(target=self._build_branch, args=(name,), name=f'maeser-build-{name}', daemon=True).start()
+
+    def _build_branch(self, branch_name: str) -> None:
+        """Build one branch graph, reporting a failure as a warning."""
+        try:
+            self.get_graph(branch_name)
+        except Exception:
+            print(f'\x1b[33mWarning: branch "{branch_name}" failed to build: {self.graphs[branch_name]["error"]}\x1b[0m')
+
+    def _warm_up_branches(self) -> None:
+        """Warm up every registered branch, each in its own thread."""
+        branch_names = list(self.graphs)
+        if not branch_names:
+            return
+        with ThreadPoolExecutor(max_workers=len(branch_names), thread_name_prefix='maeser-warmup') as executor:
+            list(executor.map(self._warm_up_branch, branch_names))
+
+    def _warm_up_branch(self, branch_name: str) -> None:
+        """
+        Build one branch graph, open its checkpointer and ask its warm-up question.
+
+        Only building the graph decides the branch's status. Opening the checkpointer and asking the
+        warm-up question merely prime it, so their failures are reported as warnings.
+        """
+        branch = self.graphs[branch_name]
+        start = time.perf_counter()
+        try:
+            graph = self.get_graph(branch_name)
+        except Exception:
+            print(f'\x1b[33mWarning: branch "{branch_name}" failed to build: {branch["error"]}\x1b[0m')
+            return
+        try:
+            # Reading a conversation opens the checkpointer and creates its tables
+            config = {'configurable': {'thread_id': f'warmup-{branch_name}-{uid()}'}}
+            graph.get_state(config)
+            if branch.get('warmup_question'):
+                graph.invoke({'messages': [branch['warmup_question']]}, config=config)
+        except Exception as e:
+            print(f'\x1b[33mWarning: branch "{branch_name}" failed to warm up: {type(e).__name__}: {e}\x1b[0m')
+            return
+        print(f'Branch "{branch_name}" is ready ({time.perf_counter() - start:.1f}s)')
+
+    @property
+    def readiness(self) -> dict:
+        """
+        Returns the warm-up status of every branch.
+
+        Returns:
+            dict: Maps each branch name to 'pending', 'loading', 'ready' or 'failed: <error>'.
+        """
+        return {
+            name: branch['status'] if branch.get('status') != 'failed' else f"failed: {branch['error']}"
+            for name, branch in self.graphs.items()
         }
 
+    @property
+    def ready(self) -> bool:
+        """
+        Returns whether every branch's graph has been built successfully.
+
+        Returns:
+            bool: True once every branch was registered with its graph, or built it by ``warm_up``,
+                ``build_pending`` or a question.
+        """
+        return all(branch.get('status') == 'ready' for branch in self.graphs.values())
+
     def get_new_session_id(self, branch_name: str, user: User | None = None) -> str:
         """
         Creates a new chat session for the given branch action.
@@ -100,23 +313,106 @@ class ChatSessionManager:
         """
         config = {'configurable': {'thread_id': sess_id}}
         start_time = time.time()
-        # Get token count for the response
-        with get_openai_callback() as cb:
-            response = self.graphs[branch_name]['graph'].invoke({
-                'messages': [message],
-            }, config=config)
-            response['tokens_used'] = cb.total_tokens
-            response['cost'] = cb.total_cost
+        if self.coalesce_requests:
+            response, node_metrics = self._ask_coalesced(message, branch_name, config)
+        else:
+            response, node_metrics = self._run_graph(message, branch_name, config)
         end_time = time.time()
         execution_time = end_time - start_time
 
         response['execution_time'] = execution_time
+        response['node_metrics'] = node_metrics
+        observe_node_metrics(branch_name, node_metrics)
+        QUESTION_SECONDS.observe(execution_time, branch=branch_name)
+        LLM_TOKENS.inc(response['tokens_used'], branch=branch_name)
+        LLM_COST.inc(response['cost'], branch=branch_name)
         
         if self.chat_logs_manager:
             self.chat_logs_manager.log(branch_name, sess_id, response)
         
         return response
     
+    def _run_graph(self, message: str, branch_name: str, config: dict) -> tuple[dict, list]:
+        """
+        Runs the graph of a branch for one question.
+
+        Args:
+            message (str): The question to ask.
+            branch_name (str): The action of the branch to ask the question in.
+            config (dict): The graph config, with the session ID as thread ID.
+
+        Returns:
+            tuple[dict, list]: The response, with its token count and cost, and the metrics of each graph node.
+        """
+        # Get token count for the response, and the latency and token count of each graph node
+        with get_openai_callback() as cb, record_node_metrics() as node_metrics, QUESTIONS_IN_FLIGHT.track_in_progress(branch=branch_name):
+            response = self.get_graph(branch_name).invoke({
+                'messages': [message],
+            }, config=config)
+            response['tokens_used'] = cb.total_tokens
+            response['cost'] = cb.total_cost
+        return response, node_metrics
+
+    def _ask_coalesced(self, message: str, branch_name: str, config: dict) -> tuple[dict, list]:
+        """
+        Runs the graph of a branch for one question, sharing the run with identical concurrent first-turn questions.
+
+        The first caller runs the graph. Identical questions asked while it runs wait for it, then copy its
+        conversation state into their own session, so follow-up questions continue from the same answer.
+        Questions in sessions that already have history are never coalesced.
+
+        Args:
+            message (str): The question to ask.
+            branch_name (str): The action of the branch to ask the question in.
+            config (dict): The graph config, with the session ID as thread ID.
+
+        Returns:
+            tuple[dict, list]: The response and the metrics of each graph node. Copied responses report no
+                tokens, cost or node metrics, since no LLM call was made for them.
+        """
+        graph = self.get_graph(branch_name)
+        if graph.get_state(config).values.get('messages'):
+            return self._run_graph(message, branch_name, config)
+
+        key = (branch_name, message.strip())
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+
+        if leader:
+            try:
+                response, node_metrics = self._run_graph(message, branch_name, config)
+                # Read the new conversation state once for all followers, and copy the response
+                # before ask_question adds the leader's own execution time and metrics
+                snapshot = graph.get_state(config)
+                flight.state = snapshot.values
+                flight.as_node = next(iter((snapshot.metadata or {}).get('writes') or {}), None)
+                flight.response = copy.deepcopy(response)
+                return response, node_metrics
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with self._flights_lock:
+                    del self._flights[key]
+                flight.done.set()
+
+        with QUESTIONS_IN_FLIGHT.track_in_progress(branch=branch_name):
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+
+        # Give this session the same first turn, as if the graph had run in it
+        graph.update_state(config, flight.state, as_node=flight.as_node)
+        COALESCED_QUESTIONS.inc(branch=branch_name)
+
+        response = copy.deepcopy(flight.response)
+        response['tokens_used'] = 0
+        response['cost'] = 0.0
+        return response, []
+
     def add_feedback(self, branch_name: str, session_id: str, message_index: int, feedback: str) -> None:
         """
         Adds feedback to the log for a specific response in a specific session.
@@ -32,6 +32,8 @@ from . import (
     training,
     training_post,
     conversation_history_api,
+    metrics_api,
+    health_api,
 )
 from . import common
 
@@ -49,5 +51,7 @@ __all__ = [
     'training',
     'training_post',
     'conversation_history_api',
+    'metrics_api',
+    'health_api',
     'common',
 ]
\ No newline at end of file
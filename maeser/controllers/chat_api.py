@@ -41,4 +41,6 @@ def controller(chat_sessions_manager: ChatSessionManager, chat_session: str):
         print(f'{type(e)}, {e}: Rate limit reached')
         abort(503, description='Rate limit reached, please try again later')
     
-    return {'response': get_response_html(response['messages'][-1]), 'index': len(response['messages']) - 1}
+    # The stored history may be trimmed by a history policy, so index by the total message count
+    index = response.get('message_count') or len(response['messages'])
+    return {'response': get_response_html(response['messages'][-1]), 'index': index - 1}
@@ -20,6 +20,9 @@ Maeser. If not, see <https://www.gnu.org/licenses/>.
 
 from functools import wraps
 from flask import abort
+from maeser.metrics import REGISTRY
+
+RATE_LIMIT_REJECTIONS = REGISTRY.counter('maeser_rate_limit_rejections_total', 'Requests rejected because the user had no requests remaining.')
 
 def rate_limited(auth_manager, current_user):
     """
@@ -38,6 +41,7 @@ def rate_limited(auth_manager, current_user):
             # Check if user has any requests remaining before proceeding
             if current_user.requests_remaining <= 0:
                 print(f'User ({current_user.full_id_name}) has no requests remaining')
+                RATE_LIMIT_REJECTIONS.inc()
                 abort(429, 'Rate limit reached, please try again later')
 
             result = endpoint(*args, **kwargs)
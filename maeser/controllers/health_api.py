@@ -0,0 +1,51 @@
+"""
+This module provides the liveness and readiness endpoints used by load balancers and
+container orchestrators.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from maeser.chat.chat_session_manager import ChatSessionManager
+
+
+def liveness_controller() -> tuple[dict, int]:
+    """Report that the process is up and serving requests.
+
+    Returns:
+        tuple[dict, int]: The status and the HTTP status code 200.
+    """
+    return {'status': 'ok'}, 200
+
+
+def readiness_controller(chat_session_manager: ChatSessionManager) -> tuple[dict, int]:
+    """Report whether every branch has loaded its retrievers and checkpointer.
+
+    Branches whose graph is still waiting to be built start building in the background, so an app
+    that is only sent traffic once ready does not wait forever for a first question.
+
+    Args:
+        chat_session_manager (ChatSessionManager): The chat session manager whose branches are checked.
+
+    Returns:
+        tuple[dict, int]: The status of every branch, with the HTTP status code 200 when all of them are
+            ready and 503 otherwise.
+    """
+    chat_session_manager.build_pending()
+    ready = chat_session_manager.ready
+    return {
+        'status': 'ready' if ready else 'not ready',
+        'branches': chat_session_manager.readiness,
+    }, 200 if ready else 503
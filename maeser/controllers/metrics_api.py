@@ -0,0 +1,80 @@
+"""
+This module provides the Prometheus metrics endpoint and per-route request metrics.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+from flask import Flask, Response, g, request
+from maeser.metrics import LATENCY_BUCKETS, REGISTRY, MetricsRegistry
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'maeser_http_requests_total', 'HTTP requests by route, method and status code.', ('route', 'method', 'status'))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'maeser_http_request_seconds', 'HTTP request latency by route and method.', LATENCY_BUCKETS, ('route', 'method'))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge('maeser_http_requests_in_flight', 'HTTP requests currently being handled.')
+
+
+def _route() -> str:
+    """Get the route template of the current request, e.g. '/msg/<chat_session>'."""
+    return request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+
+def _finish_request(status: int) -> None:
+    """Record the latency and status of the current request, once."""
+    start = g.pop('_maeser_request_start', None)
+    if start is None:
+        return
+    HTTP_REQUESTS_IN_FLIGHT.dec()
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, route=_route(), method=request.method)
+    HTTP_REQUESTS.inc(route=_route(), method=request.method, status=status)
+
+
+def track_requests(app: Flask) -> None:
+    """Record request counts and latency for every route of a Flask app.
+
+    Args:
+        app (Flask): The Flask application.
+
+    Returns:
+        None
+    """
+    @app.before_request
+    def start_request_timer():
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        g._maeser_request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        _finish_request(response.status_code)
+        return response
+
+    @app.teardown_request
+    def record_failed_request(exception):
+        # after_request is skipped when a view raises an unhandled exception
+        _finish_request(500)
+
+
+def controller(registry: MetricsRegistry = REGISTRY) -> Response:
+    """Render the collected metrics in the Prometheus text format.
+
+    Args:
+        registry (MetricsRegistry): The registry to render. Defaults to the Maeser registry.
+
+    Returns:
+        Response: The metrics exposition.
+    """
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
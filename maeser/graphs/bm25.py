@@ -0,0 +1,218 @@
+"""
+Module for a local BM25 keyword index that is stored alongside a FAISS vectorstore.
+
+Dense embeddings handle exact identifiers (lab names, function names, course numbers)
+poorly, so this sparse index is used together with FAISS for hybrid retrieval.
+It runs entirely locally with no network access.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from os import path
+from typing import Dict, Iterable, List, Set, Tuple
+from langchain_community.vectorstores import FAISS
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms, keeping identifiers such as ``lab_3`` or ``ecen330`` intact.
+
+    Identifiers joined by underscores are also indexed by their parts, so ``draw_line``
+    matches questions about ``draw`` or ``line``.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The terms in the text.
+    """
+    tokens: List[str] = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if "_" in token:
+            tokens.extend(part for part in token.split("_") if part)
+    return tokens
+
+
+def bm25_path(vectorstore_path: str, index_name: str = "index") -> str:
+    """
+    Get the file path of the BM25 index stored next to a FAISS vectorstore.
+
+    Args:
+        vectorstore_path (str): The directory of the FAISS vectorstore.
+        index_name (str): The index name of the FAISS vectorstore. Defaults to 'index'.
+
+    Returns:
+        str: The path of the BM25 index file.
+    """
+    return path.join(vectorstore_path, f"{index_name}.bm25.json")
+
+
+class BM25Index:
+    """
+    Okapi BM25 index over the chunks of a vectorstore, keyed by docstore ID.
+    """
+
+    def __init__(
+        self,
+        doc_ids: List[str],
+        doc_lengths: List[int],
+        postings: Dict[str, List[Tuple[int, int]]],
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> None:
+        """
+        Initializes the BM25Index. Use ``from_texts``, ``from_vectorstore`` or ``load`` to build one.
+
+        Args:
+            doc_ids (List[str]): The docstore ID of each indexed chunk.
+            doc_lengths (List[int]): The number of terms in each indexed chunk.
+            postings (Dict[str, List[Tuple[int, int]]]): Mapping of term to (chunk position, term frequency) pairs.
+            k1 (float): Term frequency saturation parameter. Defaults to 1.5.
+            b (float): Length normalization parameter. Defaults to 0.75.
+        """
+        self.doc_ids: List[str] = doc_ids
+        self.doc_lengths: List[int] = doc_lengths
+        self.postings: Dict[str, List[Tuple[int, int]]] = postings
+        self.k1: float = k1
+        self.b: float = b
+        self.average_length: float = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+
+    @classmethod
+    def from_texts(cls, doc_ids: Iterable[str], texts: Iterable[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """
+        Build an index from chunk texts.
+
+        Args:
+            doc_ids (Iterable[str]): The ID of each chunk.
+            texts (Iterable[str]): The text of each chunk.
+            k1 (float): Term frequency saturation parameter. Defaults to 1.5.
+            b (float): Length normalization parameter. Defaults to 0.75.
+
+        Returns:
+            BM25Index: The constructed index.
+        """
+        ids: List[str] = []
+        lengths: List[int] = []
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for position, (doc_id, text) in enumerate(zip(doc_ids, texts)):
+            terms = tokenize(text)
+            ids.append(doc_id)
+            lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                postings.setdefault(term, []).append((position, frequency))
+        return cls(ids, lengths, postings, k1=k1, b=b)
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: FAISS, k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """
+        Build an index over every chunk stored in a FAISS vectorstore.
+
+        Args:
+            vectorstore (FAISS): The vectorstore to index.
+            k1 (float): Term frequency saturation parameter. Defaults to 1.5.
+            b (float): Length normalization parameter. Defaults to 0.75.
+
+        Returns:
+            BM25Index: The constructed index.
+        """
+        doc_ids = list(vectorstore.index_to_docstore_id.values())
+        texts = [vectorstore.docstore.search(doc_id).page_content for doc_id in doc_ids]
+        return cls.from_texts(doc_ids, texts, k1=k1, b=b)
+
+    def search(self, query: str, k: int = 4, allowed_ids: Set[str] | None = None) -> List[Tuple[str, float]]:
+        """
+        Find the chunks that best match a query.
+
+        Args:
+            query (str): The query text.
+            k (int): The number of results to return. Defaults to 4.
+            allowed_ids (Set[str] | None): Only score the chunks with these docstore IDs, for example the
+                chunks matching a metadata filter. Defaults to None (every chunk).
+
+        Returns:
+            List[Tuple[str, float]]: (docstore ID, BM25 score) pairs, best first. Chunks sharing no
+                terms with the query are not returned.
+        """
+        total = len(self.doc_ids)
+        if total == 0:
+            return []
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                if allowed_ids is not None and self.doc_ids[position] not in allowed_ids:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[position] / (self.average_length or 1)
+                gain = idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                scores[position] = scores.get(position, 0.0) + gain
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.doc_ids[position], score) for position, score in best]
+
+    def save(self, file_path: str) -> None:
+        """
+        Save the index as JSON.
+
+        The file is written next to its destination and moved into place, so processes loading
+        it concurrently never read a partial index.
+
+        Args:
+            file_path (str): The file to write, usually from ``bm25_path``.
+
+        Returns:
+            None
+        """
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump({
+                    "k1": self.k1,
+                    "b": self.b,
+                    "doc_ids": self.doc_ids,
+                    "doc_lengths": self.doc_lengths,
+                    "postings": self.postings,
+                }, file)
+            os.replace(temp_path, file_path)
+        finally:
+            if path.exists(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> "BM25Index":
+        """
+        Load an index saved with ``save``.
+
+        Args:
+            file_path (str): The file to read.
+
+        Returns:
+            BM25Index: The loaded index.
+        """
+        with open(file_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        postings = {term: [tuple(entry) for entry in entries] for term, entries in data["postings"].items()}
+        return cls(data["doc_ids"], data["doc_lengths"], postings, k1=data["k1"], b=data["b"])
@@ -0,0 +1,385 @@
+"""
+Module for the SQLite checkpoint (memory) databases used by the graphs.
+
+``PooledSqliteSaver`` lets many sessions checkpoint concurrently and can be shared by
+several graphs. ``SqliteSaver`` stores a new checkpoint for every step of every
+conversation and never deletes any of them, so ``CheckpointMaintainer`` compacts those
+databases down to the latest checkpoint per thread, expires idle threads and reclaims
+the freed disk space.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator
+from uuid import UUID
+from langgraph.checkpoint.sqlite import SqliteSaver
+from maeser.sqlite_pool import SQLitePool
+
+VACUUM_MODES = ('incremental', 'full', 'none')
+
+# 100-ns intervals between the UUID epoch (1582-10-15) and the Unix epoch
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+# Same tables SqliteSaver creates, so maintenance also works on a database no graph has opened yet
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    thread_ts TEXT NOT NULL,
+    parent_ts TEXT,
+    checkpoint BLOB,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, thread_ts)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    thread_ts TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    value BLOB,
+    PRIMARY KEY (thread_id, thread_ts, task_id, idx)
+);
+"""
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver that borrows a pooled connection for every operation instead of sharing one connection.
+
+    Reads from different sessions run in parallel, and writers wait on SQLite's busy timeout
+    instead of failing.
+    """
+
+    def __init__(self, pool: SQLitePool, **kwargs) -> None:
+        """
+        Initializes the PooledSqliteSaver.
+
+        Args:
+            pool (SQLitePool): The connection pool of the checkpoint database.
+            **kwargs: Passed on to SqliteSaver, e.g. serde.
+        """
+        super().__init__(conn=None, **kwargs)  # type: ignore
+        self.pool: SQLitePool = pool
+        self._setup_lock = threading.Lock()
+
+    def setup(self) -> None:
+        """
+        Create the checkpoint tables if they don't exist yet.
+
+        Returns:
+            None
+        """
+        if self.is_setup:
+            return
+        with self._setup_lock, self.pool.connection() as conn:
+            if not self.is_setup:
+                conn.executescript(_SCHEMA)
+                self.is_setup = True
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        """
+        Get a cursor on a pooled connection for the duration of one operation.
+
+        Args:
+            transaction (bool): Whether to commit the transaction when the cursor is closed. Defaults to True.
+
+        Yields:
+            sqlite3.Cursor: A cursor for the checkpoint database.
+        """
+        self.setup()
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                yield cur
+                if transaction:
+                    conn.commit()
+            finally:
+                cur.close()
+
+    def __exit__(self, *exc_info) -> None:
+        self.pool.close()
+
+
+_checkpointers: Dict[str, PooledSqliteSaver] = {}
+_checkpointers_lock = threading.Lock()
+
+
+def get_checkpointer(db_path: str, max_connections: int = 8, busy_timeout_seconds: float = 30.0) -> PooledSqliteSaver:
+    """
+    Get the shared checkpointer of a checkpoint database, creating it on first use.
+
+    Graphs built with the same memory_filepath share one checkpointer and connection pool.
+
+    Args:
+        db_path (str): Path of the checkpoint database.
+        max_connections (int): Maximum number of concurrent connections, used when the checkpointer is created. Defaults to 8.
+        busy_timeout_seconds (float): How long to wait for a concurrent writer, used when the checkpointer is created.
+            Defaults to 30 seconds.
+
+    Returns:
+        PooledSqliteSaver: The shared checkpointer.
+    """
+    if db_path == ':memory:':
+        # Every connection to ':memory:' is a separate database, so it can be neither pooled nor shared
+        return PooledSqliteSaver(SQLitePool(db_path, max_connections=1, busy_timeout_seconds=busy_timeout_seconds))
+    key = os.path.abspath(db_path)
+    with _checkpointers_lock:
+        if key not in _checkpointers:
+            pool = SQLitePool(db_path, max_connections=max_connections, busy_timeout_seconds=busy_timeout_seconds)
+            _checkpointers[key] = PooledSqliteSaver(pool)
+        return _checkpointers[key]
+
+
+def _checkpoint_id_floor(moment: datetime) -> str:
+    """
+    Get the smallest checkpoint ID that SqliteSaver could have written at a given time.
+
+    Checkpoint IDs are time-ordered UUIDv6 strings, so every checkpoint written before
+    ``moment`` compares lower than the returned ID.
+    """
+    timestamp = int(moment.timestamp() * 10_000_000) + _UUID_EPOCH_OFFSET
+    uuid_int = ((timestamp >> 12) & 0xFFFFFFFFFFFF) << 80
+    uuid_int |= 0x6 << 76  # version
+    uuid_int |= (timestamp & 0x0FFF) << 64
+    uuid_int |= 0x8 << 60  # RFC 4122 variant
+    return str(UUID(int=uuid_int))
+
+
+class CheckpointMaintainer:
+    """
+    Compacts, expires and vacuums a SqliteSaver checkpoint database, once or on a schedule.
+
+    Only the newest checkpoint of each thread is needed to continue a conversation, so older
+    checkpoints and the pending writes attached to them are deleted. Threads whose newest
+    checkpoint is older than the TTL are deleted entirely; the conversation itself is still
+    available in the chat logs.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: float | None = 30 * 24 * 60 * 60,
+        interval_seconds: float = 60 * 60,
+        vacuum: str = 'incremental',
+        busy_timeout_seconds: float = 30.0,
+    ) -> None:
+        """
+        Initializes the CheckpointMaintainer.
+
+        Args:
+            db_path (str): Path of the checkpoint database (the memory_filepath passed to a graph factory).
+            ttl_seconds (float | None): Threads idle for longer than this are deleted. Defaults to 30 days.
+                None disables expiry.
+            interval_seconds (float): Time between maintenance runs when started with ``start``. Defaults to 1 hour.
+            vacuum (str): How freed pages are returned to the file system after each run. 'incremental' uses
+                SQLite incremental vacuum, which is cheap and does not block writers for long. 'full' runs
+                VACUUM, which rewrites the whole file. 'none' leaves freed pages for reuse. Defaults to 'incremental'.
+            busy_timeout_seconds (float): How long to wait for graphs writing to the database. Defaults to 30 seconds.
+
+        Raises:
+            ValueError: If vacuum is invalid.
+        """
+        if vacuum not in VACUUM_MODES:
+            raise ValueError(f"Invalid vacuum mode: {vacuum}, must be one of {VACUUM_MODES}")
+        self.db_path: str = db_path
+        self.ttl_seconds: float | None = ttl_seconds
+        self.interval_seconds: float = interval_seconds
+        self.vacuum_mode: str = vacuum
+        self.busy_timeout_seconds: float = busy_timeout_seconds
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode, with WAL enabled and the checkpoint tables present."""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_seconds, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def compact(self) -> int:
+        """
+        Delete every checkpoint except the newest one of each thread, along with their pending writes.
+
+        Returns:
+            int: The number of checkpoints deleted.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            deleted = conn.execute(
+                """
+                DELETE FROM checkpoints
+                WHERE thread_ts < (
+                    SELECT MAX(latest.thread_ts) FROM checkpoints AS latest
+                    WHERE latest.thread_id = checkpoints.thread_id
+                )
+                """
+            ).rowcount
+            conn.execute(
+                """
+                DELETE FROM writes
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints
+                    WHERE checkpoints.thread_id = writes.thread_id AND checkpoints.thread_ts = writes.thread_ts
+                )
+                """
+            )
+            conn.execute('COMMIT')
+            return deleted
+        finally:
+            conn.close()
+
+    def expire(self, now: datetime | None = None) -> int:
+        """
+        Delete threads whose newest checkpoint is older than the TTL.
+
+        Args:
+            now (datetime | None): The current time. Defaults to None (use the system clock).
+
+        Returns:
+            int: The number of threads deleted.
+        """
+        if self.ttl_seconds is None:
+            return 0
+        now = now or datetime.now(timezone.utc)
+        cutoff = (now - timedelta(seconds=self.ttl_seconds)).astimezone(timezone.utc)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            # Checkpoints are keyed by UUIDv6 IDs; databases written by older LangGraph versions use
+            # UTC ISO-8601 timestamps instead. Both sort chronologically as strings.
+            expired = [row[0] for row in conn.execute(
+                """
+                SELECT thread_id FROM checkpoints GROUP BY thread_id
+                HAVING CASE WHEN MAX(thread_ts) GLOB '[0-9][0-9][0-9][0-9]-*'
+                    THEN MAX(thread_ts) < :iso ELSE MAX(thread_ts) < :uuid END
+                """,
+                {'iso': cutoff.isoformat(), 'uuid': _checkpoint_id_floor(cutoff)},
+            )]
+            conn.executemany('DELETE FROM checkpoints WHERE thread_id = ?', [(thread_id,) for thread_id in expired])
+            conn.executemany('DELETE FROM writes WHERE thread_id = ?', [(thread_id,) for thread_id in expired])
+            conn.execute('COMMIT')
+            return len(expired)
+        finally:
+            conn.close()
+
+    def vacuum(self) -> None:
+        """
+        Return freed pages to the file system and truncate the write-ahead log.
+
+        The first incremental vacuum of a database converts it to incremental auto-vacuum,
+        which requires one full VACUUM.
+
+        Returns:
+            None
+        """
+        if self.vacuum_mode == 'none':
+            return
+        conn = self._connect()
+        try:
+            if self.vacuum_mode == 'full':
+                conn.execute('VACUUM')
+            elif conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                conn.execute('VACUUM')
+            else:
+                conn.execute('PRAGMA incremental_vacuum').fetchall()
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+        finally:
+            conn.close()
+
+    def stats(self) -> dict:
+        """
+        Report the size of the checkpoint database.
+
+        Returns:
+            dict: The database and WAL file sizes in bytes, and the number of threads, checkpoints and writes.
+        """
+        conn = self._connect()
+        try:
+            threads = conn.execute('SELECT COUNT(DISTINCT thread_id) FROM checkpoints').fetchone()[0]
+            checkpoints = conn.execute('SELECT COUNT(*) FROM checkpoints').fetchone()[0]
+            writes = conn.execute('SELECT COUNT(*) FROM writes').fetchone()[0]
+        finally:
+            conn.close()
+        wal_path = f'{self.db_path}-wal'
+        return {
+            'db_path': self.db_path,
+            'file_bytes': os.path.getsize(self.db_path),
+            'wal_bytes': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+            'threads': threads,
+            'checkpoints': checkpoints,
+            'writes': writes,
+        }
+
+    def run_once(self) -> dict:
+        """
+        Expire idle threads, compact the remaining ones and vacuum the database.
+
+        Returns:
+            dict: The ``stats`` after maintenance, plus the number of expired threads and deleted checkpoints.
+        """
+        expired_threads = self.expire()
+        deleted_checkpoints = self.compact()
+        self.vacuum()
+        return {**self.stats(), 'expired_threads': expired_threads, 'deleted_checkpoints': deleted_checkpoints}
+
+    def start(self) -> threading.Thread:
+        """
+        Run maintenance immediately and then every ``interval_seconds`` in a daemon thread.
+
+        Returns:
+            threading.Thread: The maintenance thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._stop_event.clear()
+
+        def maintain():
+            """Run maintenance at regular intervals until stopped."""
+            while not self._stop_event.is_set():
+                try:
+                    report = self.run_once()
+                    print(
+                        f"Checkpoint maintenance for {report['db_path']}: {report['file_bytes']} bytes, "
+                        f"{report['threads']} threads, {report['checkpoints']} checkpoints, {report['writes']} writes "
+                        f"({report['expired_threads']} threads expired, {report['deleted_checkpoints']} checkpoints compacted)"
+                    )
+                except sqlite3.Error as e:
+                    print(f"\x1b[33mWarning: Checkpoint maintenance for {self.db_path} failed: {e}\x1b[0m")
+                self._stop_event.wait(self.interval_seconds)
+
+        self._thread = threading.Thread(target=maintain, daemon=True, name='maeser-checkpoint-maintenance')
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """
+        Stop scheduled maintenance after the current run finishes.
+
+        Returns:
+            None
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
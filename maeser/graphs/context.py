@@ -0,0 +1,205 @@
+"""
+Module for assembling the retrieved documents into the context of the generation prompt.
+
+By default, the list of retrieved documents is rendered into the prompt as is, metadata
+included, however long the chunks are. A context policy, passed to a graph factory,
+formats each chunk as its text and a few chosen metadata fields, and packs the
+highest-ranked chunks into a token budget, so the prompt size of every turn is bounded.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+from langchain_core.documents.base import Document
+from maeser.graphs.retrieval import document_key
+from maeser.graphs.instrumentation import record_node_values
+from maeser.graphs.tokens import count_message_tokens, count_tokens, load_encoding, message_text, truncate_tokens
+
+_SPACES = re.compile(r'[ \t\f\v]+')
+_BLANK_LINES = re.compile(r'\n\s*\n\s*')
+
+
+def clean_text(text: str) -> str:
+    """
+    Collapse the runs of spaces and blank lines that PDF and HTML extraction leave in chunks.
+
+    Args:
+        text (str): The chunk text.
+
+    Returns:
+        str: The text with single spaces, at most one blank line in a row and no surrounding whitespace.
+    """
+    return _BLANK_LINES.sub('\n\n', _SPACES.sub(' ', text)).strip()
+
+
+class ContextPolicy:
+    """
+    Policy for turning retrieved documents into the text of the prompt's ``{context}`` slot.
+
+    Documents are taken in the order the retriever ranked them. Exact duplicates are skipped,
+    and a document that does not fit in what is left of the budget is skipped in favor of
+    shorter, lower-ranked ones. If not even the top document fits, its beginning is used.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int | None = None,
+        metadata_fields: Sequence[str] = ('source',),
+        separator: str = '\n\n',
+        model: str = 'gpt-4o-mini',
+    ) -> None:
+        """
+        Initializes the ContextPolicy.
+
+        Args:
+            max_tokens (int | None): Token budget of the context. Defaults to None (every retrieved document).
+            metadata_fields (Sequence[str]): Metadata fields written above each document, such as its source,
+                so the LLM can cite it. Other metadata is left out. Defaults to ('source',).
+            separator (str): Text between documents. Defaults to a blank line.
+            model (str): Model whose tokenizer is used to count tokens. Defaults to 'gpt-4o-mini'.
+
+        Raises:
+            ValueError: If max_tokens is negative.
+        """
+        if max_tokens is not None and max_tokens < 0:
+            raise ValueError("max_tokens must not be negative")
+        self.max_tokens: int | None = max_tokens
+        self.metadata_fields: Tuple[str, ...] = tuple(metadata_fields)
+        self.separator: str = separator
+        self.model: str = model
+
+    def load_tokenizer(self) -> bool:
+        """
+        Load the tokenizer of the policy's model, so packing the first question's context does not wait for it.
+
+        Returns:
+            bool: True if the tokenizer is available, False if token counts will be estimated.
+        """
+        return load_encoding(self.model)
+
+    def format_document(self, document: Document) -> str:
+        """
+        Format one document for the context.
+
+        Args:
+            document (Document): The retrieved document.
+
+        Returns:
+            str: The chosen metadata fields on one line, followed by the cleaned document text.
+        """
+        header = ', '.join(
+            f'{field}: {document.metadata[field]}' for field in self.metadata_fields if document.metadata.get(field) is not None
+        )
+        text = clean_text(document.page_content)
+        return f'[{header}]\n{text}' if header else text
+
+    def pack(self, documents: Iterable[Document]) -> Tuple[str, List[Document], int]:
+        """
+        Pack the highest-ranked documents into the token budget.
+
+        Args:
+            documents (Iterable[Document]): The retrieved documents, best first.
+
+        Returns:
+            Tuple[str, List[Document], int]: The context text, the documents it includes and its number of tokens.
+        """
+        separator_tokens = count_tokens(self.separator, self.model)
+        parts: List[str] = []
+        packed: List[Document] = []
+        seen = set()
+        total = 0
+        for document in documents or []:
+            key = document_key(document)
+            if key in seen:
+                continue
+            seen.add(key)
+            text = self.format_document(document)
+            tokens = count_tokens(text, self.model) + (separator_tokens if parts else 0)
+            if self.max_tokens is not None and total + tokens > self.max_tokens:
+                if parts:
+                    continue
+                text = truncate_tokens(text, self.max_tokens, self.model)
+                tokens = count_tokens(text, self.model)
+                if not text:
+                    continue
+            parts.append(text)
+            packed.append(document)
+            total += tokens
+        return self.separator.join(parts), packed, total
+
+
+def prompt_token_counts(
+    system_prompt_text: str,
+    context_tokens: int,
+    history: List[Any],
+    question: Any,
+    model: str = 'gpt-4o-mini',
+) -> Dict[str, int]:
+    """
+    Count the tokens of each part of a generation prompt, before it is sent.
+
+    Args:
+        system_prompt_text (str): The system prompt template, with its ``{context}`` placeholder.
+        context_tokens (int): The tokens of the packed context.
+        history (List[Any]): The conversation history sent with the question, including any summary.
+        question (Any): The question.
+        model (str): Model whose tokenizer is used. Defaults to 'gpt-4o-mini'.
+
+    Returns:
+        Dict[str, int]: The tokens of the 'system' prompt, 'context', 'history' and 'question', and their 'total'.
+    """
+    counts = {
+        'system': count_tokens(system_prompt_text.replace('{context}', ''), model),
+        'context': context_tokens,
+        'history': count_message_tokens(history, model),
+        'question': count_tokens(message_text(question), model),
+    }
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def build_context(
+    context_policy: ContextPolicy | None,
+    documents: List[Document],
+    system_prompt_text: str,
+    history: List[Any],
+    question: Any,
+) -> Any:
+    """
+    Get the value of a generation prompt's ``{context}`` placeholder.
+
+    With a context policy, the documents are packed into its budget, and the token counts of the
+    prompt and the number of packed documents are reported with ``record_node_values``.
+
+    Args:
+        context_policy (ContextPolicy | None): The graph's context policy, if any.
+        documents (List[Document]): The retrieved documents, best first.
+        system_prompt_text (str): The system prompt template, with its ``{context}`` placeholder.
+        history (List[Any]): The conversation history sent with the question, including any summary.
+        question (Any): The question.
+
+    Returns:
+        Any: The packed context text, or the documents unchanged when there is no policy.
+    """
+    if context_policy is None:
+        return documents
+    context, packed, context_tokens = context_policy.pack(documents)
+    record_node_values(
+        prompt_tokens=prompt_token_counts(system_prompt_text, context_tokens, history, question, context_policy.model),
+        context_documents=len(packed),
+    )
+    return context
@@ -0,0 +1,202 @@
+"""
+Module for metadata-filtered retrieval, so that one vectorstore can serve several units,
+weeks or document types instead of loading one vectorstore per topic.
+
+A metadata index maps every metadata value to the FAISS positions of the chunks that have
+it. A filter is resolved to a set of positions by set operations on those precomputed
+arrays, and the search runs inside FAISS with an ID selector, so it returns the k best
+chunks that match the filter rather than filtering the k best chunks afterwards.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Set, Tuple
+import faiss
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores import FAISS
+from maeser.ingestion.indexes import search_parameters
+
+
+def _values(value: Any) -> List[str]:
+    """Get the index keys of a metadata or filter value; lists, tuples and sets match any of their items."""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [str(item) for item in value]
+    return [str(value)]
+
+
+def filter_key(metadata_filter: Dict[str, Any] | None) -> str:
+    """
+    Get a canonical string for a metadata filter, for use in cache keys.
+
+    Args:
+        metadata_filter (Dict[str, Any] | None): The filter.
+
+    Returns:
+        str: The same string for equal filters.
+    """
+    return json.dumps(metadata_filter, sort_keys=True, default=str)
+
+
+class MetadataIndex:
+    """
+    Precomputed FAISS positions per metadata value of a vectorstore, for filtered search.
+
+    A filter maps metadata fields to a value, or to a list of values of which any may match;
+    all fields must match. Values are compared as strings, so ``{'week': 3}`` also matches
+    chunks stored with ``week='3'``. The index is rebuilt automatically when the
+    vectorstore's index is replaced or its number of vectors changes.
+    """
+
+    def __init__(self, vectorstore: FAISS, fields: Iterable[str] | None = None) -> None:
+        """
+        Initializes the MetadataIndex.
+
+        Args:
+            vectorstore (FAISS): The vectorstore to index.
+            fields (Iterable[str] | None): The metadata fields to index. Defaults to every field.
+        """
+        self.vectorstore: FAISS = vectorstore
+        self.fields: Set[str] | None = set(fields) if fields is not None else None
+        self._positions: Dict[str, Dict[str, np.ndarray]] = {}
+        self._selections: Dict[str, Tuple[np.ndarray, faiss.IDSelector, Set[str]]] = {}
+        self._index: Any = None
+        self._vectors: int = -1
+        self._lock = threading.Lock()
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Rebuild the index if the vectorstore changed since it was built."""
+        index = self.vectorstore.index
+        with self._lock:
+            if index is self._index and index.ntotal == self._vectors:
+                return
+            positions: Dict[str, Dict[str, List[int]]] = {}
+            for position, doc_id in self.vectorstore.index_to_docstore_id.items():
+                document = self.vectorstore.docstore.search(doc_id)
+                if not isinstance(document, Document):
+                    continue
+                for field, value in document.metadata.items():
+                    if self.fields is None or field in self.fields:
+                        for key in _values(value):
+                            positions.setdefault(field, {}).setdefault(key, []).append(position)
+            self._positions = {
+                field: {key: np.array(found, dtype=np.int64) for key, found in values.items()}
+                for field, values in positions.items()
+            }
+            self._selections = {}
+            self._index, self._vectors = index, index.ntotal
+
+    def values(self, field: str) -> List[str]:
+        """
+        List the values of a metadata field, for example to configure topics.
+
+        Args:
+            field (str): The metadata field.
+
+        Returns:
+            List[str]: The values, sorted.
+        """
+        self._refresh()
+        return sorted(self._positions.get(field, {}))
+
+    def _selection(self, metadata_filter: Dict[str, Any]) -> Tuple[np.ndarray, faiss.IDSelector, Set[str]]:
+        """Get the sorted positions, FAISS selector and docstore IDs of a filter, computed once per filter."""
+        self._refresh()
+        key = filter_key(metadata_filter)
+        with self._lock:
+            selection = self._selections.get(key)
+            if selection is None:
+                matched = None
+                for field, value in metadata_filter.items():
+                    values = self._positions.get(field, {})
+                    arrays = [values[item] for item in _values(value) if item in values]
+                    field_positions = np.unique(np.concatenate(arrays)) if arrays else np.empty(0, dtype=np.int64)
+                    matched = field_positions if matched is None else np.intersect1d(matched, field_positions, assume_unique=True)
+                if matched is None:
+                    matched = np.arange(self._vectors, dtype=np.int64)
+                index_to_docstore_id = self.vectorstore.index_to_docstore_id
+                doc_ids = {index_to_docstore_id[int(position)] for position in matched}
+                selection = (matched, faiss.IDSelectorBatch(matched), doc_ids)
+                self._selections[key] = selection
+            return selection
+
+    def positions(self, metadata_filter: Dict[str, Any]) -> np.ndarray:
+        """
+        Get the FAISS positions of the chunks that match a filter.
+
+        Args:
+            metadata_filter (Dict[str, Any]): The filter.
+
+        Returns:
+            np.ndarray: The positions, sorted.
+        """
+        return self._selection(metadata_filter)[0]
+
+    def doc_ids(self, metadata_filter: Dict[str, Any]) -> Set[str]:
+        """
+        Get the docstore IDs of the chunks that match a filter.
+
+        Args:
+            metadata_filter (Dict[str, Any]): The filter.
+
+        Returns:
+            Set[str]: The docstore IDs.
+        """
+        return self._selection(metadata_filter)[2]
+
+    def similarity_search(self, query: str, metadata_filter: Dict[str, Any], k: int = 4) -> List[Document]:
+        """
+        Find the chunks most similar to a query among those that match a filter.
+
+        Args:
+            query (str): The query.
+            metadata_filter (Dict[str, Any]): The filter.
+            k (int): The number of chunks to return. Defaults to 4.
+
+        Returns:
+            List[Document]: Up to k matching chunks, most similar first.
+        """
+        positions, selector, _ = self._selection(metadata_filter)
+        if len(positions) == 0:
+            return []
+        store = self.vectorstore
+        vector = np.asarray([store._embed_query(query)], dtype=np.float32)
+        if store._normalize_L2:
+            faiss.normalize_L2(vector)
+        _, found = store.index.search(vector, min(k, len(positions)), params=search_parameters(store.index, selector))
+        documents = [store.docstore.search(store.index_to_docstore_id[int(position)]) for position in found[0] if position >= 0]
+        return [document for document in documents if isinstance(document, Document)]
+
+
+class FilteredRetriever(BaseRetriever):
+    """
+    Retriever that runs FAISS similarity search restricted to the chunks matching a metadata filter.
+    """
+
+    metadata_index: MetadataIndex
+    """The metadata index of the vectorstore to search."""
+    filter: Dict[str, Any]
+    """The metadata filter the chunks must match."""
+    k: int = 4
+    """Number of documents to return."""
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.metadata_index.similarity_search(query, self.filter, k=self.k)
@@ -0,0 +1,230 @@
+"""
+Module for bounding the conversation history kept in graph state.
+
+Without a policy, every turn is appended to the checkpointed ``messages`` list forever,
+so prompt tokens, latency and checkpoint size grow with the length of the session.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Any, Callable, List, Tuple
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from maeser.graphs.tokens import count_message_tokens, message_text
+
+HISTORY_STRATEGIES = ('window', 'tokens', 'summarize')
+
+_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ('system',
+     'You maintain a running summary of a tutoring conversation between a student and an assistant. '
+     'Merge the new exchanges into the existing summary. Keep the facts, questions and decisions needed '
+     'to continue the conversation and drop everything else. Reply with the summary only.'),
+    ('human', 'Existing summary:\n{summary}\n\nNew exchanges:\n{exchanges}'),
+])
+
+
+class ReplaceMessages(list):
+    """
+    Messages that replace a graph's stored history instead of being appended to it.
+    """
+
+
+def append_messages(left: List[Any], right: List[Any]) -> List[Any]:
+    """
+    The ``messages`` reducer of graphs without a history policy: append new messages to the stored history.
+
+    Args:
+        left (List[Any]): The stored history.
+        right (List[Any]): The new messages, or a ReplaceMessages list that replaces the history.
+
+    Returns:
+        List[Any]: The new history.
+    """
+    return list(right) if isinstance(right, ReplaceMessages) else left + right
+
+
+class HistoryPolicy:
+    """
+    Policy limiting how many past messages a graph keeps in its state and sends to the LLM.
+
+    History is always trimmed in whole turns (a question and its answer), oldest first, and
+    only after a turn completes, so the newest question is never dropped.
+    """
+
+    def __init__(
+        self,
+        strategy: str = 'window',
+        max_turns: int = 10,
+        max_tokens: int = 2000,
+        model: str = 'gpt-4o-mini',
+    ) -> None:
+        """
+        Initializes the HistoryPolicy.
+
+        Args:
+            strategy (str): 'window' keeps the last max_turns turns. 'tokens' keeps as many recent turns as fit
+                in max_tokens. 'summarize' keeps the same window as 'window' and folds dropped turns into a
+                rolling summary that is sent to the LLM with every question. Defaults to 'window'.
+            max_turns (int): Number of past turns kept by the 'window' and 'summarize' strategies. Defaults to 10.
+            max_tokens (int): Token budget of the kept history for the 'tokens' strategy. Defaults to 2000.
+            model (str): Model whose tokenizer is used to count tokens. Defaults to 'gpt-4o-mini'.
+
+        Raises:
+            ValueError: If strategy is invalid or a limit is negative.
+        """
+        if strategy not in HISTORY_STRATEGIES:
+            raise ValueError(f"Invalid history strategy: {strategy}, must be one of {HISTORY_STRATEGIES}")
+        if max_turns < 0 or max_tokens < 0:
+            raise ValueError("max_turns and max_tokens must not be negative")
+        self.strategy: str = strategy
+        self.max_turns: int = max_turns
+        self.max_tokens: int = max_tokens
+        self.model: str = model
+
+    @property
+    def summarize(self) -> bool:
+        """Whether dropped turns are folded into a rolling summary."""
+        return self.strategy == 'summarize'
+
+    def split(self, messages: List[Any]) -> Tuple[List[Any], List[Any]]:
+        """
+        Split a history into the messages to drop and the messages to keep.
+
+        Args:
+            messages (List[Any]): The conversation history, oldest first.
+
+        Returns:
+            Tuple[List[Any], List[Any]]: (dropped, kept) messages. Dropped messages always form whole turns.
+        """
+        # Only trim after a turn completes; an odd length means a question is awaiting its answer.
+        if len(messages) % 2:
+            return [], messages
+
+        if self.strategy == 'tokens':
+            start = 0
+            total = count_message_tokens(messages, self.model)
+            while start < len(messages) and total > self.max_tokens:
+                total -= count_message_tokens(messages[start:start + 2], self.model)
+                start += 2
+        else:
+            start = max(len(messages) - 2 * self.max_turns, 0)
+        return messages[:start], messages[start:]
+
+    def trim(self, messages: List[Any]) -> List[Any]:
+        """
+        Apply the policy to a history.
+
+        Args:
+            messages (List[Any]): The conversation history, oldest first.
+
+        Returns:
+            List[Any]: The messages to keep.
+        """
+        return self.split(messages)[1]
+
+    def reducer(self) -> Callable[[List[Any], List[Any]], List[Any]]:
+        """
+        Build a ``messages`` reducer for a graph state that appends new messages and applies the policy.
+
+        Returns:
+            Callable[[List[Any], List[Any]], List[Any]]: The reducer.
+        """
+        def add_messages(left: List[Any], right: List[Any]) -> List[Any]:
+            """Append new messages, then trim old turns."""
+            return self.trim(append_messages(left, right))
+        return add_messages
+
+
+def summarize_history(llm: BaseChatModel, summary: str | None, dropped: List[Any]) -> str:
+    """
+    Fold dropped turns into the rolling conversation summary.
+
+    Args:
+        llm (BaseChatModel): The model used to write the summary.
+        summary (str | None): The current summary, if any.
+        dropped (List[Any]): The messages being removed from the history, as (question, answer) pairs.
+
+    Returns:
+        str: The updated summary.
+    """
+    exchanges = '\n'.join(
+        f"{'Student' if position % 2 == 0 else 'Assistant'}: {message_text(message)}"
+        for position, message in enumerate(dropped)
+    )
+    chain = _SUMMARY_PROMPT | llm | StrOutputParser()
+    return chain.invoke({'summary': summary or '(none)', 'exchanges': exchanges})
+
+
+def history_with_summary(messages: List[Any], summary: str | None) -> List[Any]:
+    """
+    Prefix a history with the rolling summary of earlier turns, if there is one.
+
+    Args:
+        messages (List[Any]): The kept conversation history.
+        summary (str | None): The rolling summary.
+
+    Returns:
+        List[Any]: The history to send to the LLM.
+    """
+    if not summary:
+        return list(messages)
+    return [SystemMessage(content=f'Summary of the earlier conversation:\n{summary}')] + list(messages)
+
+
+def message_count_update(message_count: int | None, messages: List[Any]) -> int:
+    """
+    Get the ``message_count`` update a generate node returns with its answer.
+
+    ``message_count`` is summed with ``operator.add`` and holds the number of messages in the whole
+    conversation, including turns a history policy has trimmed from ``messages``. Each turn adds its
+    question and answer, so the update is 2. A thread without a count yet, either new or checkpointed
+    before the count existed, starts from its history: the stored messages, which end with the new
+    question, plus the answer.
+
+    Args:
+        message_count (int | None): The thread's current message count.
+        messages (List[Any]): The thread's history, ending with the question being answered.
+
+    Returns:
+        int: The amount to add to the message count.
+    """
+    return 2 if message_count else len(messages) + 1
+
+
+def repair_duplicated_history(messages: List[Any]) -> List[Any] | None:
+    """
+    Undo the history duplication of pipeline graphs checkpointed before ``message_count`` existed.
+
+    Their generate node returned the whole history with its answer through an appending reducer, so
+    each turn stored the history before the answer twice: H_n = X + X + [answer], with
+    X = H_(n-1) + [question]. Such a history always has an odd length, while a normal one holds whole turns.
+
+    Args:
+        messages (List[Any]): The stored history, without the question being answered.
+
+    Returns:
+        List[Any] | None: The history as one question and one answer per turn, or None if it is not duplicated.
+    """
+    turns: List[Any] = []
+    while messages:
+        half = (len(messages) - 1) // 2
+        if len(messages) % 2 == 0 or half == 0 or messages[half:2 * half] != messages[:half]:
+            return None
+        turns[:0] = [messages[half - 1], messages[-1]]
+        messages = messages[:half - 1]
+    return turns or None
@@ -0,0 +1,147 @@
+"""
+Module for measuring the latency, token usage and retrieval results of individual graph nodes.
+
+The graph factories wrap each node with ``instrument_node``. While a graph runs inside
+``record_node_metrics``, every wrapped node appends one entry to the collected list, so
+a slow answer can be attributed to topic routing, retrieval or generation.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List
+from maeser.metrics import COUNT_BUCKETS, LATENCY_BUCKETS, REGISTRY, TOKEN_BUCKETS
+
+# Node metrics collected for the graph run of the current request, if any
+_node_metrics: ContextVar[List[Dict[str, Any]] | None] = ContextVar('maeser_node_metrics', default=None)
+# Extra values reported by the instrumented node that is running, if any
+_node_values: ContextVar[Dict[str, Any] | None] = ContextVar('maeser_node_values', default=None)
+
+NODE_SECONDS = REGISTRY.histogram(
+    'maeser_graph_node_seconds', 'Wall time of a graph node.', LATENCY_BUCKETS, ('branch', 'node'))
+NODE_TOKENS = REGISTRY.histogram(
+    'maeser_graph_node_tokens', 'LLM tokens used by a graph node.', TOKEN_BUCKETS, ('branch', 'node'))
+NODE_DOCUMENTS = REGISTRY.histogram(
+    'maeser_graph_node_documents', 'Documents retrieved by a graph node.', COUNT_BUCKETS, ('branch', 'node'))
+PROMPT_TOKENS = REGISTRY.histogram(
+    'maeser_prompt_tokens', 'Tokens of each part of a generation prompt, counted before it is sent.', TOKEN_BUCKETS,
+    ('branch', 'part'))
+
+
+@contextmanager
+def record_node_metrics() -> Iterator[List[Dict[str, Any]]]:
+    """
+    Collect the metrics of every instrumented node that runs inside the ``with`` block.
+
+    Graph nodes run in worker threads with a copy of the caller's context, so they append
+    to the list yielded here.
+
+    Yields:
+        List[Dict[str, Any]]: One entry per node run, in completion order, with the keys 'node',
+            'seconds', 'tokens', 'documents' for retrieval nodes, and any values the node reported
+            with ``record_node_values``, such as 'prompt_tokens' for generation nodes.
+    """
+    metrics: List[Dict[str, Any]] = []
+    token = _node_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _node_metrics.reset(token)
+
+
+def instrument_node(name: str, node: Callable[[Any], dict]) -> Callable[[Any], dict]:
+    """
+    Wrap a graph node so that its wall time, token usage and retrieved documents are recorded.
+
+    Token usage is read from the OpenAI callback that ``ChatSessionManager.ask_question``
+    opens around each graph run. Nodes run outside ``record_node_metrics`` are not measured.
+
+    Args:
+        name (str): The node name.
+        node (Callable[[Any], dict]): The node function.
+
+    Returns:
+        Callable[[Any], dict]: The instrumented node, with the same signature and type hints.
+    """
+    # Imported here so that importing this module, e.g. from the chat session manager, does not load LangChain
+    from langchain_community.callbacks.manager import openai_callback_var
+
+    @functools.wraps(node)
+    def instrumented(state):
+        metrics = _node_metrics.get()
+        if metrics is None:
+            return node(state)
+
+        callback = openai_callback_var.get()
+        tokens_before = callback.total_tokens if callback is not None else 0
+        start = time.perf_counter()
+        values: Dict[str, Any] = {}
+        values_token = _node_values.set(values)
+        try:
+            result = node(state)
+        finally:
+            _node_values.reset(values_token)
+        entry: Dict[str, Any] = {
+            'node': name,
+            'seconds': time.perf_counter() - start,
+            'tokens': (callback.total_tokens - tokens_before) if callback is not None else 0,
+        }
+        if isinstance(result, dict) and 'retrieved_context' in result:
+            entry['documents'] = len(result['retrieved_context'] or [])
+        entry.update(values)
+        metrics.append(entry)
+        return result
+    return instrumented
+
+
+def record_node_values(**values: Any) -> None:
+    """
+    Add values to the metrics entry of the instrumented node that is running.
+
+    Does nothing when the node is not instrumented or runs outside ``record_node_metrics``.
+
+    Args:
+        **values (Any): The values, added to the entry under their keyword names.
+
+    Returns:
+        None
+    """
+    node_values = _node_values.get()
+    if node_values is not None:
+        node_values.update(values)
+
+
+def observe_node_metrics(branch: str, metrics: List[Dict[str, Any]]) -> None:
+    """
+    Add the node metrics of one graph run to the per-node histograms.
+
+    Args:
+        branch (str): The branch the graph is registered as.
+        metrics (List[Dict[str, Any]]): The entries collected by ``record_node_metrics``.
+
+    Returns:
+        None
+    """
+    for entry in metrics:
+        NODE_SECONDS.observe(entry['seconds'], branch=branch, node=entry['node'])
+        NODE_TOKENS.observe(entry['tokens'], branch=branch, node=entry['node'])
+        if 'documents' in entry:
+            NODE_DOCUMENTS.observe(entry['documents'], branch=branch, node=entry['node'])
+        for part, tokens in entry.get('prompt_tokens', {}).items():
+            PROMPT_TOKENS.observe(tokens, branch=branch, part=part)
@@ -24,19 +24,23 @@ from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage
 from langgraph.graph.graph import CompiledGraph
 from typing_extensions import TypedDict
-from typing import List, Dict, Annotated
+from typing import Any, Callable, List, Dict, Tuple, Annotated
+import operator
+from concurrent.futures import ThreadPoolExecutor
 from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings
-from langgraph.checkpoint.sqlite import SqliteSaver
-
-def add_messages(left: List[str], right: List[str]) -> List[str]:
-    return left + right
-
-class GraphState (TypedDict):
-    messages: Annotated[list, add_messages]
-    current_topic: str | None = None
-    retrieved_context: List[Document] | None = None
-    first_messsage: bool = True
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from maeser.graphs.checkpointer import get_checkpointer
+from maeser.graphs.topic_router import EmbeddingTopicRouter
+from maeser.graphs.retrieval import CachedQueryEmbeddings, build_retriever, parallel_retrieve, reciprocal_rank_fusion
+from maeser.graphs.history import (
+    HistoryPolicy, ReplaceMessages, append_messages, history_with_summary, message_count_update,
+    repair_duplicated_history, summarize_history,
+)
+from maeser.graphs.instrumentation import instrument_node
+from maeser.graphs.context import ContextPolicy, build_context
+from maeser.graphs.filtering import MetadataIndex
+from maeser.ingestion.indexes import configure_search
 
 def normalize_topic(topic: str) -> str:
     """
@@ -50,8 +54,29 @@ def remove_context_placeholder(prompt: str) -> str:
     """
     return prompt.replace("{context}", "").strip()
 
+def parse_topic_config(topic: str, topic_config: str | Dict[str, Any]) -> Tuple[str, Dict[str, Any] | None]:
+    """
+    Get the vectorstore path and metadata filter of a topic's entry in vectorstore_config.
+
+    Args:
+        topic (str): The topic.
+        topic_config (str | Dict[str, Any]): The vectorstore path, or a dictionary with a 'path' and an
+            optional metadata 'filter'.
+
+    Returns:
+        Tuple[str, Dict[str, Any] | None]: The vectorstore path and the metadata filter, if any.
+
+    Raises:
+        ValueError: If a dictionary entry has no 'path'.
+    """
+    if isinstance(topic_config, str):
+        return topic_config, None
+    if 'path' not in topic_config:
+        raise ValueError(f"vectorstore_config entry for topic '{topic}' must have a 'path'")
+    return topic_config['path'], topic_config.get('filter')
+
 def get_pipeline_rag (
-    vectorstore_config: Dict[str, str],
+    vectorstore_config: Dict[str, str | Dict[str, Any]],
     memory_filepath: str,
     api_key: str | None = None,
     system_prompt_text: str = (
@@ -60,7 +85,21 @@ def get_pipeline_rag (
         'Don\'t answer questions about other things.\n\n'
         '{context}\n'
     ),
-    model: str = 'gpt-4o-mini'
+    model: str = 'gpt-4o-mini',
+    topic_router: str = 'llm',
+    topic_descriptions: Dict[str, str] | None = None,
+    router_margin: float = 0.05,
+    retrieval_mode: str = 'route',
+    fanout_topics: List[str] | None = None,
+    fanout_limit: int | None = 4,
+    retriever_type: str = 'dense',
+    retriever_k: int = 4,
+    index_search_params: Dict[str, int] | None = None,
+    retrieval_cache_size: int = 256,
+    context_policy: ContextPolicy | None = None,
+    history_policy: HistoryPolicy | None = None,
+    checkpointer: BaseCheckpointSaver | None = None,
+    node_hook: Callable[[str, Callable[[Any], dict]], Callable[[Any], dict]] | None = instrument_node,
 ) -> CompiledGraph:
     """
     Create a dynamic retrieval-augmented generation (RAG) graph that includes topic extraction,
@@ -68,25 +107,107 @@ def get_pipeline_rag (
     compiled graph (with memory checkpoint) that you can run by providing an initial state.
     
     Args:
-        vectorstore_config (Dict[str, Tuple[str, str]]): Mapping of topic to (vectorstore_path, index name) *WARNING* TOPIC MUST BE ALL LOWER CASE
+        vectorstore_config (Dict[str, str | Dict[str, Any]]): Mapping of topic to its vectorstore path, or to a
+            dictionary with a 'path' and a metadata 'filter' such as {'unit': '3'}, so that several topics share one
+            vectorstore and only search their own chunks. *WARNING* TOPIC MUST BE ALL LOWER CASE
         memory_filepath (str): Path for the memory checkpoint (SQLite database).
         api_key (Optional[str]): API key for language models and embeddings.
         system_prompt_text (str): System prompt template for answer generation.
         model (str): Model name to use.
+        topic_router (str): How the topic for each question is chosen. 'llm' asks the model on every
+            message. 'embedding' compares the question embedding against one vector per topic and only
+            asks the model when the top two topics are closer than router_margin. Defaults to 'llm'.
+        topic_descriptions (Dict[str, str] | None): Optional description or sample text per topic for
+            the 'embedding' router. Topics without a description are represented by a sample of their
+            stored vectors. Defaults to None.
+        router_margin (float): Minimum cosine similarity lead required for the 'embedding' router to
+            skip the LLM. Defaults to 0.05.
+        retrieval_mode (str): 'route' sends each question to the single retriever chosen by the topic
+            router. 'fanout' skips routing, queries the retrievers of fanout_topics concurrently and
+            merges their results with reciprocal-rank fusion. Defaults to 'route'.
+        fanout_topics (List[str] | None): Topics queried in 'fanout' mode. Defaults to None (all topics).
+        fanout_limit (int | None): Maximum number of fused documents passed to generation in 'fanout'
+            mode. Defaults to 4.
+        retriever_type (str): 'dense' for FAISS similarity search, or 'hybrid' to fuse it with the BM25
+            keyword index saved next to each vectorstore. Defaults to 'dense'.
+        retriever_k (int): Number of documents retrieved per topic. Defaults to 4.
+        index_search_params (Dict[str, int] | None): Search settings applied to the FAISS indexes after loading,
+            such as {'nprobe': 32} for IVF indexes or {'ef_search': 128} for HNSW indexes, trading recall for latency
+            (see maeser.ingestion.indexes.configure_search). Defaults to None (the settings saved with the index).
+        retrieval_cache_size (int): Most questions whose retrieved documents are cached per topic, so repeated questions
+            skip the query embedding and the FAISS search. 0 disables the cache. Defaults to 256.
+        context_policy (ContextPolicy | None): Formats the retrieved documents for the prompt and packs the
+            highest-ranked ones into a token budget. Defaults to None (the retrieved documents are passed as is).
+        history_policy (HistoryPolicy | None): Limits how much conversation history is kept in the checkpoint
+            and sent to the LLM. Defaults to None (the whole conversation is kept).
+        checkpointer (BaseCheckpointSaver | None): Checkpointer used instead of the shared pooled checkpointer
+            of memory_filepath. Defaults to None.
+        node_hook (Callable | None): Wraps every node as node_hook(node_name, node). Defaults to instrument_node, which
+            records per-node latency, token usage and retrieved-document counts. None leaves nodes unwrapped.
     
     Returns:
         CompiledGraph: A compiled state graph ready for execution.
     """
 
+    if topic_router not in ('llm', 'embedding'):
+        raise ValueError(f"Invalid topic_router: {topic_router}, must be 'llm' or 'embedding'")
+    if retrieval_mode not in ('route', 'fanout'):
+        raise ValueError(f"Invalid retrieval_mode: {retrieval_mode}, must be 'route' or 'fanout'")
+    if fanout_topics is not None and not set(fanout_topics) <= set(vectorstore_config):
+        raise ValueError(f"fanout_topics {fanout_topics} must be keys of vectorstore_config")
+
+    add_messages = append_messages if history_policy is None else history_policy.reducer()
+
+    class GraphState (TypedDict):
+        messages: Annotated[list, add_messages]
+        message_count: Annotated[int, operator.add]
+        history_summary: str | None = None
+        current_topic: str | None = None
+        retrieved_context: List[Document] | None = None
+        first_messsage: bool = True
+
     # initalize FAISS retreivers for each topic 
     # (i.e load each vectorstore to be used when it is needed)
+    # Topics that filter a shared vectorstore by metadata load it, and index its metadata, only once
+    # The topic router and every retriever embed the question once between them
+    embeddings = CachedQueryEmbeddings(OpenAIEmbeddings() if api_key is None else OpenAIEmbeddings(api_key=api_key))
+    loaded: Dict[str, FAISS] = {}
+    metadata_indexes: Dict[str, MetadataIndex] = {}
+    vectorstores = {}
     retrievers = {}
-    for topic, vstore_path in vectorstore_config.items():
-        retrievers[topic] = FAISS.load_local(
-            vstore_path,
-            OpenAIEmbeddings() if api_key is None else OpenAIEmbeddings(api_key=api_key),
-            allow_dangerous_deserialization=True
-        ).as_retriever()
+    topic_positions = {}
+    for topic, topic_config in vectorstore_config.items():
+        vstore_path, metadata_filter = parse_topic_config(topic, topic_config)
+        if vstore_path not in loaded:
+            loaded[vstore_path] = FAISS.load_local(
+                vstore_path,
+                embeddings,
+                allow_dangerous_deserialization=True
+            )
+            if index_search_params:
+                configure_search(loaded[vstore_path].index, **index_search_params)
+        vectorstores[topic] = loaded[vstore_path]
+        metadata_index = None
+        if metadata_filter:
+            if vstore_path not in metadata_indexes:
+                metadata_indexes[vstore_path] = MetadataIndex(vectorstores[topic])
+            metadata_index = metadata_indexes[vstore_path]
+            topic_positions[topic] = metadata_index.positions(metadata_filter)
+        retrievers[topic] = build_retriever(
+            vectorstores[topic], vstore_path, retriever_type=retriever_type, k=retriever_k, cache_size=retrieval_cache_size,
+            metadata_filter=metadata_filter, metadata_index=metadata_index,
+        )
+
+    # Compute topic vectors once so most questions can be routed without an LLM call
+    router = None
+    if topic_router == 'embedding' and retrieval_mode == 'route':
+        router = EmbeddingTopicRouter.from_vectorstores(
+            embeddings,
+            vectorstores,
+            topic_descriptions=topic_descriptions,
+            margin=router_margin,
+            topic_positions=topic_positions,
+        )
 
     # Build the Chain for the generate node
     system_prompt = ChatPromptTemplate.from_messages([
@@ -96,6 +217,10 @@ def get_pipeline_rag (
     ])
     llm = ChatOpenAI(model=model, temperature=0) if api_key is None else ChatOpenAI(api_key=api_key, model=model, temperature=0)
     chain = system_prompt | llm | StrOutputParser()
+    if context_policy is not None:
+        # Load the tokenizer now, so the first question does not wait for its download
+        context_policy.load_tokenizer()
+    llm_topic = ChatOpenAI(model=model, temperature=0) if api_key is None else ChatOpenAI(api_key=api_key, model=model, temperature=0)
 
     #format topics for later topic extraction
     def format_topic_keys(topics):
@@ -109,9 +234,18 @@ def get_pipeline_rag (
 
     def determine_topic_node (state: GraphState, vectorstore_config: Dict) -> dict:
 
+        question = state["messages"][-1]
+
+        current_topic = state.get("current_topic")
+
+        # Use the local router when it is confident, otherwise fall back to the LLM
+        if router is not None:
+            topic = router.route(question if isinstance(question, str) else question.content, current_topic)
+            if topic is not None:
+                return {"current_topic": topic}
+
         # Prepare the list of valid topics plus "off topic"
         formatted_topics = format_topic_keys(vectorstore_config)
-        current_topic = state.get("current_topic")
 
         # Build a prompt that includes the current topic (if any) and the user message.
         clean_system_prompt = remove_context_placeholder(system_prompt_text)
@@ -123,9 +257,7 @@ def get_pipeline_rag (
             ("human", "User message: {question}\nExtract the topic:")
         ])
 
-        question = state["messages"][-1]
         formatted_prompt = prompt_template.format(question=question, current_topic=current_topic if current_topic else "None")
-        llm_topic = ChatOpenAI(model=model, temperature=0) if api_key is None else ChatOpenAI(api_key=api_key, model=model, temperature=0)
         result = llm_topic.invoke([SystemMessage(content=formatted_prompt)])
         topic = normalize_topic(result.content)
         return {"current_topic": topic}
@@ -138,49 +270,82 @@ def get_pipeline_rag (
             return {"retrieved_context": documents}
         return retrieval_node
     
-    # Map topics with retrieval node names
-    vectorstore_nodes = {}
-    for topic in vectorstore_config.keys():
-        node_name = f"retrieve_{topic}"
-        vectorstore_nodes[topic] = node_name
+    # Node: query several topics at once and fuse their rankings.
+    fanout_retrievers = {topic: retrievers[topic] for topic in (fanout_topics or vectorstore_config.keys())}
+    fanout_executor = None
+    if retrieval_mode == 'fanout':
+        fanout_executor = ThreadPoolExecutor(max_workers=max(len(fanout_retrievers), 1), thread_name_prefix='maeser-fanout')
+
+    def fanout_retrieval_node(state: GraphState) -> dict:
+        question = state["messages"][-1]
+        results = parallel_retrieve(fanout_retrievers, question, fanout_executor)
+        documents: List[Document] = reciprocal_rank_fusion(list(results.values()), limit=fanout_limit)
+        return {"retrieved_context": documents}
 
     # Node: answer generation.
     def generate_node(state: GraphState) -> dict:
         messages = state["messages"]
+        # Threads checkpointed before message_count existed may hold a duplicated history; store it repaired
+        repaired = None if state.get("message_count") else repair_duplicated_history(messages[:-1])
+        if repaired is not None:
+            messages = repaired + messages[-1:]
         documents = state.get("retrieved_context", [])
+        summary = state.get("history_summary")
+        history = history_with_summary(messages[:-1], summary)
+        context = build_context(context_policy, documents, system_prompt_text, history, messages[-1])
         generation = chain.invoke({
-            "context": documents,
+            "context": context,
             "input": messages[-1],
-            "messages": messages[:-1],
+            "messages": history,
         })
-        # Update conversation history with the generated answer.
-        return {"messages": messages + [generation]}
+        # Only return the new message: the reducer appends it to the stored history.
+        update = {
+            "messages": [generation] if repaired is None else ReplaceMessages(messages + [generation]),
+            "message_count": message_count_update(state.get("message_count"), messages),
+        }
+        if history_policy is not None and history_policy.summarize:
+            dropped, _ = history_policy.split(messages + [generation])
+            if dropped:
+                update["history_summary"] = summarize_history(llm, summary, dropped)
+        return update
     
     # Build the state graph.
     graph = StateGraph(GraphState)
-    graph.add_node("determine_topic", lambda state: determine_topic_node(state, vectorstore_config))    
-
-    # Set up conditional branching based on the determined topic.
-    # Mapping: if "off topic", go to off_topic_response; if valid topic, go to its retrieval node.
-    mapping = {}
-    for topic in vectorstore_config.keys():
-        mapping[topic] = f"retrieve_{topic}"
-    graph.add_conditional_edges("determine_topic", lambda state: state["current_topic"], mapping)
-    
-    # Add retrieval nodes for each valid topic.
-    for topic in vectorstore_config.keys():
-        node_name = f"retrieve_{topic}"
-        graph.add_node(node_name, make_retrieval_node(topic))
-        graph.add_edge(node_name, "generate")
+
+    def add_node(name: str, node: Callable[[Any], dict]) -> None:
+        graph.add_node(name, node if node_hook is None else node_hook(name, node))
+
+    if retrieval_mode == 'fanout':
+        # No routing needed: every question queries all fan-out topics.
+        add_node("retrieve", fanout_retrieval_node)
+        graph.add_edge(START, "retrieve")
+        graph.add_edge("retrieve", "generate")
+    else:
+        add_node("determine_topic", lambda state: determine_topic_node(state, vectorstore_config))
+
+        # Set up conditional branching based on the determined topic.
+        # Mapping: if "off topic", go to off_topic_response; if valid topic, go to its retrieval node.
+        mapping = {}
+        for topic in vectorstore_config.keys():
+            mapping[topic] = f"retrieve_{topic}"
+        graph.add_conditional_edges("determine_topic", lambda state: state["current_topic"], mapping)
+        
+        # Add retrieval nodes for each valid topic.
+        for topic in vectorstore_config.keys():
+            node_name = f"retrieve_{topic}"
+            add_node(node_name, make_retrieval_node(topic))
+            graph.add_edge(node_name, "generate")
+
+        graph.add_edge(START, "determine_topic")
     
     # Add answer generation node.
-    graph.add_node("generate", generate_node)
+    add_node("generate", generate_node)
     
     # Define the overall flow.
-    graph.add_edge(START, "determine_topic")
     graph.add_edge("generate", END)
     
     # Set up memory checkpoint using SQLite.
-    memory = SqliteSaver.from_conn_string(f'{memory_filepath}')
+    # Graphs with the same memory_filepath share one pooled, thread-safe checkpointer.
+    memory = checkpointer if checkpointer is not None else get_checkpointer(memory_filepath)
     compiled_graph: CompiledGraph = graph.compile(checkpointer=memory)
     return compiled_graph
\ No newline at end of file
@@ -0,0 +1,377 @@
+"""
+Module with retrieval helpers shared by the RAG graphs, such as concurrent multi-store
+retrieval, rank fusion, hybrid (BM25 + FAISS) retrievers, and caches of retrieval results and
+query embeddings.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from os import path
+from typing import Any, Dict, List, Sequence, Tuple
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents.base import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.pydantic_v1 import PrivateAttr
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores import FAISS
+import numpy as np
+from maeser.graphs.bm25 import BM25Index, bm25_path
+from maeser.graphs.filtering import FilteredRetriever, MetadataIndex, filter_key
+from maeser.metrics import record_cache_lookup
+
+RETRIEVER_TYPES = ('dense', 'hybrid')
+
+
+def document_key(document: Document) -> str:
+    """
+    Key used to recognize the same chunk returned by more than one retriever.
+
+    Args:
+        document (Document): The retrieved document.
+
+    Returns:
+        str: The deduplication key for the document.
+    """
+    return document.page_content
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Sequence[List[Document]],
+    k: int = 60,
+    limit: int | None = None,
+    weights: Sequence[float] | None = None,
+) -> List[Document]:
+    """
+    Merge several ranked document lists with reciprocal-rank fusion (RRF).
+
+    Each document scores ``weight / (k + rank)`` for every list it appears in, and identical
+    chunks are merged into a single entry.
+
+    Args:
+        ranked_lists (Sequence[List[Document]]): Ranked results, best first, one list per retriever.
+        k (int): RRF smoothing constant. Larger values flatten the contribution of top ranks. Defaults to 60.
+        limit (int | None): Maximum number of documents to return. Defaults to None (no limit).
+        weights (Sequence[float] | None): Optional weight per ranked list. Defaults to equal weights.
+
+    Returns:
+        List[Document]: The fused documents, best first.
+    """
+    if weights is None:
+        weights = [1.0] * len(ranked_lists)
+    elif len(weights) != len(ranked_lists):
+        raise ValueError("weights must have one entry per ranked list")
+
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, document in enumerate(ranked, start=1):
+            key = document_key(document)
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+            documents.setdefault(key, document)
+
+    # sorted() is stable, so ties keep first-seen order
+    fused = [documents[key] for key in sorted(scores, key=lambda key: scores[key], reverse=True)]
+    return fused if limit is None else fused[:limit]
+
+
+def parallel_retrieve(
+    retrievers: Dict[str, BaseRetriever],
+    question: str,
+    executor: Executor,
+) -> Dict[str, List[Document]]:
+    """
+    Query several retrievers concurrently.
+
+    Wall-clock time is bounded by the slowest retriever rather than the sum of all of them.
+
+    Args:
+        retrievers (Dict[str, BaseRetriever]): Mapping of name to retriever to query.
+        question (str): The query to send to every retriever.
+        executor (Executor): The executor used to run the queries.
+
+    Returns:
+        Dict[str, List[Document]]: Mapping of name to the documents it returned, in the order of ``retrievers``.
+    """
+    futures = {name: executor.submit(retriever.invoke, question) for name, retriever in retrievers.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever that fuses dense FAISS similarity search with sparse BM25 keyword search.
+
+    Both sides return ``fetch_k`` candidates, which are merged with weighted reciprocal-rank
+    fusion and cut to ``k`` documents.
+    """
+
+    vectorstore: FAISS
+    """The dense vectorstore, also used to look up the documents matched by BM25."""
+    bm25: BM25Index
+    """The sparse keyword index over the same chunks."""
+    k: int = 4
+    """Number of documents to return."""
+    fetch_k: int = 20
+    """Number of candidates fetched from each side before fusion."""
+    dense_weight: float = 1.0
+    """Fusion weight of the dense ranking."""
+    sparse_weight: float = 1.0
+    """Fusion weight of the sparse ranking."""
+    metadata_index: MetadataIndex | None = None
+    """The metadata index of the vectorstore, required by ``filter``."""
+    filter: Dict[str, Any] | None = None
+    """Metadata filter the chunks must match on both sides. Defaults to None (every chunk)."""
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        allowed_ids = None
+        if self.filter and self.metadata_index is not None:
+            dense = self.metadata_index.similarity_search(query, self.filter, k=self.fetch_k)
+            allowed_ids = self.metadata_index.doc_ids(self.filter)
+        else:
+            dense = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        sparse = []
+        for doc_id, _ in self.bm25.search(query, k=self.fetch_k, allowed_ids=allowed_ids):
+            document = self.vectorstore.docstore.search(doc_id)
+            if isinstance(document, Document):
+                sparse.append(document)
+        return reciprocal_rank_fusion(
+            [dense, sparse],
+            weights=[self.dense_weight, self.sparse_weight],
+            limit=self.k,
+        )
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for the retrieval cache, so that questions differing only in case or
+    whitespace share an entry.
+
+    Args:
+        query (str): The query.
+
+    Returns:
+        str: The normalized query.
+    """
+    return " ".join(query.split()).casefold()
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    Retriever that caches the results of another retriever in a bounded LRU cache.
+
+    Entries are keyed on the index version, the normalized query, k and the metadata filter,
+    so a hit skips both the query embedding and the FAISS search. The index version changes
+    whenever the vectorstore's index is replaced (for example after a reload or a rebuild)
+    or its number of vectors changes, which invalidates every entry.
+    """
+
+    retriever: BaseRetriever
+    """The retriever whose results are cached."""
+    vectorstore: FAISS
+    """The vectorstore searched by the retriever, checked for changes on every lookup."""
+    k: int = 4
+    """Number of documents the retriever returns, part of the cache key."""
+    filter: Dict[str, Any] | None = None
+    """Metadata filter of the retriever, part of the cache key."""
+    max_entries: int = 256
+    """Most cached queries; the least recently used entry is evicted first."""
+
+    _entries: 'OrderedDict[Tuple, List[Document]]' = PrivateAttr(default_factory=OrderedDict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _index: Any = PrivateAttr(default=None)
+    _vectors: int = PrivateAttr(default=-1)
+    _version: int = PrivateAttr(default=0)
+
+    @property
+    def size(self) -> int:
+        """The number of cached queries."""
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """
+        Drop every cached result.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _index_version(self) -> int:
+        """Get the version of the index, clearing the cache if the index changed since the last lookup."""
+        index = self.vectorstore.index
+        with self._lock:
+            # The last index seen is kept referenced, so its identity cannot be reused by a new index
+            if index is not self._index or index.ntotal != self._vectors:
+                self._index, self._vectors = index, index.ntotal
+                self._version += 1
+                self._entries.clear()
+            return self._version
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun, **kwargs: Any) -> List[Document]:
+        key = (
+            self._index_version(), normalize_query(query), self.k, filter_key(self.filter), filter_key(kwargs),
+        )
+        with self._lock:
+            documents = self._entries.get(key)
+            if documents is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup('retrieval', documents is not None)
+        if documents is None:
+            documents = self.retriever.invoke(query, config={'callbacks': run_manager.get_child()}, **kwargs)
+            with self._lock:
+                if key[0] == self._version:
+                    self._entries[key] = documents
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return list(documents)
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings that keep the most recent query embeddings, so a question is sent to the embedding
+    model once even when the topic router and one or more retrievers each embed it.
+
+    Concurrent requests for the same query wait for the first one instead of embedding it again.
+    Document embeddings are not cached.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_entries: int = 128) -> None:
+        """
+        Initializes the CachedQueryEmbeddings.
+
+        Args:
+            embeddings (Embeddings): The embedding model.
+            max_entries (int): Most query embeddings kept; the least recently used is evicted first. Defaults to 128.
+        """
+        self.embeddings: Embeddings = embeddings
+        self.max_entries: int = max_entries
+        self._entries: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        leader = False
+        with self._lock:
+            vector = self._entries.get(text)
+            pending = self._pending.get(text)
+            if vector is not None:
+                self._entries.move_to_end(text)
+            elif pending is None:
+                pending = self._pending[text] = Future()
+                leader = True
+        record_cache_lookup('query_embedding', vector is not None or not leader)
+        if vector is not None:
+            return vector.tolist()
+        if not leader:
+            return pending.result().tolist()
+        try:
+            vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        except BaseException as e:
+            with self._lock:
+                del self._pending[text]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._pending[text]
+            self._entries[text] = vector
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        pending.set_result(vector)
+        return vector.tolist()
+
+
+def build_retriever(
+    vectorstore: FAISS,
+    vectorstore_path: str,
+    index_name: str = 'index',
+    retriever_type: str = 'dense',
+    k: int = 4,
+    cache_size: int = 0,
+    metadata_filter: Dict[str, Any] | None = None,
+    metadata_index: MetadataIndex | None = None,
+) -> BaseRetriever:
+    """
+    Build the retriever used by the graph factories for a loaded vectorstore.
+
+    Args:
+        vectorstore (FAISS): The loaded vectorstore.
+        vectorstore_path (str): The directory the vectorstore was loaded from.
+        index_name (str): The index name of the vectorstore. Defaults to 'index'.
+        retriever_type (str): 'dense' for FAISS similarity search only, or 'hybrid' to fuse it with the
+            BM25 index saved next to the vectorstore. Defaults to 'dense'.
+        k (int): Number of documents to retrieve. Defaults to 4.
+        cache_size (int): Most queries whose results are kept in a CachedRetriever. Defaults to 0 (no cache).
+        metadata_filter (Dict[str, Any] | None): Only retrieve chunks whose metadata matches this filter, such
+            as {'unit': '3'} or {'source': ['lab1.txt', 'lab2.txt']}. Defaults to None (every chunk).
+        metadata_index (MetadataIndex | None): The metadata index used for metadata_filter, to share one
+            between the retrievers of a vectorstore. Defaults to building one.
+
+    Returns:
+        BaseRetriever: The retriever.
+
+    Raises:
+        ValueError: If retriever_type is invalid.
+    """
+    if retriever_type not in RETRIEVER_TYPES:
+        raise ValueError(f"Invalid retriever_type: {retriever_type}, must be one of {RETRIEVER_TYPES}")
+    retriever: BaseRetriever
+    if metadata_filter and metadata_index is None:
+        metadata_index = MetadataIndex(vectorstore)
+    if retriever_type == 'dense' and metadata_filter:
+        retriever = FilteredRetriever(metadata_index=metadata_index, filter=metadata_filter, k=k)
+    elif retriever_type == 'dense':
+        retriever = vectorstore.as_retriever(search_kwargs={'k': k})
+    else:
+        retriever = _build_hybrid_retriever(vectorstore, vectorstore_path, index_name, k, metadata_index, metadata_filter)
+    if cache_size > 0:
+        retriever = CachedRetriever(
+            retriever=retriever, vectorstore=vectorstore, k=k, filter=metadata_filter, max_entries=cache_size,
+        )
+    return retriever
+
+
+def _build_hybrid_retriever(
+    vectorstore: FAISS,
+    vectorstore_path: str,
+    index_name: str,
+    k: int,
+    metadata_index: MetadataIndex | None,
+    metadata_filter: Dict[str, Any] | None,
+) -> HybridRetriever:
+    """
+    Build a HybridRetriever with the BM25 index saved next to the vectorstore.
+
+    A missing index, or one that no longer covers the vectorstore's chunks, is built from the
+    vectorstore and saved for the next time.
+    """
+    sparse_path = bm25_path(vectorstore_path, index_name)
+    bm25 = BM25Index.load(sparse_path) if path.exists(sparse_path) else None
+    if bm25 is None or set(bm25.doc_ids) != set(vectorstore.index_to_docstore_id.values()):
+        print(f"Building the BM25 index of {vectorstore_path}")
+        bm25 = BM25Index.from_vectorstore(vectorstore)
+        try:
+            bm25.save(sparse_path)
+        except OSError as e:
+            print(f"\x1b[33mWarning: Unable to save the BM25 index to {sparse_path}, it will be rebuilt next time: {e}\x1b[0m")
+    return HybridRetriever(
+        vectorstore=vectorstore, bm25=bm25, k=k, fetch_k=max(k * 5, 20), metadata_index=metadata_index, filter=metadata_filter,
+    )
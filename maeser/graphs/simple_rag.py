@@ -24,11 +24,18 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 from langgraph.graph.graph import CompiledGraph
 from typing_extensions import TypedDict
-from typing import List, Annotated
-from langchain_core.vectorstores import VectorStoreRetriever
+from typing import Any, Callable, Dict, List, Annotated
+import operator
+from langchain_core.retrievers import BaseRetriever
 from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings
-from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from maeser.graphs.checkpointer import get_checkpointer
+from maeser.graphs.retrieval import build_retriever
+from maeser.graphs.history import HistoryPolicy, append_messages, history_with_summary, message_count_update, summarize_history
+from maeser.graphs.instrumentation import instrument_node
+from maeser.graphs.context import ContextPolicy, build_context
+from maeser.ingestion.indexes import configure_search
 
 def get_simple_rag(
     vectorstore_path: str,
@@ -41,7 +48,16 @@ def get_simple_rag(
         'Don\'t answer questions about other things.\n\n'
         '{context}\n'
     ),
-    model: str = 'gpt-4o-mini'
+    model: str = 'gpt-4o-mini',
+    retriever_type: str = 'dense',
+    retriever_k: int = 4,
+    index_search_params: Dict[str, int] | None = None,
+    retrieval_cache_size: int = 256,
+    retriever_filter: Dict[str, Any] | None = None,
+    context_policy: ContextPolicy | None = None,
+    history_policy: HistoryPolicy | None = None,
+    checkpointer: BaseCheckpointSaver | None = None,
+    node_hook: Callable[[str, Callable[[Any], dict]], Callable[[Any], dict]] | None = instrument_node,
 ) -> CompiledGraph:
     """Create a simple retrieval-augmented generation (RAG) graph.
     
@@ -52,28 +68,58 @@ def get_simple_rag(
         api_key (str | None): API key for the language model. Defaults to None.
         system_prompt_text (str): Prompt text for the system message. Defaults to a helpful teacher prompt.
         model (str): Model name for the language model. Defaults to 'gpt-4o-mini'.
+        retriever_type (str): 'dense' for FAISS similarity search, or 'hybrid' to fuse it with the BM25
+            keyword index saved next to the vector store. Defaults to 'dense'.
+        retriever_k (int): Number of documents retrieved per question. Defaults to 4.
+        index_search_params (Dict[str, int] | None): Search settings applied to the FAISS index after loading,
+            such as {'nprobe': 32} for IVF indexes or {'ef_search': 128} for HNSW indexes, trading recall for latency
+            (see maeser.ingestion.indexes.configure_search). Defaults to None (the settings saved with the index).
+        retrieval_cache_size (int): Most questions whose retrieved documents are cached, so repeated questions
+            skip the query embedding and the FAISS search. 0 disables the cache. Defaults to 256.
+        retriever_filter (Dict[str, Any] | None): Only retrieve chunks whose metadata matches this filter, such as
+            {'unit': '3'} or {'source': ['lab1.txt', 'lab2.txt']}. The filter runs inside the FAISS search. Defaults
+            to None (every chunk).
+        context_policy (ContextPolicy | None): Formats the retrieved documents for the prompt and packs the
+            highest-ranked ones into a token budget. Defaults to None (the retrieved documents are passed as is).
+        history_policy (HistoryPolicy | None): Limits how much conversation history is kept in the checkpoint
+            and sent to the LLM. Defaults to None (the whole conversation is kept).
+        checkpointer (BaseCheckpointSaver | None): Checkpointer used instead of the shared pooled checkpointer
+            of memory_filepath. Defaults to None.
+        node_hook (Callable | None): Wraps every node as node_hook(node_name, node). Defaults to instrument_node, which
+            records per-node latency, token usage and retrieved-document counts. None leaves nodes unwrapped.
     
     Returns:
         CompiledGraph: The compiled state graph.
     """
 
-    def add_messages(left: list, right: list):
-        """Add-don't-overwrite."""
-        return left + right
+    add_messages = append_messages if history_policy is None else history_policy.reducer()
 
     class GraphState(TypedDict):
         """Represents the state of the graph."""
         retrieved_context: List[Document]
         messages: Annotated[list, add_messages]
+        message_count: Annotated[int, operator.add]
+        history_summary: str | None
 
     llm: ChatOpenAI = ChatOpenAI(model=model) if api_key is None else ChatOpenAI(api_key=api_key, model=model)  # type: ignore
 
-    retriever: VectorStoreRetriever = FAISS.load_local(
+    vectorstore: FAISS = FAISS.load_local(
         vectorstore_path,
         OpenAIEmbeddings() if api_key is None else OpenAIEmbeddings(api_key=api_key),  # type: ignore
         allow_dangerous_deserialization=True,
         index_name=vectorstore_index,
-    ).as_retriever()
+    )
+    if index_search_params:
+        configure_search(vectorstore.index, **index_search_params)
+    retriever: BaseRetriever = build_retriever(
+        vectorstore,
+        vectorstore_path,
+        index_name=vectorstore_index,
+        retriever_type=retriever_type,
+        k=retriever_k,
+        cache_size=retrieval_cache_size,
+        metadata_filter=retriever_filter,
+    )
 
     system_prompt: ChatPromptTemplate = ChatPromptTemplate.from_messages([
         ('system', system_prompt_text),
@@ -82,6 +128,9 @@ def get_simple_rag(
     ])
 
     chain = system_prompt | llm | StrOutputParser()
+    if context_policy is not None:
+        # Load the tokenizer now, so the first question does not wait for its download
+        context_policy.load_tokenizer()
 
     def retrieve_node(state: GraphState) -> dict:
         """Retrieve context documents based on the latest question."""
@@ -93,21 +142,33 @@ def get_simple_rag(
         """Generate a response based on the context and messages."""
         messages = state['messages']
         documents: List[Document] = state['retrieved_context']
+        summary = state.get('history_summary')
+        history = history_with_summary(messages[:-1], summary)
+        context = build_context(context_policy, documents, system_prompt_text, history, messages[-1])
         generation: str = chain.invoke({
-            'context': documents,
-            'messages': messages[:-1],
+            'context': context,
+            'messages': history,
             'input': messages[-1],
         })
-        return {'messages': [generation]}
+        update = {'messages': [generation], 'message_count': message_count_update(state.get('message_count'), messages)}
+        if history_policy is not None and history_policy.summarize:
+            dropped, _ = history_policy.split(messages + [generation])
+            if dropped:
+                update['history_summary'] = summarize_history(llm, summary, dropped)
+        return update
+
+    def add_node(name: str, node: Callable[[Any], dict]) -> None:
+        graph.add_node(name, node if node_hook is None else node_hook(name, node))
 
     graph = StateGraph(GraphState)
 
-    graph.add_node('retrieve', retrieve_node)
-    graph.add_node('generate', generate_node)
+    add_node('retrieve', retrieve_node)
+    add_node('generate', generate_node)
     graph.add_edge('retrieve', 'generate')
     graph.set_entry_point('retrieve')
     graph.set_finish_point('generate')
 
-    memory = SqliteSaver.from_conn_string(f'{memory_filepath}')
+    # Graphs with the same memory_filepath share one pooled, thread-safe checkpointer
+    memory = checkpointer if checkpointer is not None else get_checkpointer(memory_filepath)
     compiled_graph: CompiledGraph = graph.compile(checkpointer=memory)
     return compiled_graph
@@ -0,0 +1,129 @@
+"""
+Module for counting tokens locally, without calling the language model provider.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from functools import lru_cache
+from typing import Any, Iterable
+
+# Rough characters-per-token ratio of English text for OpenAI tokenizers
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str) -> Any | None:
+    """
+    Load the tiktoken encoding for a model once.
+
+    Returns None if tiktoken is not installed or its encoding files cannot be loaded
+    (for example on an offline machine), in which case token counts are estimated.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        print(f"\x1b[33mWarning: Unable to load tiktoken encoding for {model}, estimating token counts: {e}\x1b[0m")
+        return None
+    return encoding
+
+
+def load_encoding(model: str = 'gpt-4o-mini') -> bool:
+    """
+    Load the tokenizer of a model ahead of time.
+
+    tiktoken downloads its encoding files on first use. Graph factories call this when the
+    graph is built, so the first question does not wait for the download.
+
+    Args:
+        model (str): The model whose tokenizer is loaded. Defaults to 'gpt-4o-mini'.
+
+    Returns:
+        bool: True if the tokenizer is available, False if token counts will be estimated.
+    """
+    return _get_encoding(model) is not None
+
+
+def message_text(message: Any) -> str:
+    """
+    Get the text of a conversation message stored in graph state.
+
+    Args:
+        message (Any): A plain string or a LangChain message.
+
+    Returns:
+        str: The message text.
+    """
+    if isinstance(message, str):
+        return message
+    content = getattr(message, 'content', message)
+    return content if isinstance(content, str) else str(content)
+
+
+def count_tokens(text: str, model: str = 'gpt-4o-mini') -> int:
+    """
+    Count the tokens in a piece of text.
+
+    Args:
+        text (str): The text to count.
+        model (str): The model whose tokenizer is used. Defaults to 'gpt-4o-mini'.
+
+    Returns:
+        int: The number of tokens, or an estimate if no tokenizer is available.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = 'gpt-4o-mini') -> str:
+    """
+    Cut a piece of text down to its first tokens.
+
+    Args:
+        text (str): The text to cut.
+        max_tokens (int): The most tokens to keep.
+        model (str): The model whose tokenizer is used. Defaults to 'gpt-4o-mini'.
+
+    Returns:
+        str: The text, or its beginning if it has more than max_tokens tokens.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max(max_tokens, 0) * _CHARS_PER_TOKEN]
+    tokens = encoding.encode(text)
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max(max_tokens, 0)])
+
+
+def count_message_tokens(messages: Iterable[Any], model: str = 'gpt-4o-mini') -> int:
+    """
+    Count the tokens in a list of conversation messages.
+
+    Args:
+        messages (Iterable[Any]): Plain strings or LangChain messages.
+        model (str): The model whose tokenizer is used. Defaults to 'gpt-4o-mini'.
+
+    Returns:
+        int: The total number of tokens.
+    """
+    return sum(count_tokens(message_text(message), model) for message in messages)
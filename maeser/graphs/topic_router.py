@@ -0,0 +1,191 @@
+"""
+Module for routing questions to vectorstore topics with local embedding similarity.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from typing import Dict, List, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length so that dot products are cosine similarities."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def sample_topic_vector(vectorstore: FAISS, sample_size: int = 256, positions: np.ndarray | None = None) -> np.ndarray | None:
+    """
+    Compute a representative vector for a topic from the vectors already stored in its index.
+
+    Args:
+        vectorstore (FAISS): The loaded vectorstore for the topic.
+        sample_size (int): The maximum number of stored vectors to average. Defaults to 256.
+        positions (np.ndarray | None): The sorted index positions of the topic's chunks, for topics that
+            are a metadata filter of a shared vectorstore. Defaults to None (every stored vector).
+
+    Returns:
+        np.ndarray | None: The normalized centroid of the sampled vectors, or None if the
+            index is empty or does not support reconstructing its vectors.
+    """
+    index = vectorstore.index
+    total = int(index.ntotal) if positions is None else len(positions)
+    count = min(total, sample_size)
+    if count == 0:
+        return None
+    try:
+        # Spread the sample evenly over the index rather than taking the first chunks only
+        ids = np.linspace(0, total - 1, num=count, dtype=np.int64)
+        if positions is not None:
+            ids = positions[ids]
+        vectors = np.vstack([index.reconstruct(int(i)) for i in ids]).astype(np.float32)
+    except RuntimeError:
+        return None
+    centroid = _normalize_rows(vectors).mean(axis=0, keepdims=True)
+    return _normalize_rows(centroid)[0]
+
+
+class EmbeddingTopicRouter:
+    """
+    Chooses a topic for a question by comparing its embedding against one vector per topic.
+
+    Topic vectors are computed once when the router is built, so routing a question costs a
+    single embedding call and a small matrix product instead of an LLM round-trip. Build it with
+    the retrievers' ``CachedQueryEmbeddings`` so retrieval reuses the question's embedding.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        topic_vectors: Dict[str, np.ndarray],
+        margin: float = 0.05,
+    ) -> None:
+        """
+        Initializes the router.
+
+        Args:
+            embeddings (Embeddings): The embedding model used to embed incoming questions.
+                Must be the same model that produced the topic vectors.
+            topic_vectors (Dict[str, np.ndarray]): Mapping of topic to its representative vector.
+            margin (float): The minimum cosine similarity lead the best topic must have over the
+                runner-up for the router to be confident. Defaults to 0.05.
+        """
+        if not topic_vectors:
+            raise ValueError("EmbeddingTopicRouter requires at least one topic vector")
+        self.embeddings: Embeddings = embeddings
+        self.topics: List[str] = list(topic_vectors.keys())
+        self.margin: float = margin
+        self._matrix: np.ndarray = _normalize_rows(
+            np.vstack([np.asarray(topic_vectors[topic], dtype=np.float32) for topic in self.topics])
+        )
+
+    @classmethod
+    def from_vectorstores(
+        cls,
+        embeddings: Embeddings,
+        vectorstores: Dict[str, FAISS],
+        topic_descriptions: Dict[str, str] | None = None,
+        margin: float = 0.05,
+        sample_size: int = 256,
+        topic_positions: Dict[str, np.ndarray] | None = None,
+    ) -> "EmbeddingTopicRouter":
+        """
+        Build a router for a set of topic vectorstores.
+
+        Topics with an entry in ``topic_descriptions`` are represented by the embedding of that
+        description. All other topics are represented by a sample of the vectors already stored
+        in their index, falling back to the embedding of the topic name when no vectors can be read.
+
+        Args:
+            embeddings (Embeddings): The embedding model used by the vectorstores.
+            vectorstores (Dict[str, FAISS]): Mapping of topic to its loaded vectorstore.
+            topic_descriptions (Dict[str, str] | None): Optional description or sample text per topic.
+            margin (float): See ``__init__``. Defaults to 0.05.
+            sample_size (int): Maximum number of stored vectors sampled per topic. Defaults to 256.
+            topic_positions (Dict[str, np.ndarray] | None): The index positions of the chunks of topics that
+                share a vectorstore through a metadata filter. Defaults to None (topics own their vectorstore).
+
+        Returns:
+            EmbeddingTopicRouter: The constructed router.
+        """
+        topic_descriptions = topic_descriptions or {}
+        topic_positions = topic_positions or {}
+        topic_vectors: Dict[str, np.ndarray] = {}
+        to_embed: Dict[str, str] = {}
+        for topic, vectorstore in vectorstores.items():
+            if topic in topic_descriptions:
+                to_embed[topic] = topic_descriptions[topic]
+                continue
+            vector = sample_topic_vector(vectorstore, sample_size, topic_positions.get(topic))
+            if vector is None:
+                to_embed[topic] = topic
+            else:
+                topic_vectors[topic] = vector
+
+        # Embed all descriptions in one batched call
+        if to_embed:
+            embedded = embeddings.embed_documents(list(to_embed.values()))
+            for topic, vector in zip(to_embed.keys(), embedded):
+                topic_vectors[topic] = np.asarray(vector, dtype=np.float32)
+
+        # Preserve the configured topic order
+        ordered = {topic: topic_vectors[topic] for topic in vectorstores}
+        return cls(embeddings, ordered, margin=margin)
+
+    def score(self, question: str) -> List[Tuple[str, float]]:
+        """
+        Score every topic against a question.
+
+        Args:
+            question (str): The question to score.
+
+        Returns:
+            List[Tuple[str, float]]: (topic, cosine similarity) pairs sorted from best to worst.
+        """
+        query = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        query = _normalize_rows(query.reshape(1, -1))[0]
+        similarities = self._matrix @ query
+        order = np.argsort(-similarities)
+        return [(self.topics[i], float(similarities[i])) for i in order]
+
+    def route(self, question: str, current_topic: str | None = None) -> str | None:
+        """
+        Pick the topic for a question if the decision is clear.
+
+        Like the LLM router, the router stays on the conversation's current topic unless the question
+        points elsewhere: when no topic leads by the margin, the current topic is kept if it scores
+        within the margin of the best one.
+
+        Args:
+            question (str): The question to route.
+            current_topic (str | None): The topic of the conversation so far. Defaults to None.
+
+        Returns:
+            str | None: The best topic or the current one, or None if neither is clear and the caller
+                should fall back to another router.
+        """
+        scores = self.score(question)
+        if len(scores) == 1:
+            return scores[0][0]
+        (best_topic, best_score), (_, runner_up_score) = scores[0], scores[1]
+        if best_score - runner_up_score >= self.margin:
+            return best_topic
+        if any(topic == current_topic and best_score - score < self.margin for topic, score in scores):
+            return current_topic
+        return None
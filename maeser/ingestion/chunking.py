@@ -0,0 +1,145 @@
+"""
+Module for streaming text files into chunks without loading whole files or corpora into memory.
+
+Files are read in windows of a fixed number of characters and split as they are read, so
+peak memory depends on the window and batch sizes rather than on the size of the corpus.
+Every chunk records its source file, its page (pages are separated by form feeds, as in
+the text files written by ``maeser.ingestion.pdf``) and its character offset in the file.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from itertools import islice
+from os import path
+from typing import Iterable, Iterator, List, Tuple, TypeVar
+from langchain_core.documents import Document
+from langchain_text_splitters import TextSplitter
+from maeser.ingestion.files import PAGE_BREAK
+
+DEFAULT_WINDOW_CHARS = 1_000_000
+"""Default number of characters read from a file at a time."""
+
+T = TypeVar("T")
+
+
+def _locate(text: str, chunks: List[str]) -> List[Tuple[int, str]]:
+    """Find the offset of each chunk in the text it was split from."""
+    located = []
+    search_from = 0
+    for chunk in chunks:
+        index = text.find(chunk, search_from)
+        if index < 0:
+            index = max(text.find(chunk), 0)
+        located.append((index, chunk))
+        search_from = index + 1
+    return located
+
+
+def iter_file_chunks(
+    file_path: str,
+    text_splitter: TextSplitter,
+    source: str | None = None,
+    window_chars: int = DEFAULT_WINDOW_CHARS,
+) -> Iterator[Document]:
+    """
+    Stream the chunks of a text file.
+
+    Pages are split on their own, so chunks never span a page break. A page longer than the
+    window is split as it is read: the chunks before the last one are emitted, and the text
+    from the start of the last chunk is kept to be split with the next window.
+
+    Args:
+        file_path (str): The UTF-8 text file.
+        text_splitter (TextSplitter): The splitter that chunks each page.
+        source (str | None): The 'source' metadata of the chunks. Defaults to the file name.
+        window_chars (int): The number of characters read at a time. Defaults to DEFAULT_WINDOW_CHARS.
+
+    Yields:
+        Document: Each chunk, with 'source', 'page' (starting at 1) and 'offset' (characters from the
+            start of the file) metadata.
+    """
+    source = source or path.basename(file_path)
+    page = 1
+    buffer = ""
+    buffer_offset = 0
+
+    def emit(text: str, last: bool) -> Iterator[Document]:
+        nonlocal buffer_offset
+        located = _locate(text, text_splitter.split_text(text))
+        carry_from = len(text)
+        if not last and located:
+            # Keep the last chunk, which may continue in the next window
+            located, (carry_from, _) = located[:-1], located[-1]
+        for index, chunk in located:
+            yield Document(chunk, metadata={"source": source, "page": page, "offset": buffer_offset + index})
+        if not last:
+            buffer_offset += carry_from
+
+    with open(file_path, "r", encoding="utf-8") as file:
+        while True:
+            data = file.read(window_chars)
+            buffer += data
+            position = 0
+            while (end := buffer.find(PAGE_BREAK, position)) >= 0:
+                yield from emit(buffer[position:end], last=True)
+                buffer_offset += end - position + len(PAGE_BREAK)
+                position = end + len(PAGE_BREAK)
+                page += 1
+            buffer = buffer[position:]
+            if not data:
+                if buffer.strip():
+                    yield from emit(buffer, last=True)
+                return
+            if len(buffer) > window_chars:
+                start = buffer_offset
+                yield from emit(buffer, last=False)
+                buffer = buffer[buffer_offset - start:]
+
+
+def iter_corpus_chunks(
+    file_paths: Iterable[str],
+    text_splitter: TextSplitter,
+    window_chars: int = DEFAULT_WINDOW_CHARS,
+) -> Iterator[Document]:
+    """
+    Stream the chunks of several text files, one file after the other.
+
+    Args:
+        file_paths (Iterable[str]): The UTF-8 text files.
+        text_splitter (TextSplitter): The splitter that chunks each page.
+        window_chars (int): The number of characters read at a time. Defaults to DEFAULT_WINDOW_CHARS.
+
+    Yields:
+        Document: Each chunk, as yielded by ``iter_file_chunks``.
+    """
+    for file_path in file_paths:
+        yield from iter_file_chunks(file_path, text_splitter, window_chars=window_chars)
+
+
+def batched(items: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """
+    Group items into lists of at most ``batch_size`` items, consuming the input lazily.
+
+    Args:
+        items (Iterable[T]): The items.
+        batch_size (int): The maximum number of items per batch.
+
+    Yields:
+        List[T]: Each batch, in order.
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
@@ -0,0 +1,214 @@
+"""
+Module for dropping duplicate and near-duplicate chunks before they are embedded.
+
+Course material repeats slide headers, syllabus blocks and whole paragraphs across
+handouts. Exact repeats are found by a hash of the normalized text, and near repeats by
+MinHash signatures over word shingles, with locality-sensitive hashing (LSH) bands so
+that each chunk is only compared with likely candidates instead of every kept chunk.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import re
+import zlib
+from itertools import count
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+import numpy as np
+from langchain_core.documents import Document
+
+_WORD_PATTERN = re.compile(r"\w+")
+_PRIME = np.uint64((1 << 61) - 1)
+
+
+def _words(text: str) -> List[str]:
+    """Normalize text to its lowercase words, ignoring punctuation and whitespace."""
+    return _WORD_PATTERN.findall(text.lower())
+
+
+class NearDuplicateFilter:
+    """
+    Streaming filter that keeps the first of each group of duplicate or near-duplicate chunks.
+
+    Chunks stream through, but the filter remembers every kept chunk: its exact key, a signature
+    of num_perm 64-bit hashes (1 KB by default) and its LSH bucket entries. Memory therefore grows
+    with the number of distinct chunks, unlike the rest of the streaming ingestion pipeline.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, bands: int = 16, shingle_size: int = 3, seed: int = 1) -> None:
+        """
+        Initializes the NearDuplicateFilter.
+
+        Args:
+            threshold (float): The estimated Jaccard similarity of word shingles above which a chunk is a
+                near duplicate of a kept one. Defaults to 0.85.
+            num_perm (int): The number of MinHash permutations. Defaults to 128.
+            bands (int): The number of LSH bands; it must divide num_perm. More bands find more candidates
+                at lower similarity. Defaults to 16.
+            shingle_size (int): The number of words per shingle. Defaults to 3.
+            seed (int): The seed of the MinHash permutations. Defaults to 1.
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold: float = threshold
+        self.bands: int = bands
+        self.rows: int = num_perm // bands
+        self.shingle_size: int = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+        self._exact: Dict[str, str] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+        self._ids = count()
+        self.stats: Dict[str, int] = dict.fromkeys(
+            ("chunks", "kept", "exact_duplicates", "near_duplicates", "removed_characters"), 0)
+
+    def _exact_key(self, words: List[str]) -> str:
+        return hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()
+
+    def signature(self, words: List[str]) -> np.ndarray:
+        """
+        Compute the MinHash signature of a normalized text.
+
+        Args:
+            words (List[str]): The words of the text.
+
+        Returns:
+            np.ndarray: One minimum hash per permutation.
+        """
+        size = self.shingle_size
+        shingles = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+        # 32-bit shingle hashes times 31-bit coefficients cannot overflow 64 bits
+        return ((hashes[:, None] * self._a + self._b) % _PRIME).min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def find(self, text: str) -> Tuple[str | None, str, np.ndarray | None]:
+        """
+        Find a kept chunk that the text duplicates.
+
+        Args:
+            text (str): The chunk text.
+
+        Returns:
+            Tuple[str | None, str, np.ndarray | None]: The ID of the kept chunk it duplicates (or None), its exact
+                key and its MinHash signature (None for exact duplicates), to pass to ``add``.
+        """
+        words = _words(text)
+        exact_key = self._exact_key(words)
+        if exact_key in self._exact:
+            return self._exact[exact_key], exact_key, None
+        signature = self.signature(words)
+        best_id, best_similarity = None, self.threshold
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best_id, best_similarity = candidate, similarity
+        return best_id, exact_key, signature
+
+    def add(self, chunk_id: str, text: str, exact_key: str | None = None, signature: np.ndarray | None = None) -> None:
+        """
+        Keep a chunk, so that later duplicates of it are found.
+
+        Args:
+            chunk_id (str): The ID of the chunk.
+            text (str): The chunk text.
+            exact_key (str | None): The exact key returned by ``find``. Defaults to computing it.
+            signature (np.ndarray | None): The signature returned by ``find``. Defaults to computing it.
+
+        Returns:
+            None
+        """
+        if exact_key is None or signature is None:
+            words = _words(text)
+            exact_key, signature = self._exact_key(words), self.signature(words)
+        self._exact.setdefault(exact_key, chunk_id)
+        self._signatures[chunk_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(chunk_id)
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        """
+        Forget kept chunks, for example because their document was deleted.
+
+        Args:
+            chunk_ids (Iterable[str]): The IDs of the chunks.
+
+        Returns:
+            None
+        """
+        removed = set(chunk_ids)
+        for chunk_id in removed:
+            signature = self._signatures.pop(chunk_id, None)
+            if signature is not None:
+                for key in self._band_keys(signature):
+                    self._buckets.get(key, set()).discard(chunk_id)
+        self._exact = {key: chunk_id for key, chunk_id in self._exact.items() if chunk_id not in removed}
+
+    def check(self, document: Document) -> str | None:
+        """
+        Check one chunk: keep it if it is new, or count it as removed if it duplicates a kept chunk.
+
+        Args:
+            document (Document): The chunk. Chunks without an ``id`` get a generated one.
+
+        Returns:
+            str | None: The ID of the kept chunk it duplicates, or None if it was kept.
+        """
+        self.stats["chunks"] += 1
+        duplicate_of, exact_key, signature = self.find(document.page_content)
+        if duplicate_of is not None:
+            self.stats["exact_duplicates" if signature is None else "near_duplicates"] += 1
+            self.stats["removed_characters"] += len(document.page_content)
+            return duplicate_of
+        self.stats["kept"] += 1
+        self.add(document.id or f"chunk-{next(self._ids)}", document.page_content, exact_key, signature)
+        return None
+
+    def filter(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        Drop the duplicate and near-duplicate chunks of a stream, keeping the first of each group.
+
+        Args:
+            documents (Iterable[Document]): The chunks, consumed lazily.
+
+        Yields:
+            Document: The kept chunks, in order.
+        """
+        for document in documents:
+            if self.check(document) is None:
+                yield document
+
+    def report(self) -> Dict[str, float]:
+        """
+        Summarize how much was removed.
+
+        Returns:
+            Dict[str, float]: The counts in ``stats``, the percentage of chunks removed and the estimated
+                tokens saved (four characters per token) per embedding run.
+        """
+        removed = self.stats["exact_duplicates"] + self.stats["near_duplicates"]
+        return {
+            **self.stats,
+            "removed_percent": round(100 * removed / self.stats["chunks"], 1) if self.stats["chunks"] else 0.0,
+            "estimated_tokens_saved": self.stats["removed_characters"] // 4,
+        }
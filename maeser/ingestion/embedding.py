@@ -0,0 +1,338 @@
+"""
+Module for embedding chunks in batches over a bounded pool of concurrent requests.
+
+Batches are sent by a thread pool whose effective concurrency adapts to the embedding
+API: it grows while requests succeed and is halved whenever the API answers with a rate
+limit (HTTP 429), like TCP congestion control. Transient errors are retried with
+exponential backoff, and every completed batch can be checkpointed to disk, keyed by the
+content of the batch, so an interrupted run resumes without paying for finished batches
+again.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from os import path
+from typing import Deque, Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from maeser.ingestion.chunking import batched
+
+
+def _status_code(error: Exception) -> int | None:
+    """Get the HTTP status code of an API error, if it has one."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """
+    Check whether an embedding request failed because of a rate limit.
+
+    Args:
+        error (Exception): The error raised by the embedding model.
+
+    Returns:
+        bool: True for HTTP 429 responses.
+    """
+    return _status_code(error) == 429
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Check whether an embedding request failed in a way that is worth retrying.
+
+    Args:
+        error (Exception): The error raised by the embedding model.
+
+    Returns:
+        bool: True for rate limits, server errors, timeouts and connection errors.
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Get the delay requested by a Retry-After header, if the error has one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit with additive increase and multiplicative decrease.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1) -> None:
+        """
+        Initializes the AdaptiveConcurrency.
+
+        Args:
+            initial (int): The starting limit.
+            maximum (int): The highest limit.
+            minimum (int): The lowest limit. Defaults to 1.
+        """
+        self.minimum: int = minimum
+        self.maximum: int = maximum
+        self.limit: float = float(min(max(initial, minimum), maximum))
+        self.in_flight: int = 0
+        self.peak: int = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """
+        Wait until a request may start.
+
+        Returns:
+            None
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def release(self, throttled: bool = False) -> None:
+        """
+        Mark a request as finished and adapt the limit.
+
+        Args:
+            throttled (bool): Whether the request was rate limited, which halves the limit. Otherwise the
+                limit grows by about one per round of requests. Defaults to False.
+
+        Returns:
+            None
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class EmbeddingStage:
+    """
+    Embeds batches of texts concurrently, with retries, adaptive rate control and disk checkpoints.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_workers: int = 8,
+        initial_workers: int = 2,
+        checkpoint_dir: str | None = None,
+        max_retries: int = 6,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+    ) -> None:
+        """
+        Initializes the EmbeddingStage.
+
+        Args:
+            embeddings (Embeddings): The embedding model. Its own retries should be turned off (for
+                example ``OpenAIEmbeddings(max_retries=0)``) so that rate limits reach this stage.
+            max_workers (int): The most concurrent requests. Defaults to 8.
+            initial_workers (int): The concurrent requests to start with. Defaults to 2.
+            checkpoint_dir (str | None): Directory to save completed batches in. Defaults to no checkpoints.
+            max_retries (int): Retries of a batch after transient errors. Defaults to 6.
+            backoff_seconds (float): Delay before the first retry, doubled for every further retry. Defaults to 1.
+            max_backoff_seconds (float): The longest delay between retries. Defaults to 60.
+        """
+        self.embeddings: Embeddings = embeddings
+        self.max_workers: int = max_workers
+        self.checkpoint_dir: str | None = checkpoint_dir
+        self.max_retries: int = max_retries
+        self.backoff_seconds: float = backoff_seconds
+        self.max_backoff_seconds: float = max_backoff_seconds
+        self.concurrency = AdaptiveConcurrency(initial_workers, max_workers)
+        self.stats: Dict[str, int] = dict.fromkeys(("batches", "requests", "retries", "rate_limited", "checkpoint_hits"), 0)
+        self._stats_lock = threading.Lock()
+        self._model = str(getattr(embeddings, "model", type(embeddings).__name__))
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _checkpoint_path(self, texts: List[str]) -> str | None:
+        """Get the checkpoint file of a batch, named by a hash of the model and the texts."""
+        if not self.checkpoint_dir:
+            return None
+        digest = hashlib.sha256(self._model.encode("utf-8"))
+        for text in texts:
+            digest.update(hashlib.sha256(text.encode("utf-8")).digest())
+        return path.join(self.checkpoint_dir, f"{digest.hexdigest()}.npy")
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed one batch, from its checkpoint if it was already embedded.
+
+        Args:
+            texts (List[str]): The texts of the batch.
+
+        Returns:
+            List[List[float]]: One vector per text.
+
+        Raises:
+            Exception: The last error, if the batch still fails after ``max_retries`` retries, or the first
+                error that is not transient.
+        """
+        checkpoint = self._checkpoint_path(texts)
+        if checkpoint and path.exists(checkpoint):
+            self._count("checkpoint_hits")
+            return np.load(checkpoint).tolist()
+
+        attempt = 0
+        while True:
+            self.concurrency.acquire()
+            self._count("requests")
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+            except Exception as e:
+                throttled = is_rate_limited(e)
+                self.concurrency.release(throttled=throttled)
+                if throttled:
+                    self._count("rate_limited")
+                if not is_transient(e) or attempt >= self.max_retries:
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(self.backoff_seconds * 2 ** attempt, self.max_backoff_seconds)
+                attempt += 1
+                self._count("retries")
+                time.sleep(delay)
+                continue
+            self.concurrency.release()
+            break
+
+        if checkpoint:
+            temporary_path = f"{checkpoint}.tmp.npy"
+            np.save(temporary_path, np.asarray(vectors, dtype=np.float32))
+            os.replace(temporary_path, checkpoint)
+        self._count("batches")
+        return vectors
+
+    def embed_batches(self, batches: Iterable[List[Document]]) -> Iterator[Tuple[List[Document], List[List[float]]]]:
+        """
+        Embed batches of documents concurrently, consuming the input lazily.
+
+        At most twice ``max_workers`` batches are read ahead, so memory stays bounded for
+        streamed input.
+
+        Args:
+            batches (Iterable[List[Document]]): The batches to embed.
+
+        Yields:
+            Tuple[List[Document], List[List[float]]]: Each batch with its vectors, in input order.
+        """
+        pending: Deque[Tuple[List[Document], Future]] = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for batch in batches:
+                    pending.append((batch, executor.submit(self.embed_batch, [document.page_content for document in batch])))
+                    while len(pending) >= 2 * self.max_workers or (pending and pending[0][1].done()):
+                        batch, future = pending.popleft()
+                        yield batch, future.result()
+                while pending:
+                    batch, future = pending.popleft()
+                    yield batch, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def clear_checkpoints(self) -> None:
+        """
+        Delete the checkpoints, once the embedded batches are safely stored.
+
+        Returns:
+            None
+        """
+        if self.checkpoint_dir and path.exists(self.checkpoint_dir):
+            shutil.rmtree(self.checkpoint_dir)
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+
+def add_to_vectorstore(
+    store: FAISS | None,
+    batch: List[Document],
+    vectors: List[List[float]],
+    embeddings: Embeddings,
+) -> FAISS:
+    """
+    Add embedded documents to a FAISS vectorstore, creating it for the first batch.
+
+    Args:
+        store (FAISS | None): The vectorstore, or None to create one.
+        batch (List[Document]): The documents. Their ``id``, if set, becomes the docstore ID.
+        vectors (List[List[float]]): The vector of each document.
+        embeddings (Embeddings): The embedding model, used by the vectorstore for queries.
+
+    Returns:
+        FAISS: The vectorstore holding the documents.
+    """
+    text_embeddings = list(zip([document.page_content for document in batch], vectors))
+    metadatas = [document.metadata for document in batch]
+    ids = [document.id for document in batch] if all(document.id for document in batch) else None
+    if store is None:
+        return FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=ids)
+    store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+    return store
+
+
+def build_vectorstore(
+    documents: Iterable[Document],
+    embeddings: Embeddings,
+    batch_size: int = 256,
+    stage: EmbeddingStage | None = None,
+) -> FAISS | None:
+    """
+    Build a FAISS vectorstore from documents, embedding them batch by batch with an EmbeddingStage.
+
+    This replaces ``FAISS.from_documents`` for corpora that are too large for one call.
+
+    Args:
+        documents (Iterable[Document]): The chunks to embed, consumed lazily.
+        embeddings (Embeddings): The embedding model.
+        batch_size (int): The number of chunks per embedding request. Defaults to 256.
+        stage (EmbeddingStage | None): The stage that embeds the batches. Defaults to a stage with the
+            default settings and no checkpoints.
+
+    Returns:
+        FAISS | None: The vectorstore, or None if there were no documents.
+    """
+    stage = stage or EmbeddingStage(embeddings)
+    store = None
+    for batch, vectors in stage.embed_batches(batched(documents, batch_size)):
+        store = add_to_vectorstore(store, batch, vectors, embeddings)
+    return store
@@ -0,0 +1,60 @@
+"""
+Module for the page and hashing helpers shared by the ingestion stages.
+
+It imports only the standard library, so the PDF extraction workers can use it without
+loading LangChain, FAISS or NumPy in every process of their pool.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+from typing import List
+
+PAGE_BREAK = "\f"
+"""The page separator in extracted text files."""
+
+
+def split_pages(text: str) -> List[str]:
+    """
+    Split extracted text into pages.
+
+    Args:
+        text (str): Text whose pages are separated by form feeds. Text without form feeds is one page.
+
+    Returns:
+        List[str]: The text of each page, without the empty page ``pdftotext`` leaves after the last form feed.
+    """
+    pages = text.split(PAGE_BREAK)
+    if len(pages) > 1 and not pages[-1].strip():
+        pages.pop()
+    return pages
+
+
+def file_hash(file_path: str) -> str:
+    """
+    Hash the content of a file, reading it in blocks.
+
+    Args:
+        file_path (str): The file to hash.
+
+    Returns:
+        str: The SHA-256 hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
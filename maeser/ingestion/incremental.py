@@ -0,0 +1,336 @@
+"""
+Module for incremental, content-hashed updates of a FAISS vectorstore.
+
+A JSON manifest stored next to the vectorstore records a content hash of every ingested
+document and of every chunk it was split into. On each run, unchanged documents are
+skipped without being re-chunked, only chunks that are new are embedded, and the vectors
+of changed or removed documents are deleted, so the existing index is updated in place
+instead of being rebuilt from the whole corpus.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter
+from os import path
+from typing import Any, Dict, Iterable, Iterator, List
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import TextSplitter
+from maeser.graphs.bm25 import BM25Index, bm25_path
+from maeser.ingestion.chunking import DEFAULT_WINDOW_CHARS, batched, iter_file_chunks
+from maeser.ingestion.dedup import NearDuplicateFilter
+from maeser.ingestion.embedding import EmbeddingStage, add_to_vectorstore
+from maeser.ingestion.files import file_hash
+from maeser.ingestion.indexes import delete_vectors
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path(vectorstore_path: str, index_name: str = "index") -> str:
+    """
+    Get the file path of the ingestion manifest stored next to a FAISS vectorstore.
+
+    Args:
+        vectorstore_path (str): The directory of the FAISS vectorstore.
+        index_name (str): The index name of the FAISS vectorstore. Defaults to 'index'.
+
+    Returns:
+        str: The path of the manifest file.
+    """
+    return path.join(vectorstore_path, f"{index_name}.manifest.json")
+
+
+def content_hash(text: str) -> str:
+    """
+    Hash text content.
+
+    Args:
+        text (str): The text to hash.
+
+    Returns:
+        str: The SHA-256 hex digest of the UTF-8 encoded text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source: str, digest: str, occurrence: int) -> str:
+    """
+    Get the docstore ID of a chunk.
+
+    The ID is derived from the chunk's source, its content hash and how many identical chunks
+    precede it in the document, so an unchanged chunk keeps its ID (and its vector) when
+    other parts of the document change.
+
+    Args:
+        source (str): The name of the document the chunk comes from.
+        digest (str): The content hash of the chunk.
+        occurrence (int): The number of identical chunks before it in the document.
+
+    Returns:
+        str: The chunk ID.
+    """
+    return content_hash(f"{source}\0{occurrence}\0{digest}")
+
+
+def chunk_entries(source: str, chunks: List[str]) -> List[Dict[str, str]]:
+    """
+    Compute the manifest entries of the chunks of a document.
+
+    Args:
+        source (str): The name of the document the chunks come from.
+        chunks (List[str]): The chunk texts, in document order.
+
+    Returns:
+        List[Dict[str, str]]: One {'id', 'hash'} entry per chunk, with IDs from ``chunk_id``.
+    """
+    occurrences: Counter = Counter()
+    entries = []
+    for chunk in chunks:
+        digest = content_hash(chunk)
+        entries.append({"id": chunk_id(source, digest, occurrences[digest]), "hash": digest})
+        occurrences[digest] += 1
+    return entries
+
+
+class IngestionManifest:
+    """
+    Record of the documents and chunks stored in a vectorstore, keyed by document source.
+    """
+
+    def __init__(self, settings: Dict[str, Any] | None = None, documents: Dict[str, dict] | None = None) -> None:
+        """
+        Initializes the IngestionManifest.
+
+        Args:
+            settings (Dict[str, Any] | None): The chunking and embedding settings the vectorstore was built with.
+                Defaults to no settings.
+            documents (Dict[str, dict] | None): Mapping of document source to its {'hash', 'chunks'} entry.
+                Defaults to no documents.
+        """
+        self.settings: Dict[str, Any] = settings or {}
+        self.documents: Dict[str, dict] = documents or {}
+
+    def chunk_ids(self) -> List[str]:
+        """
+        Get the docstore ID of every stored chunk in the manifest, leaving out chunks dropped as duplicates.
+
+        Returns:
+            List[str]: The chunk IDs.
+        """
+        return [
+            chunk["id"] for document in self.documents.values() for chunk in document["chunks"]
+            if "duplicate_of" not in chunk
+        ]
+
+    @classmethod
+    def load(cls, file_path: str) -> "IngestionManifest":
+        """
+        Load a manifest saved with ``save``.
+
+        Args:
+            file_path (str): The file to read.
+
+        Returns:
+            IngestionManifest: The loaded manifest, or an empty one if the file does not exist.
+        """
+        if not path.exists(file_path):
+            return cls()
+        with open(file_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != MANIFEST_VERSION:
+            print(f"\x1b[33mWarning: Ignoring ingestion manifest {file_path} with unsupported version {data.get('version')}.\x1b[0m")
+            return cls()
+        return cls(data["settings"], data["documents"])
+
+    def save(self, file_path: str) -> None:
+        """
+        Save the manifest as JSON. The file is replaced atomically, so an interrupted save
+        leaves the previous manifest intact.
+
+        Args:
+            file_path (str): The file to write, usually from ``manifest_path``.
+
+        Returns:
+            None
+        """
+        temporary_path = f"{file_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({"version": MANIFEST_VERSION, "settings": self.settings, "documents": self.documents}, file)
+        os.replace(temporary_path, file_path)
+
+
+def _reconcile(store: FAISS, manifest: IngestionManifest) -> None:
+    """
+    Bring a manifest and its vectorstore back in sync after an interrupted run: vectors that are
+    not in the manifest are deleted, and documents whose chunks (or the kept copies of their
+    duplicate chunks) are missing from the vectorstore are marked as changed so they are
+    ingested again.
+    """
+    stored_ids = set(store.index_to_docstore_id.values())
+    orphans = stored_ids.difference(manifest.chunk_ids())
+    delete_vectors(store, orphans)
+    for document in manifest.documents.values():
+        stored_chunks = [chunk for chunk in document["chunks"] if chunk.get("duplicate_of", chunk["id"]) in stored_ids]
+        if len(stored_chunks) < len(document["chunks"]):
+            document["hash"] = None
+            document["chunks"] = stored_chunks
+
+
+def sync_vectorstore(
+    vectorstore_path: str,
+    text_files: Iterable[str],
+    embeddings: Embeddings,
+    text_splitter: TextSplitter,
+    index_name: str = "index",
+    settings: Dict[str, Any] | None = None,
+    batch_size: int = 256,
+    window_chars: int = DEFAULT_WINDOW_CHARS,
+    embedding_stage: EmbeddingStage | None = None,
+    deduplicate: NearDuplicateFilter | None = None,
+) -> Dict[str, int]:
+    """
+    Update a FAISS vectorstore in place so that it holds exactly the chunks of the given text files.
+
+    Files whose content hash matches the manifest are skipped. Changed files are streamed
+    through ``maeser.ingestion.chunking``, and only chunks that were not already stored are
+    embedded by an ``EmbeddingStage`` and added with ``FAISS.add_embeddings``, in batches as
+    they are produced; the vectors of chunks that disappeared and of files that are no longer
+    present are removed with ``maeser.ingestion.indexes.delete_vectors``, which also handles
+    IVF and HNSW indexes. The BM25 index and the manifest are saved next to the vectorstore.
+
+    If the vectorstore does not exist yet, or was built with different ``settings``, it is
+    built from scratch.
+
+    Args:
+        vectorstore_path (str): The directory of the FAISS vectorstore.
+        text_files (Iterable[str]): The UTF-8 text files of the complete corpus, identified by file name.
+            Stored documents whose file is not listed are removed.
+        embeddings (Embeddings): The embedding model.
+        text_splitter (TextSplitter): The splitter that chunks changed documents.
+        index_name (str): The index name of the FAISS vectorstore. Defaults to 'index'.
+        settings (Dict[str, Any] | None): The chunking and embedding settings, such as chunk size and
+            embedding model. A change of settings triggers a full rebuild. Defaults to no settings.
+        batch_size (int): The number of chunks per embedding request. Defaults to 256.
+        window_chars (int): The number of characters read from a file at a time. Defaults to DEFAULT_WINDOW_CHARS.
+        embedding_stage (EmbeddingStage | None): The stage that embeds the batches, for concurrency and
+            checkpoints. Defaults to one request at a time without checkpoints.
+        deduplicate (NearDuplicateFilter | None): A new filter to drop new chunks that duplicate a stored
+            chunk or an earlier new one. Dropped chunks are recorded in the manifest, and ingested
+            after all if the chunk they duplicate is deleted. Defaults to no deduplication.
+
+    Returns:
+        Dict[str, int]: Counts of added, changed, removed and unchanged documents, and of embedded,
+            kept, deleted and duplicate chunks.
+    """
+    settings = settings or {}
+    manifest_file = manifest_path(vectorstore_path, index_name)
+    manifest = IngestionManifest.load(manifest_file)
+    store: FAISS | None = None
+    if manifest.documents and manifest.settings == settings and path.exists(path.join(vectorstore_path, f"{index_name}.faiss")):
+        store = FAISS.load_local(vectorstore_path, embeddings, index_name, allow_dangerous_deserialization=True)
+        _reconcile(store, manifest)
+    else:
+        if manifest.documents:
+            print(f"\x1b[33mWarning: Ingestion settings changed or the vectorstore is missing, rebuilding {vectorstore_path} from scratch.\x1b[0m")
+        manifest = IngestionManifest(settings)
+
+    report = dict.fromkeys(
+        ("added_documents", "changed_documents", "removed_documents", "unchanged_documents",
+         "embedded_chunks", "kept_chunks", "deleted_chunks", "duplicate_chunks"), 0)
+    stale_ids: List[str] = []
+    if deduplicate is not None and store is not None:
+        # Chunks already stored count as kept copies for new chunks to be compared with
+        for stored_id in manifest.chunk_ids():
+            deduplicate.add(stored_id, store.docstore.search(stored_id).page_content)  # type: ignore
+
+    def ingest(file_path: str, source: str, document_hash: str) -> Iterator[Document]:
+        """Chunk one document, updating its manifest entry and yielding the chunks that need embedding."""
+        previous = manifest.documents.get(source)
+        previous_ids = {chunk["id"] for chunk in previous["chunks"] if "duplicate_of" not in chunk} if previous else set()
+        if deduplicate is not None:
+            deduplicate.remove(previous_ids)
+        entries = []
+        occurrences: Counter = Counter()
+        for chunk in iter_file_chunks(file_path, text_splitter, source, window_chars):
+            digest = content_hash(chunk.page_content)
+            entry = {"id": chunk_id(source, digest, occurrences[digest]), "hash": digest}
+            occurrences[digest] += 1
+            entries.append(entry)
+            if entry["id"] in previous_ids:
+                # A kept chunk may have moved to another page or offset
+                store.docstore.search(entry["id"]).metadata.update(chunk.metadata)  # type: ignore
+                if deduplicate is not None:
+                    deduplicate.add(entry["id"], chunk.page_content)
+                continue
+            chunk.id = entry["id"]
+            duplicate_of = deduplicate.check(chunk) if deduplicate is not None else None
+            if duplicate_of is not None:
+                entry["duplicate_of"] = duplicate_of
+                report["duplicate_chunks"] += 1
+            else:
+                yield chunk
+        stale_ids.extend(previous_ids.difference(entry["id"] for entry in entries))
+        manifest.documents[source] = {"hash": document_hash, "chunks": entries}
+
+    def new_chunks() -> Iterator[Document]:
+        """Walk the corpus and yield the chunks that need embedding."""
+        file_paths = {}
+        for file_path in text_files:
+            source = path.basename(file_path)
+            file_paths[source] = file_path
+            document_hash = file_hash(file_path)
+            previous = manifest.documents.get(source)
+            if previous is not None and previous["hash"] == document_hash:
+                report["unchanged_documents"] += 1
+                continue
+            report["changed_documents" if previous is not None else "added_documents"] += 1
+            yield from ingest(file_path, source, document_hash)
+
+        for source in set(manifest.documents) - set(file_paths):
+            report["removed_documents"] += 1
+            stale_ids.extend(chunk["id"] for chunk in manifest.documents.pop(source)["chunks"] if "duplicate_of" not in chunk)
+
+        # Chunks dropped as duplicates of chunks that are now deleted must be ingested after all
+        handled = 0
+        while deduplicate is not None and handled < len(stale_ids):
+            deleted = set(stale_ids[handled:])
+            handled = len(stale_ids)
+            deduplicate.remove(deleted)
+            for source, document in list(manifest.documents.items()):
+                if any(chunk.get("duplicate_of") in deleted for chunk in document["chunks"]):
+                    yield from ingest(file_paths[source], source, document["hash"])
+
+    stage = embedding_stage or EmbeddingStage(embeddings, max_workers=1, initial_workers=1)
+    for batch, vectors in stage.embed_batches(batched(new_chunks(), batch_size)):
+        store = add_to_vectorstore(store, batch, vectors, embeddings)
+        report["embedded_chunks"] += len(batch)
+    report["kept_chunks"] = len(manifest.chunk_ids()) - report["embedded_chunks"]
+
+    if store is not None:
+        delete_vectors(store, stale_ids)
+    report["deleted_chunks"] = len(stale_ids)
+
+    if store is not None:
+        os.makedirs(vectorstore_path, exist_ok=True)
+        store.save_local(vectorstore_path, index_name)
+        BM25Index.from_vectorstore(store).save(bm25_path(vectorstore_path, index_name))
+        # The manifest is written last, so an interrupted run is repaired by _reconcile on the next one
+        manifest.save(manifest_file)
+    return report
@@ -0,0 +1,298 @@
+"""
+Module for building FAISS vectorstores on approximate nearest-neighbor indexes.
+
+The ingestion scripts embed chunks into a flat index, whose search cost grows linearly
+with the corpus and which stores every vector uncompressed. For large corpora the flat
+index can be converted into an inverted-file index (IVF), optionally with scalar (SQ8) or
+product (PQ) quantization to compress the vectors, or into an HNSW graph. The search
+settings (``nprobe`` for IVF, ``efSearch`` for HNSW) are saved with the index and can be
+overridden when a graph loads it.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+from typing import Any, Dict, Iterable
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_sq8', 'ivf_pq', 'hnsw')
+
+# Vectors copied between indexes at a time, so a conversion never holds the whole corpus twice
+_BLOCK_SIZE = 65536
+
+
+def default_nlist(vectors: int) -> int:
+    """
+    Choose the number of IVF lists for a corpus: about 4 * sqrt(vectors), with at least
+    39 vectors per list to train on.
+
+    Args:
+        vectors (int): The number of vectors in the index.
+
+    Returns:
+        int: The number of lists.
+    """
+    return max(1, min(int(4 * math.sqrt(vectors)), vectors // 39))
+
+
+def default_pq_m(dimension: int) -> int:
+    """
+    Choose the number of PQ sub-quantizers for a dimension: the largest divisor of the
+    dimension that gives at least 4 dimensions per sub-quantizer, which compresses float32
+    vectors 16 times with 8-bit codes.
+
+    Args:
+        dimension (int): The vector dimension.
+
+    Returns:
+        int: The number of sub-quantizers, which is also the bytes per vector with 8-bit codes.
+    """
+    return max(m for m in range(1, max(dimension // 4, 1) + 1) if dimension % m == 0)
+
+
+def index_factory_string(
+    index_type: str,
+    dimension: int,
+    vectors: int,
+    nlist: int | None = None,
+    pq_m: int | None = None,
+    pq_bits: int = 8,
+    hnsw_m: int = 32,
+) -> str:
+    """
+    Describe an index for ``faiss.index_factory``.
+
+    Args:
+        index_type (str): One of INDEX_TYPES.
+        dimension (int): The vector dimension.
+        vectors (int): The number of vectors the index is built for, used for the default nlist.
+        nlist (int | None): The number of IVF lists. Defaults to default_nlist(vectors).
+        pq_m (int | None): The number of PQ sub-quantizers; it must divide the dimension. Defaults to
+            default_pq_m(dimension).
+        pq_bits (int): The bits per PQ code. Defaults to 8.
+        hnsw_m (int): The number of HNSW neighbors per node. Defaults to 32.
+
+    Returns:
+        str: The index factory string.
+
+    Raises:
+        ValueError: If index_type is invalid or pq_m does not divide the dimension.
+    """
+    nlist = nlist or default_nlist(vectors)
+    if index_type == 'flat':
+        return 'Flat'
+    if index_type == 'ivf_flat':
+        return f'IVF{nlist},Flat'
+    if index_type == 'ivf_sq8':
+        return f'IVF{nlist},SQ8'
+    if index_type == 'ivf_pq':
+        pq_m = pq_m or default_pq_m(dimension)
+        if dimension % pq_m:
+            raise ValueError(f"pq_m ({pq_m}) must divide the vector dimension ({dimension})")
+        return f'IVF{nlist},PQ{pq_m}x{pq_bits}np'
+    if index_type == 'hnsw':
+        return f'HNSW{hnsw_m},Flat'
+    raise ValueError(f"Invalid index_type: {index_type}, must be one of {INDEX_TYPES}")
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """
+    Get the INDEX_TYPES name of a FAISS index.
+
+    Args:
+        index (faiss.Index): The index.
+
+    Returns:
+        str: The index type, or the FAISS class name for indexes not built by this module.
+    """
+    for index_class, name in ((faiss.IndexFlat, 'flat'), (faiss.IndexIVFFlat, 'ivf_flat'),
+                              (faiss.IndexIVFScalarQuantizer, 'ivf_sq8'), (faiss.IndexIVFPQ, 'ivf_pq'),
+                              (faiss.IndexHNSW, 'hnsw')):
+        if isinstance(index, index_class):
+            return name
+    return type(index).__name__
+
+
+def configure_search(index: faiss.Index, nprobe: int | None = None, ef_search: int | None = None) -> None:
+    """
+    Set the search settings of an index, trading recall for latency.
+
+    Settings that do not apply to the index are ignored, so one configuration can be used
+    for several vectorstores with different index types.
+
+    Args:
+        index (faiss.Index): The index.
+        nprobe (int | None): The number of IVF lists searched per query. Defaults to unchanged.
+        ef_search (int | None): The size of the HNSW candidate list per query. Defaults to unchanged.
+
+    Returns:
+        None
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    if isinstance(index, faiss.IndexHNSW) and ef_search is not None:
+        index.hnsw.efSearch = ef_search
+
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """
+    Get search parameters that restrict a search to the vectors accepted by a selector, keeping
+    the index's own search settings.
+
+    Args:
+        index (faiss.Index): The index to search.
+        selector (faiss.IDSelector): The selector of the vector positions to search.
+
+    Returns:
+        faiss.SearchParameters: The parameters to pass to ``index.search``.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def describe_index(index: faiss.Index) -> Dict[str, Any]:
+    """
+    Summarize an index and its search settings.
+
+    Args:
+        index (faiss.Index): The index.
+
+    Returns:
+        Dict[str, Any]: The index type, number of vectors and dimension, and nlist and nprobe for IVF
+            indexes or ef_search for HNSW indexes.
+    """
+    description: Dict[str, Any] = {'index_type': index_type_of(index), 'vectors': index.ntotal, 'dimension': index.d}
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        description.update(nlist=ivf.nlist, nprobe=ivf.nprobe)
+    if isinstance(index, faiss.IndexHNSW):
+        description['ef_search'] = index.hnsw.efSearch
+    return description
+
+
+def _reconstruct(index: faiss.Index, positions: np.ndarray) -> np.ndarray:
+    """Get stored vectors by position; quantized indexes return their approximations."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and ivf.direct_map.no():
+        ivf.make_direct_map()
+    return index.reconstruct_batch(positions.astype(np.int64))
+
+
+def _add_blocks(source: faiss.Index, target: faiss.Index, positions: np.ndarray) -> None:
+    """Copy the vectors at positions from one index to another, in order."""
+    for start in range(0, len(positions), _BLOCK_SIZE):
+        target.add(_reconstruct(source, positions[start:start + _BLOCK_SIZE]))
+
+
+def reindex_vectorstore(
+    store: FAISS,
+    index_type: str,
+    nlist: int | None = None,
+    nprobe: int | None = None,
+    pq_m: int | None = None,
+    pq_bits: int = 8,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+    ef_search: int | None = None,
+    train_size: int | None = None,
+    seed: int = 0,
+) -> FAISS:
+    """
+    Move the vectors of a FAISS vectorstore into a new index of another type, keeping the
+    documents and their positions. The vectors are not embedded again.
+
+    IVF indexes are trained on a random sample of the stored vectors. Converting from a
+    quantized index uses its approximate vectors, so convert from a flat index when possible.
+
+    Args:
+        store (FAISS): The vectorstore, changed in place.
+        index_type (str): One of INDEX_TYPES.
+        nlist (int | None): The number of IVF lists. Defaults to default_nlist of the number of vectors.
+        nprobe (int | None): The number of IVF lists searched per query. Defaults to nlist / 16.
+        pq_m (int | None): The number of PQ sub-quantizers. Defaults to default_pq_m of the dimension.
+        pq_bits (int): The bits per PQ code. Defaults to 8.
+        hnsw_m (int): The number of HNSW neighbors per node. Defaults to 32.
+        ef_construction (int): The HNSW candidate list size while building. Defaults to 200.
+        ef_search (int | None): The HNSW candidate list size per query. Defaults to 64.
+        train_size (int | None): The number of vectors to train on. Defaults to 256 per IVF list or PQ
+            centroid, as FAISS uses no more than that.
+        seed (int): The seed of the training sample. Defaults to 0.
+
+    Returns:
+        FAISS: The vectorstore.
+
+    Raises:
+        ValueError: If index_type is invalid, or there are fewer vectors than centroids to train.
+    """
+    source = store.index
+    vectors = source.ntotal
+    nlist = nlist or default_nlist(vectors)
+    target = faiss.index_factory(source.d, index_factory_string(index_type, source.d, vectors, nlist, pq_m, pq_bits, hnsw_m),
+                                 source.metric_type)
+    if isinstance(target, faiss.IndexHNSW):
+        target.hnsw.efConstruction = ef_construction
+    if not target.is_trained:
+        centroids = max(nlist, 2 ** pq_bits if index_type == 'ivf_pq' else 0)
+        if vectors < centroids:
+            raise ValueError(f"{index_type} needs at least {centroids} vectors to train, the vectorstore has {vectors}")
+        sample_size = min(vectors, train_size or 256 * centroids)
+        sample = np.sort(np.random.default_rng(seed).choice(vectors, sample_size, replace=False))
+        target.train(_reconstruct(source, sample))
+    _add_blocks(source, target, np.arange(vectors))
+    if faiss.try_extract_index_ivf(target) is not None:
+        # Keeps vectors reconstructable by position, for maximal marginal relevance search
+        faiss.extract_index_ivf(target).make_direct_map()
+    configure_search(target, nprobe=nprobe or max(1, nlist // 16), ef_search=ef_search or 64)
+    store.index = target
+    return store
+
+
+def delete_vectors(store: FAISS, ids: Iterable[str]) -> None:
+    """
+    Delete documents and their vectors from a FAISS vectorstore of any index type.
+
+    ``FAISS.delete`` numbers the remaining vectors as if the index moved them up, which
+    only flat indexes do, and HNSW indexes cannot remove vectors at all. Other indexes are
+    therefore rebuilt with the remaining vectors, keeping their training and settings.
+
+    Args:
+        store (FAISS): The vectorstore, changed in place.
+        ids (Iterable[str]): The docstore IDs of the documents.
+
+    Returns:
+        None
+    """
+    ids = set(ids)
+    if not ids:
+        return
+    if isinstance(store.index, faiss.IndexFlat):
+        store.delete(list(ids))
+        return
+    positions = sorted(store.index_to_docstore_id)
+    keep = np.array([position for position in positions if store.index_to_docstore_id[position] not in ids], dtype=np.int64)
+    target = faiss.clone_index(store.index)
+    target.reset()
+    _add_blocks(store.index, target, keep)
+    store.docstore.delete(list(ids.intersection(store.index_to_docstore_id.values())))
+    store.index_to_docstore_id = {new: store.index_to_docstore_id[int(old)] for new, old in enumerate(keep)}
+    store.index = target
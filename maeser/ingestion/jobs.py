@@ -0,0 +1,417 @@
+"""
+Module for running ingestion jobs in the background, each in its own working directory.
+
+A job is a sequence of stages, such as extracting the text of PDFs, chunking and
+embedding, run one after the other in a directory created for the job, so concurrent
+uploads never share their source or output files. Jobs wait in a queue for one of a fixed
+number of workers. A running job can be cancelled, and a failed or cancelled job can be
+retried from the stage where it stopped.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+
+JOB_STATES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+
+# A stage is a command run in the job's directory, or a function called with the job
+Stage = Tuple[str, Sequence[str] | Callable[['IngestionJob'], None]]
+
+
+class IngestionJob:
+    """
+    State of one ingestion job. Jobs are created and updated by an IngestionJobQueue.
+    """
+
+    def __init__(self, job_id: str, name: str, workdir: str, stages: List[str]) -> None:
+        """
+        Initializes the IngestionJob.
+
+        Args:
+            job_id (str): The job ID.
+            name (str): The name of the dataset the job builds.
+            workdir (str): The job's working directory.
+            stages (List[str]): The names of the job's stages, in order.
+        """
+        self.id: str = job_id
+        self.name: str = name
+        self.workdir: str = workdir
+        self.stages: List[str] = stages
+        self.state: str = 'queued'
+        self.next_stage: int = 0
+        self.attempts: int = 0
+        self.error: str | None = None
+        self.created: float = time.time()
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.stage_seconds: Dict[str, float] = {}
+        self.cancel_requested: bool = False
+        self._process: subprocess.Popen | None = None
+        self._run_id: int = 0
+
+    @property
+    def source_dir(self) -> str:
+        """The directory to save the job's uploaded files in."""
+        return path.join(self.workdir, 'source')
+
+    @property
+    def log_path(self) -> str:
+        """The file that receives the output of every stage."""
+        return path.join(self.workdir, 'job.log')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the job for a status response.
+
+        Returns:
+            Dict[str, Any]: The job's ID, name, state, current or failed stage, completed stages, number of
+                attempts, error, timestamps and the seconds taken by each stage.
+        """
+        return {
+            'id': self.id,
+            'name': self.name,
+            'state': self.state,
+            'stage': self.stages[self.next_stage] if self.next_stage < len(self.stages) else None,
+            'stages': list(self.stages),
+            'completed_stages': self.next_stage,
+            'attempts': self.attempts,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'stage_seconds': dict(self.stage_seconds),
+        }
+
+
+def replace_directory(source: str, target: str) -> None:
+    """
+    Move a directory to a target path, replacing any directory already there.
+
+    Args:
+        source (str): The directory to move.
+        target (str): The path to move it to.
+
+    Returns:
+        None
+    """
+    os.makedirs(path.dirname(path.abspath(target)), exist_ok=True)
+    previous = None
+    if path.exists(target):
+        previous = f'{target}.old-{uuid.uuid4().hex[:8]}'
+        os.replace(target, previous)
+    shutil.move(source, target)
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+class IngestionJobQueue:
+    """
+    Queue of ingestion jobs run by a bounded pool of worker threads.
+
+    Each job runs its stages in order in its own directory under the queue's root. The
+    output of every stage is appended to the job's log file. A stage fails when its command
+    exits with a nonzero code or its function raises; the job then stops, keeps its
+    directory, and can be retried from that stage.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        stages: Sequence[Stage],
+        max_workers: int = 2,
+        env: Mapping[str, str] | None = None,
+        keep_succeeded: bool = False,
+        max_history: int = 100,
+    ) -> None:
+        """
+        Initializes the IngestionJobQueue.
+
+        Args:
+            root (str): The directory in which every job gets its working directory.
+            stages (Sequence[Stage]): The (name, stage) pairs run for every job, in order. A stage is a command,
+                run with the job's working directory as its current directory, or a function called with the job.
+            max_workers (int): Most jobs run at the same time. Defaults to 2.
+            env (Mapping[str, str] | None): Environment of the stage commands. Defaults to None (this process's).
+            keep_succeeded (bool): Keep the working directories of succeeded jobs. Defaults to False.
+            max_history (int): Most finished jobs remembered; the directories of older ones are deleted.
+                Defaults to 100.
+
+        Raises:
+            ValueError: If there are no stages or max_workers is less than 1.
+        """
+        if not stages:
+            raise ValueError("An ingestion job needs at least one stage")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.root: str = root
+        self.stages: List[Stage] = list(stages)
+        self.env: Dict[str, str] | None = dict(env) if env is not None else None
+        self.keep_succeeded: bool = keep_succeeded
+        self.max_history: int = max_history
+        self._jobs: 'OrderedDict[str, IngestionJob]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='maeser-ingestion')
+        os.makedirs(root, exist_ok=True)
+
+    def create(self, name: str | None = None) -> IngestionJob:
+        """
+        Create a job and its working directory. Save the job's files in its source_dir, then start it.
+
+        Only one unfinished job may build a dataset at a time, so two jobs never publish the same dataset.
+
+        Args:
+            name (str | None): The name of the dataset the job builds. Defaults to the job ID.
+
+        Returns:
+            IngestionJob: The job, not yet queued.
+
+        Raises:
+            ValueError: If an unfinished job already builds a dataset with this name.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        job = IngestionJob(job_id, name or job_id, path.join(self.root, job_id), [name for name, _ in self.stages])
+        with self._lock:
+            self._check_name_is_free(job)
+            os.makedirs(job.source_dir)
+            self._jobs[job_id] = job
+            self._forget_old_jobs()
+        return job
+
+    def get(self, job_id: str) -> IngestionJob:
+        """
+        Get a job by ID.
+
+        Args:
+            job_id (str): The job ID.
+
+        Returns:
+            IngestionJob: The job.
+
+        Raises:
+            KeyError: If there is no such job.
+        """
+        with self._lock:
+            return self._jobs[job_id]
+
+    def jobs(self) -> List[IngestionJob]:
+        """
+        List the jobs, oldest first.
+
+        Returns:
+            List[IngestionJob]: The queued, running and remembered finished jobs.
+        """
+        with self._lock:
+            return list(self._jobs.values())
+
+    def start(self, job_id: str) -> IngestionJob:
+        """
+        Queue a created job.
+
+        Args:
+            job_id (str): The job ID.
+
+        Returns:
+            IngestionJob: The job.
+
+        Raises:
+            KeyError: If there is no such job.
+            ValueError: If the job was already started.
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            if job._run_id:
+                raise ValueError(f"Job {job_id} was already started")
+            return self._submit(job)
+
+    def retry(self, job_id: str) -> IngestionJob:
+        """
+        Queue a failed or cancelled job again, resuming at the stage where it stopped.
+
+        Args:
+            job_id (str): The job ID.
+
+        Returns:
+            IngestionJob: The job.
+
+        Raises:
+            KeyError: If there is no such job.
+            ValueError: If the job did not fail and was not cancelled, or another unfinished job builds its dataset.
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.state not in ('failed', 'cancelled'):
+                raise ValueError(f"Job {job_id} is {job.state}, only failed or cancelled jobs can be retried")
+            self._check_name_is_free(job)
+            job.state, job.error, job.finished, job.cancel_requested = 'queued', None, None, False
+            self._jobs.move_to_end(job_id)
+            return self._submit(job)
+
+    def cancel(self, job_id: str) -> IngestionJob:
+        """
+        Cancel a queued or running job. A running stage command is terminated.
+
+        Args:
+            job_id (str): The job ID.
+
+        Returns:
+            IngestionJob: The job; a running job is marked cancelled once its stage has stopped.
+
+        Raises:
+            KeyError: If there is no such job.
+            ValueError: If the job already finished.
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.state in FINISHED_STATES:
+                raise ValueError(f"Job {job_id} already {job.state}")
+            job.cancel_requested = True
+            if job.state == 'queued':
+                job.state, job.finished = 'cancelled', time.time()
+            process = job._process
+        if process is not None and process.poll() is None:
+            # Stage commands start their own process group, so their worker processes are stopped too
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                process.terminate()
+        return job
+
+    def progress(self, job_id: str, lines: int = 20) -> Dict[str, Any]:
+        """
+        Get the progress of a job.
+
+        Args:
+            job_id (str): The job ID.
+            lines (int): Number of log lines to include. Defaults to 20.
+
+        Returns:
+            Dict[str, Any]: The job summary, the percentage of completed stages and the last lines of its log.
+
+        Raises:
+            KeyError: If there is no such job.
+        """
+        job = self.get(job_id)
+        log_tail: List[str] = []
+        if path.exists(job.log_path):
+            with open(job.log_path, 'rb') as file:
+                file.seek(max(path.getsize(job.log_path) - 64 * 1024, 0))
+                log_tail = file.read().decode('utf-8', errors='replace').splitlines()[-lines:] if lines > 0 else []
+        with self._lock:
+            summary = job.to_dict()
+        summary['percent'] = round(100 * job.next_stage / len(job.stages))
+        summary['log_tail'] = log_tail
+        return summary
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting jobs and, if wait is True, wait for the queued and running ones.
+
+        Args:
+            wait (bool): Whether to wait for the jobs. Defaults to True.
+
+        Returns:
+            None
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _check_name_is_free(self, job: IngestionJob) -> None:
+        """Raise ValueError if another unfinished job builds the job's dataset. The lock must be held."""
+        for other in self._jobs.values():
+            if other is not job and other.name == job.name and other.state not in FINISHED_STATES:
+                raise ValueError(f"Dataset {job.name} is already being processed by job {other.id}")
+
+    def _submit(self, job: IngestionJob) -> IngestionJob:
+        """Queue a job. The lock must be held."""
+        job._run_id += 1
+        self._executor.submit(self._run, job, job._run_id)
+        return job
+
+    def _forget_old_jobs(self) -> None:
+        """Drop the oldest finished jobs beyond max_history, with their directories. The lock must be held."""
+        finished = [job for job in self._jobs.values() if job.state in FINISHED_STATES]
+        for job in finished[:max(len(finished) - self.max_history, 0)]:
+            del self._jobs[job.id]
+            shutil.rmtree(job.workdir, ignore_errors=True)
+
+    def _finish(self, job: IngestionJob, state: str, error: str | None = None) -> None:
+        """Record the end of a run. The lock must be held."""
+        job.state, job.error, job.finished, job._process = state, error, time.time(), None
+
+    def _run(self, job: IngestionJob, run_id: int) -> None:
+        """Run a job's remaining stages in a worker thread."""
+        with self._lock:
+            # Skip runs of jobs cancelled while queued, or superseded by a retry
+            if job._run_id != run_id or job.state != 'queued':
+                return
+            job.state, job.attempts = 'running', job.attempts + 1
+            job.started = job.started or time.time()
+
+        with open(job.log_path, 'a', encoding='utf-8') as log:
+            while job.next_stage < len(self.stages):
+                with self._lock:
+                    if job.cancel_requested:
+                        self._finish(job, 'cancelled')
+                        return
+                name, stage = self.stages[job.next_stage]
+                log.write(f'==> {name} (attempt {job.attempts})\n')
+                log.flush()
+                start = time.perf_counter()
+                error = None
+                try:
+                    if callable(stage):
+                        stage(job)
+                    else:
+                        with self._lock:
+                            if not job.cancel_requested:
+                                job._process = subprocess.Popen(
+                                    list(stage), cwd=job.workdir, env=self.env, stdout=log, stderr=subprocess.STDOUT,
+                                    start_new_session=hasattr(os, 'killpg'),
+                                )
+                        if job._process is not None:
+                            returncode = job._process.wait()
+                            if returncode:
+                                error = f"Stage '{name}' exited with code {returncode}"
+                except Exception as e:
+                    error = f"Stage '{name}' failed: {e}"
+                    log.write(f'{error}\n')
+                job.stage_seconds[name] = round(job.stage_seconds.get(name, 0) + time.perf_counter() - start, 2)
+
+                with self._lock:
+                    job._process = None
+                    if job.cancel_requested:
+                        self._finish(job, 'cancelled')
+                        return
+                    if error is not None:
+                        self._finish(job, 'failed', error)
+                        return
+                    job.next_stage += 1
+
+        # Remove the directory before reporting success, so a finished job has no leftover files
+        if not self.keep_succeeded:
+            shutil.rmtree(job.workdir, ignore_errors=True)
+        with self._lock:
+            self._finish(job, 'succeeded')
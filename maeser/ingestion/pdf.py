@@ -0,0 +1,167 @@
+"""
+Module for extracting text from a directory of PDFs across a process pool.
+
+Each PDF is converted with ``pdftotext`` into one text file whose pages are separated by
+form feeds, as ``pdftotext`` writes them, so page numbers survive into chunk metadata.
+Completed files are recorded in a state file as they finish, so an interrupted run
+resumes where it stopped instead of starting over.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import re
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os import path
+from typing import Callable, Dict, List, Tuple
+from maeser.ingestion.files import PAGE_BREAK, file_hash, split_pages
+
+STATE_FILE = ".extraction_state.json"
+"""The name of the state file kept in the output directory."""
+
+
+def pdf_to_pages(pdf_path: str) -> List[str]:
+    """
+    Extract the text of every page of a PDF with ``pdftotext``.
+
+    Args:
+        pdf_path (str): The PDF file.
+
+    Returns:
+        List[str]: The text of each page, in order.
+    """
+    result = subprocess.run(
+        ["pdftotext", "-enc", "UTF-8", pdf_path, "-"], capture_output=True, check=True)
+    return split_pages(result.stdout.decode("utf-8", errors="replace"))
+
+
+def output_name(pdf_name: str) -> str:
+    """
+    Get the text file name for a PDF, with whitespace replaced so the name is safe in shell scripts.
+
+    Args:
+        pdf_name (str): The file name of the PDF.
+
+    Returns:
+        str: The file name of the extracted text.
+    """
+    return re.sub(r"\s+", "_", path.splitext(pdf_name)[0]) + ".txt"
+
+
+def _extract_one(pdf_path: str, text_path: str, extract: Callable[[str], List[str]]) -> Tuple[int, int]:
+    """Extract one PDF into a text file, written atomically. Runs in a worker process."""
+    pages = extract(pdf_path)
+    temporary_path = f"{text_path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as file:
+        file.write(PAGE_BREAK.join(pages))
+    os.replace(temporary_path, text_path)
+    return len(pages), path.getsize(pdf_path)
+
+
+def _save_state(state_path: str, state: Dict[str, dict]) -> None:
+    """Save the extraction state atomically."""
+    temporary_path = f"{state_path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    os.replace(temporary_path, state_path)
+
+
+def extract_pdfs(
+    source_dir: str,
+    output_dir: str,
+    workers: int | None = None,
+    remove_sources: bool = False,
+    extract: Callable[[str], List[str]] = pdf_to_pages,
+    progress_every: int = 10,
+) -> Dict[str, float]:
+    """
+    Extract the text of every PDF in a directory in parallel.
+
+    PDFs whose content hash is recorded in the state file, and whose text file still exists,
+    are skipped, so a run that crashed or was stopped resumes with the remaining files.
+    A PDF that fails to convert is reported and left in place; the other files still complete.
+
+    Args:
+        source_dir (str): The directory of the PDFs.
+        output_dir (str): The directory to write one text file per PDF to.
+        workers (int | None): The number of worker processes. Defaults to the number of CPUs.
+        remove_sources (bool): Whether to delete each PDF once its text is written. Defaults to False.
+        extract (Callable[[str], List[str]]): Function returning the page texts of a PDF. It must be
+            picklable, such as a module-level function. Defaults to ``pdf_to_pages``.
+        progress_every (int): Print progress after this many files. Defaults to 10.
+
+    Returns:
+        Dict[str, float]: The numbers of extracted, skipped and failed files, the number of pages and
+            megabytes extracted, the duration in seconds, and the throughput in pages and megabytes per second.
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = path.join(output_dir, STATE_FILE)
+    state: Dict[str, dict] = {}
+    if path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as file:
+            state = json.load(file)
+
+    report = dict.fromkeys(("files", "skipped", "failed", "pages", "megabytes"), 0)
+    jobs: Dict[str, Tuple[str, str]] = {}
+    for pdf_name in sorted(os.listdir(source_dir)):
+        if not pdf_name.lower().endswith(".pdf"):
+            continue
+        pdf_path = path.join(source_dir, pdf_name)
+        text_name = output_name(pdf_name)
+        digest = file_hash(pdf_path)
+        if state.get(text_name, {}).get("sha256") == digest and path.exists(path.join(output_dir, text_name)):
+            report["skipped"] += 1
+            if remove_sources:
+                os.remove(pdf_path)
+            continue
+        jobs[pdf_path] = (text_name, digest)
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_extract_one, pdf_path, path.join(output_dir, text_name), extract): pdf_path
+                for pdf_path, (text_name, _) in jobs.items()
+            }
+            for future in as_completed(futures):
+                pdf_path = futures[future]
+                text_name, digest = jobs[pdf_path]
+                try:
+                    pages, size = future.result()
+                except Exception as e:
+                    report["failed"] += 1
+                    print(f"\x1b[33mWarning: Could not extract text from {pdf_path}: {e}\x1b[0m")
+                    continue
+                state[text_name] = {"sha256": digest, "pages": pages}
+                _save_state(state_path, state)
+                if remove_sources:
+                    os.remove(pdf_path)
+                report["files"] += 1
+                report["pages"] += pages
+                report["megabytes"] += size / 1e6
+                if report["files"] % progress_every == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"Extracted {report['files']}/{len(jobs)} files ({report['pages'] / elapsed:.1f} pages/s)")
+
+    seconds = time.perf_counter() - start
+    report["megabytes"] = round(report["megabytes"], 3)
+    report["seconds"] = round(seconds, 3)
+    report["pages_per_second"] = round(report["pages"] / seconds, 1) if seconds else 0.0
+    report["megabytes_per_second"] = round(report["megabytes"] / seconds, 3) if seconds else 0.0
+    return report
@@ -0,0 +1,375 @@
+"""
+Module for in-process performance metrics, exportable in the Prometheus text format.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+"""Default histogram buckets for durations, in seconds."""
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+"""Default histogram buckets for token counts."""
+COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+"""Default histogram buckets for small counts, such as retrieved documents."""
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = '') -> str:
+    """Format label pairs as ``{name="value",...}``, or an empty string when there are none."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value, dropping the decimal point of whole numbers."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """
+    Base class of metrics with one series per combination of label values.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """Get the series key of a set of label values."""
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def value(self, **labels: str) -> float:
+        """
+        Get the current value of a series.
+
+        Args:
+            **labels (str): The value of every label of the metric.
+
+        Returns:
+            float: The value, or 0 if nothing was recorded for these labels.
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        """
+        Render the metric in the Prometheus text format.
+
+        Returns:
+            List[str]: The lines of the exposition.
+        """
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    """
+    Value that only goes up, such as a number of requests.
+    """
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            amount (float): The amount to add. Defaults to 1.
+            **labels (str): The value of every label of the metric.
+
+        Returns:
+            None
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """
+    Value that goes up and down, such as a number of requests in progress.
+    """
+
+    kind = 'gauge'
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increase the gauge.
+
+        Args:
+            amount (float): The amount to add. Defaults to 1.
+            **labels (str): The value of every label of the metric.
+
+        Returns:
+            None
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """
+        Decrease the gauge.
+
+        Args:
+            amount (float): The amount to subtract. Defaults to 1.
+            **labels (str): The value of every label of the metric.
+
+        Returns:
+            None
+        """
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Set the gauge.
+
+        Args:
+            value (float): The new value.
+            **labels (str): The value of every label of the metric.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track_in_progress(self, **labels: str) -> Iterator[None]:
+        """
+        Increase the gauge for the duration of a ``with`` block.
+
+        Args:
+            **labels (str): The value of every label of the metric.
+        """
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram:
+    """
+    Cumulative histogram of observed values, with one series per combination of label values.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS, label_names: Sequence[str] = ()) -> None:
+        """
+        Initializes the Histogram.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The help text of the metric.
+            buckets (Sequence[float]): The upper bounds of the buckets, in increasing order. Defaults to LATENCY_BUCKETS.
+            label_names (Sequence[str]): The names of the labels of the metric. Defaults to no labels.
+        """
+        self.name: str = name
+        self.documentation: str = documentation
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record a value.
+
+        Args:
+            value (float): The observed value.
+            **labels (str): The value of every label of the metric.
+
+        Returns:
+            None
+        """
+        key = tuple(str(labels[name]) for name in self.label_names)
+        # One count per bucket plus the +Inf bucket
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[position] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Record the wall time of a ``with`` block.
+
+        Args:
+            **labels (str): The value of every label of the metric.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels: str) -> Dict[str, float]:
+        """
+        Get the number and sum of the values recorded for one combination of label values.
+
+        Args:
+            **labels (str): The value of every label of the metric.
+
+        Returns:
+            Dict[str, float]: The 'count' and 'sum' of the recorded values.
+        """
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            counts, total = self._series.get(key, ([0], [0.0]))
+            return {'count': sum(counts), 'sum': total[0]}
+
+    def render(self) -> List[str]:
+        """
+        Render the histogram in the Prometheus text format.
+
+        Returns:
+            List[str]: The lines of the exposition.
+        """
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + [float('inf')], counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                labels = _format_labels(self.label_names, key, 'le="' + le + '"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of the metrics of a process.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes the MetricsRegistry.
+        """
+        self._metrics: Dict[str, _Metric | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_type: type, name: str, *args) -> _Metric | Histogram:
+        """Get a registered metric, creating it on first use."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = metric_type(name, *args)
+            metric = self._metrics[name]
+        if not isinstance(metric, metric_type):
+            raise ValueError(f"Metric {name} is already registered as a {type(metric).__name__}")
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        """
+        Get a counter, creating it on first use.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The help text of the metric.
+            label_names (Sequence[str]): The names of the labels of the metric. Defaults to no labels.
+
+        Returns:
+            Counter: The counter registered under name.
+        """
+        return self._get_or_create(Counter, name, documentation, label_names)  # type: ignore
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        """
+        Get a gauge, creating it on first use.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The help text of the metric.
+            label_names (Sequence[str]): The names of the labels of the metric. Defaults to no labels.
+
+        Returns:
+            Gauge: The gauge registered under name.
+        """
+        return self._get_or_create(Gauge, name, documentation, label_names)  # type: ignore
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS, label_names: Sequence[str] = ()) -> Histogram:
+        """
+        Get a histogram, creating it on first use.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The help text of the metric.
+            buckets (Sequence[float]): The upper bounds of the buckets. Defaults to LATENCY_BUCKETS.
+            label_names (Sequence[str]): The names of the labels of the metric. Defaults to no labels.
+
+        Returns:
+            Histogram: The histogram registered under name.
+        """
+        return self._get_or_create(Histogram, name, documentation, buckets, label_names)  # type: ignore
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+"""The default registry used by Maeser."""
+
+CACHE_REQUESTS = REGISTRY.counter(
+    'maeser_cache_requests_total', 'Cache lookups by cache and result (hit or miss).', ('cache', 'result'))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Count a cache lookup, for the cache hit rate metrics.
+
+    Args:
+        cache (str): The name of the cache.
+        hit (bool): Whether the lookup was a hit.
+
+    Returns:
+        None
+    """
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
@@ -21,8 +21,6 @@ You should have received a copy of the GNU Lesser General Public License along w
 Maeser. If not, see <https://www.gnu.org/licenses/>.
 """
 
-import markdown
-
 def get_response_html(response: str) -> str:
     """
     Convert a markdown response to HTML.
@@ -33,6 +31,8 @@ def get_response_html(response: str) -> str:
     Returns:
         str: The HTML response.
     """
+    import markdown
+
     text = response
     html_content = markdown.markdown(text, extensions=['pymdownx.superfences', 'tables', 'smarty', 'sane_lists'])
     # Add target="_blank" attribute to anchor tags
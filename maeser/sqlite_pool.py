@@ -0,0 +1,150 @@
+"""
+Module for a small thread-safe pool of SQLite connections.
+
+A single ``sqlite3.Connection`` shared between threads serializes every query and mixes
+the transactions of unrelated requests. The pool instead lends each thread its own
+connection for the duration of one operation, with WAL journaling so readers never wait
+for writers.
+
+© 2026 Maeser Contributors
+
+This file is part of Maeser.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+class SQLitePool:
+    """
+    Bounded pool of SQLite connections to one database file.
+
+    Connections are created on demand up to ``max_connections``. When all of them are in use,
+    callers wait for one to be returned. A connection is only used by one thread at a time.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_connections: int = 8,
+        busy_timeout_seconds: float = 30.0,
+        pragmas: Dict[str, str] | None = None,
+        cached_statements: int = 128,
+    ) -> None:
+        """
+        Initializes the SQLitePool.
+
+        Args:
+            db_path (str): Path of the SQLite database file.
+            max_connections (int): Maximum number of open connections. Defaults to 8.
+            busy_timeout_seconds (float): How long a connection waits for another writer to finish, and how long
+                callers wait for a free connection. Defaults to 30 seconds.
+            pragmas (Dict[str, str] | None): PRAGMA statements run on every new connection. Defaults to None
+                (WAL journaling with synchronous=NORMAL, which is durable across application crashes).
+            cached_statements (int): Number of prepared statements cached per connection. Defaults to 128.
+
+        Raises:
+            ValueError: If max_connections is less than 1.
+        """
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+        self.db_path: str = db_path
+        self.max_connections: int = max_connections
+        self.busy_timeout_seconds: float = busy_timeout_seconds
+        self.pragmas: Dict[str, str] = pragmas if pragmas is not None else {'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+        self.cached_statements: int = cached_statements
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        """Open and configure a new connection."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_seconds,
+            check_same_thread=False,  # connections move between threads, but are never shared
+            cached_statements=self.cached_statements,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name}={value}')
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, open a new one, or wait for one to be returned."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+            if len(self._connections) < self.max_connections:
+                conn = self._open()
+                self._connections.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=self.busy_timeout_seconds)
+        except queue.Empty:
+            raise TimeoutError(f"No free connection to {self.db_path} after {self.busy_timeout_seconds} seconds")
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, discarding any uncommitted transaction."""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if self._closed:
+                conn.close()
+                return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection for the duration of a ``with`` block.
+
+        Uncommitted changes are rolled back when the connection is returned.
+
+        Yields:
+            sqlite3.Connection: A connection used only by the calling thread until the block exits.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @property
+    def size(self) -> int:
+        """Number of connections currently open."""
+        return len(self._connections)
+
+    def close(self) -> None:
+        """
+        Close every idle connection. Connections in use are closed when they are returned.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._closed = True
+            self._connections.clear()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -21,17 +21,27 @@ Maeser. If not, see <https://www.gnu.org/licenses/>.
 """
 
 
+import copy
+import functools
 import secrets
 import sqlite3
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Tuple, Union
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, ContextManager, Iterator, Tuple, Union
 from urllib.parse import urlencode
 import os
 import ssl
-from ldap3 import Server, Connection, ALL, SUBTREE, Tls
-from ldap3.core.exceptions import LDAPException, LDAPAttributeError, LDAPBindError, LDAPSocketReceiveError
 
-import requests
+from maeser.metrics import LATENCY_BUCKETS, REGISTRY, record_cache_lookup
+from maeser.sqlite_pool import SQLitePool
+
+# ldap3 and requests are imported by the authenticators that use them, so that
+# importing the user manager stays fast
+if TYPE_CHECKING:
+    from ldap3 import Server
 
 
 class User:
@@ -281,6 +291,8 @@ class GithubAuthenticator(BaseAuthenticator):
             print(request_args['state'], oauth_state, 'ERROR') 
             return None
 
+        import requests
+
         token_url = 'https://github.com/login/oauth/access_token'
         user_info_url = 'https://api.github.com/user'
 
@@ -326,6 +338,8 @@ class GithubAuthenticator(BaseAuthenticator):
         Returns:
             User or None: The fetched user object or None if the user is not found.
         """
+        import requests
+
         user_info_url = f'https://api.github.com/users/{ident}'
         response = requests.get(user_info_url)
         if response.status_code == 200:
@@ -400,7 +414,7 @@ class LDAPAuthenticator(BaseAuthenticator):
         return self._login_style
     
     @property
-    def next_ldap_server(self)-> Union[Server, None]:
+    def next_ldap_server(self)-> Union['Server', None]:
         """Return the next available LDAP server in a round-robin fashion."""
         if len(self.ldap_usable_servers) == 0:
             print("NO REACHABLE LDAP SERVER!")
@@ -409,13 +423,16 @@ class LDAPAuthenticator(BaseAuthenticator):
         self._next_server_index = (self._next_server_index + 1) % len(self.ldap_usable_servers)
         return server_to_use
 
-    def _initialize_ldap_servers(self) -> list[Server]:
+    def _initialize_ldap_servers(self) -> list['Server']:
         """
         Initialize LDAP server instances with retrieved certificates.
 
         Returns:
             list: A list of initialized LDAP Server objects.
         """
+        from ldap3 import Server, ALL, Tls
+        from ldap3.core.exceptions import LDAPException
+
         servers: list[Server] = []
         for server_url in self.ldap_server_urls:
             try:
@@ -437,6 +454,9 @@ class LDAPAuthenticator(BaseAuthenticator):
         Returns:
             list: A list of LDAP servers that are usable.
         """
+        from ldap3 import Connection
+        from ldap3.core.exceptions import LDAPException, LDAPAttributeError, LDAPBindError, LDAPSocketReceiveError
+
         usable_servers = []
         for ldap_server in self.ldap_servers:
             try:
@@ -449,6 +469,9 @@ class LDAPAuthenticator(BaseAuthenticator):
         return usable_servers
 
     def authenticate(self, ident: str, password: str) -> Union[tuple, None]:
+        from ldap3 import Connection, SUBTREE
+        from ldap3.core.exceptions import LDAPException, LDAPAttributeError, LDAPBindError, LDAPSocketReceiveError
+
         if self.next_ldap_server is None:
             return None
         try:
@@ -498,6 +521,9 @@ class LDAPAuthenticator(BaseAuthenticator):
         Returns:
             Union[User, None]: The User object if found, None otherwise.
         """
+        from ldap3 import Connection, SUBTREE
+        from ldap3.core.exceptions import LDAPException, LDAPAttributeError, LDAPBindError, LDAPSocketReceiveError
+
         if self.next_ldap_server is None:
             return None
         try:
@@ -529,25 +555,75 @@ class LDAPAuthenticator(BaseAuthenticator):
         return None
 
 
+USER_DB_SECONDS = REGISTRY.histogram(
+    'maeser_user_db_seconds', 'Time spent on user database operations.', LATENCY_BUCKETS, ('operation',))
+
+
+def _timed_db_operation(method):
+    """Record the latency of a UserManager database operation."""
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        with USER_DB_SECONDS.time(operation=method.__name__.lstrip('_')):
+            return method(*args, **kwargs)
+    return timed
+
+
 class UserManager:
     """
     Manages user operations including authentication, database interactions, and request tracking.
     """
 
-    def __init__(self, db_file_path: str, max_requests: int = 10, rate_limit_interval: int = 180):
+    def __init__(
+        self,
+        db_file_path: str,
+        max_requests: int = 10,
+        rate_limit_interval: int = 180,
+        max_connections: int = 8,
+        user_cache_ttl: float = 10.0,
+        user_cache_size: int = 4096,
+    ):
         """
         Initialize the UserManager.
 
         Args:
             db_file_path (str): The file path to the SQLite database.
             max_requests (int, optional): The maximum number of requests a user can have. Defaults to 10.
+            max_connections (int, optional): The maximum number of open database connections, shared by all
+                request threads. Defaults to 8.
+            user_cache_ttl (float, optional): Seconds that get_user answers from memory after reading a user,
+                such as for the user loader of every authenticated request. Changes made through this
+                UserManager clear the cached user at once; changes made by another process are seen after at
+                most this long. 0 disables the cache. Defaults to 10 seconds.
+            user_cache_size (int, optional): The maximum number of cached users. Defaults to 4096.
         """
         self.db_file_path = db_file_path
         self.authenticators: dict[str, BaseAuthenticator] = {}
         self.max_requests = max_requests
         self.rate_limit_interval = rate_limit_interval
+        self.user_cache_ttl = user_cache_ttl
+        self.user_cache_size = user_cache_size
+        self._user_cache: OrderedDict[Tuple[str, str], Tuple[float, Union[User, None]]] = OrderedDict()
+        self._user_cache_lock = threading.Lock()
+        # Incremented by every invalidation, so a lookup that raced with a change does not cache stale data
+        self._user_cache_version = 0
+        self._pool: SQLitePool = self._open_pool(max_connections)
         self._create_tables()
 
+    def _open_pool(self, max_connections: int) -> SQLitePool:
+        """Open the connection pool of the database, falling back to temporary storage if it cannot be opened."""
+        if self.db_file_path != ':memory:':
+            pool = SQLitePool(self.db_file_path, max_connections=max_connections)
+            try:
+                with pool.connection():
+                    return pool
+            except sqlite3.OperationalError as e:
+                pool.close()
+                print(
+                    f"\033[31mUnable to open sqlite db file {self.db_file_path}, using tempory storage: {e}\033[0m"
+                )
+        # Every connection to ':memory:' is a separate database, so temporary storage uses a single connection
+        return SQLitePool(':memory:', max_connections=1)
+
     def register_authenticator(self, name: str, authenticator: BaseAuthenticator):
         """
         Register a new authentication method.
@@ -566,23 +642,31 @@ class UserManager:
             self._create_table(db, name)
 
     @property
-    def db_connection(self) -> sqlite3.Connection:
+    def db_connection(self) -> ContextManager[sqlite3.Connection]:
         """
-        Open a connection to the SQLite database.
+        Borrow a connection to the SQLite database for a ``with`` block.
+
+        Connections are kept open in a pool and reused, with WAL journaling so that reads
+        do not wait for writes, and with their prepared statements cached. The block's
+        changes are committed when it exits normally and rolled back if it raises.
 
         Returns:
-            sqlite3.Connection: The database connection.
+            ContextManager[sqlite3.Connection]: The database connection, used only by the calling thread
+                until the block exits.
+        """
+        return self._transaction()
 
-        Raises:
-            sqlite3.OperationalError: If the database cannot be opened.
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._pool.connection() as db:
+            with db:
+                yield db
+
+    def close(self):
         """
-        try:
-            return sqlite3.connect(self.db_file_path)
-        except sqlite3.OperationalError as e:
-            print(
-                f"\033[31mUnable to open sqlite db file {self.db_file_path}, using tempory storage: {e}\033[0m"
-            )
-            return sqlite3.connect(":memory:")
+        Close the database connections.
+        """
+        self._pool.close()
 
     def _create_tables(self):
         with self.db_connection as db:
@@ -609,9 +693,22 @@ class UserManager:
     def check_user_auth(self, auth_method: str) -> bool:
         return auth_method in self.authenticators
 
+    def _invalidate_user(self, auth_method: str, ident: str):
+        """Forget the cached copy of a user after changing it in the database."""
+        with self._user_cache_lock:
+            self._user_cache_version += 1
+            self._user_cache.pop((auth_method, str(ident)), None)
+
+    def _invalidate_users(self):
+        """Forget every cached user after changing several users in the database."""
+        with self._user_cache_lock:
+            self._user_cache_version += 1
+            self._user_cache.clear()
+
     def get_user(self, auth_method: str, ident: str) -> Union[User, None]:
         """
-        Retrieve a user from the database.
+        Retrieve a user, from the user cache if it was read less than user_cache_ttl seconds ago,
+        otherwise from the database.
 
         Args:
             auth_method (str): The authentication method used.
@@ -625,7 +722,32 @@ class UserManager:
         """
         if not auth_method.isalnum():
             raise ValueError(f"Invalid authenticator name: {auth_method}")
+        if self.user_cache_ttl <= 0:
+            return self._get_user(auth_method, ident)
+
+        key = (auth_method, str(ident))
+        with self._user_cache_lock:
+            entry = self._user_cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._user_cache.move_to_end(key)
+                record_cache_lookup('user', True)
+                # Callers may change the returned user, so they each get their own copy
+                return copy.copy(entry[1])
+            version = self._user_cache_version
+        record_cache_lookup('user', False)
+
+        user = self._get_user(auth_method, ident)
+        with self._user_cache_lock:
+            if version == self._user_cache_version:
+                self._user_cache[key] = (time.monotonic() + self.user_cache_ttl, copy.copy(user))
+                self._user_cache.move_to_end(key)
+                while len(self._user_cache) > self.user_cache_size:
+                    self._user_cache.popitem(last=False)
+        return user
 
+    @_timed_db_operation
+    def _get_user(self, auth_method: str, ident: str) -> Union[User, None]:
+        """Read a user from the database."""
         table_name = f"{auth_method}Users"
         with self.db_connection as db:
             cursor: sqlite3.Cursor = db.execute(
@@ -633,10 +755,12 @@ class UserManager:
                 (ident,)
             )
             row = cursor.fetchone()
+            record_cache_lookup('user_db', row is not None)
             if row:
                 return User(row[0], bool(row[1]), bool(row[2]), realname=row[3], usergroup=str(row[4]), requests_left=row[5], authmethod=auth_method, max_requests=self.max_requests)
         return None
 
+    @_timed_db_operation
     def list_users(self, auth_filter: str | None = None, admin_filter: str | None = None, banned_filter: str | None = None) -> list[User]:
         """
         List all users in the database, optionally filtered by authentication method, admin status, and banned status.
@@ -719,6 +843,7 @@ class UserManager:
             return self._create_or_update_user(auth_method, user_id, display_name, user_group)
         return None
 
+    @_timed_db_operation
     def _create_or_update_user(self, auth_method: str, user_id: str, display_name: str, user_group: str) -> User:
         """
         Create or update a user in the database.
@@ -751,9 +876,11 @@ class UserManager:
                 )
                 db.commit()
                 user = User(user_id, realname=display_name, usergroup=user_group, authmethod=auth_method, max_requests=self.max_requests)
+                self._invalidate_user(auth_method, user_id)
 
         return user
 
+    @_timed_db_operation
     def update_admin_status(self, auth_method: str, ident: str, is_admin: bool):
         """
         Update the admin status of a user.
@@ -773,7 +900,9 @@ class UserManager:
         with self.db_connection as db:
             db.execute(f'UPDATE "{table_name}" SET admin=? WHERE user_id=?', (is_admin, ident))
             db.commit()
+        self._invalidate_user(auth_method, ident)
 
+    @_timed_db_operation
     def update_banned_status(self, auth_method: str, ident: str, is_banned: bool):
         """
         Update the banned status of a user.
@@ -793,7 +922,9 @@ class UserManager:
         with self.db_connection as db:
             db.execute(f'UPDATE "{table_name}" SET blacklisted=? WHERE user_id=?', (is_banned, ident))
             db.commit()
+        self._invalidate_user(auth_method, ident)
 
+    @_timed_db_operation
     def refresh_requests(self, inc_by: int = 1):
         """
         Refresh the number of requests for all users by the given amount.
@@ -809,7 +940,9 @@ class UserManager:
                     SET requests_left = MIN(?, MAX(0, requests_left + ?))
                 ''', (self.max_requests, inc_by))
             db.commit()
+        self._invalidate_users()
 
+    @_timed_db_operation
     def decrease_requests(self, auth_method: str, user_id: str, dec_by: int = 1):
         """
         Decrease the number of requests remaining for a user.
@@ -835,7 +968,9 @@ class UserManager:
                 WHERE user_id = ?
             ''', (dec_by, user_id))
             db.commit()
+        self._invalidate_user(auth_method, user_id)
 
+    @_timed_db_operation
     def increase_requests(self, auth_method: str, user_id: str, inc_by: int = 1):
         """
         Increase the number of requests remaining for a user.
@@ -860,6 +995,7 @@ class UserManager:
                 SET requests_left = MIN(?, MAX(0, requests_left + ?))
                 WHERE user_id = ?
             ''', (self.max_requests, inc_by, user_id))
+        self._invalidate_user(auth_method, user_id)
 
     def get_requests_remaining(self, auth_method: str, user_id: str) -> Union[int, None]:
         """
@@ -902,6 +1038,7 @@ class UserManager:
             return True
         return False
         
+    @_timed_db_operation
     def remove_user_from_cache(self, auth_method: str, ident: str, force_remove: bool = False) -> bool:
         """
         Remove a user from the cache.
@@ -923,8 +1060,10 @@ class UserManager:
         with self.db_connection as db:
             cursor = db.execute(f'DELETE FROM "{table_name}" WHERE user_id=?', (ident, ))
             db.commit()
-            return bool(cursor.rowcount)
+        self._invalidate_user(auth_method, ident)
+        return bool(cursor.rowcount)
         
+    @_timed_db_operation
     def list_cleanables(self):
         """
         List non-banned and non-admin users in the cache/database.
@@ -940,6 +1079,7 @@ class UserManager:
                 cleanables.extend([f'{auth_method}:{row[0]}' for row in cursor.fetchall()])
         return cleanables
 
+    @_timed_db_operation
     def clean_cache(self) -> int:
         """
         Clean the cache by removing non-banned and non-admin users.
@@ -953,4 +1093,5 @@ class UserManager:
                 table_name = f"{auth_method}Users"
                 removed = db.execute(f'DELETE FROM "{table_name}" WHERE blacklisted=0 AND admin=0').rowcount
                 removed_count += removed
+        self._invalidate_users()
         return removed_count
@@ -1,24 +1,79 @@
-from flask import Flask, render_template, request
+from flask import Flask, jsonify, render_template, request
+from werkzeug.utils import secure_filename
 import os
-import subprocess
+import shutil
+import sys
+
+from maeser.ingestion.jobs import IngestionJobQueue, replace_directory
 
 print("Current working directory:", os.getcwd())
 
 app = Flask(__name__)
-dataset_name = ""
 datasets = os.listdir('data_stores')
 
-
-# Change this to your desired path
-UPLOAD_FOLDER = 'source'
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Every upload is processed in its own directory under jobs/, so concurrent uploads never share files
+JOBS_DIR = 'jobs'
+DATA_STORE_DIR = 'data_stores'
+# Text files of each dataset, kept as its corpus when INGEST_MODE=incremental
+CORPUS_DIR = 'corpora'
 ALLOWED_EXTENSIONS = {'pdf'}
+INCREMENTAL = os.environ.get('INGEST_MODE') == 'incremental'
+# Most uploads processed at the same time; each one already uses several processes and embedding requests
+MAX_JOBS = int(os.environ.get('INGEST_JOBS', 2))
+# Most log lines a progress request can ask for
+MAX_LOG_LINES = 200
+
+
+def script(name, *args):
+    return [sys.executable, os.path.join(SCRIPT_DIR, name), *args]
+
+
+def prepare(job):
+    """Start an incremental update from the dataset's current vector store and corpus."""
+    store, corpus = os.path.join(DATA_STORE_DIR, job.name), os.path.join(CORPUS_DIR, job.name)
+    if os.path.isdir(store):
+        shutil.copytree(store, os.path.join(job.workdir, 'data_stores'))
+    if os.path.isdir(corpus):
+        shutil.copytree(corpus, os.path.join(job.workdir, 'output'), dirs_exist_ok=True)
+
+
+def publish(job):
+    """Replace the dataset's vector store with the one the job built."""
+    store = os.path.join(job.workdir, 'data_stores')
+    if not os.path.exists(os.path.join(store, 'index.faiss')):
+        raise ValueError("No vector store was built; check that the uploaded PDFs contain text")
+    replace_directory(store, os.path.join(DATA_STORE_DIR, job.name))
+    if INCREMENTAL:
+        replace_directory(os.path.join(job.workdir, 'output'), os.path.join(CORPUS_DIR, job.name))
+
+
+# The same stages as the Makefile, with the API key and scripts found from the job directory
+stages = [
+    ('extract', script('pdf_extractor.py', *(['--workers', os.environ['WORKERS']] if os.environ.get('WORKERS') else []))),
+    ('chunk', script('doc_chunker_operator.py')),
+    ('embed', script('vector_store_operator.py', '--index-type', os.environ.get('INDEX_TYPE', 'flat'),
+                     '--keys-file', os.path.abspath('Keys.txt'), *(['--incremental'] if INCREMENTAL else []))),
+    ('publish', publish),
+]
+if INCREMENTAL:
+    stages.insert(0, ('prepare', prepare))
+jobs = IngestionJobQueue(JOBS_DIR, stages, max_workers=MAX_JOBS)
 
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def job_response(job_id, action=None):
+    """Look up a job, and cancel or retry it, answering 404 for unknown jobs and 409 for invalid actions."""
+    try:
+        job = action(job_id) if action else jobs.get(job_id)
+    except KeyError:
+        return jsonify(error=f"No job {job_id}"), 404
+    except ValueError as e:
+        return jsonify(error=str(e)), 409
+    return jsonify(job.to_dict())
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -27,18 +82,60 @@ def index():
 def upload_and_submit():
     if 'files' not in request.files:
         return 'No file part', 400
-    files = request.files.getlist('files')
-    for file in files:
-        if file and allowed_file(file.filename):
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-            file.save(filepath)  
-    # Run the makefile target
+    files = [file for file in request.files.getlist('files') if file and allowed_file(file.filename)]
+    if not files:
+        return 'No PDF files uploaded', 400
+    name = secure_filename(request.form.get("dataset_name") or "") or None
+    try:
+        job = jobs.create(name)
+    except ValueError as e:
+        return str(e), 409
+    try:
+        for file in files:
+            file.save(os.path.join(job.source_dir, secure_filename(file.filename)))
+    except Exception as e:
+        # Cancelled so that the queued job does not keep the dataset name taken
+        jobs.cancel(job.id)
+        return f'Failed to save uploaded files: {e}', 500
+    jobs.start(job.id)
+    return jsonify(dict(job.to_dict(), message='Files uploaded, processing started')), 202
+
+@app.route('/jobs')
+def list_jobs():
+    return jsonify([job.to_dict() for job in jobs.jobs()])
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    return job_response(job_id)
+
+@app.route('/jobs/<job_id>/progress')
+def job_progress(job_id):
     try:
-        os.environ['dataset_name']=request.form.get("dataset_name") 
-        subprocess.run(['make'], check=True)
-        return 'Files uploaded'
-    except subprocess.CalledProcessError as e:
-        return f'File upload succeeded but Makefile failed: {e}', 500
+        lines = min(max(request.args.get('lines', 20, type=int), 0), MAX_LOG_LINES)
+        return jsonify(jobs.progress(job_id, lines=lines))
+    except KeyError:
+        return jsonify(error=f"No job {job_id}"), 404
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    return job_response(job_id, jobs.cancel)
+
+@app.route('/jobs/<job_id>/retry', methods=['POST'])
+def retry_job(job_id):
+    return job_response(job_id, jobs.retry)
+
+@app.route('/status')
+def processing_status():
+    all_jobs = jobs.jobs()
+    finished = [job for job in all_jobs if job.finished is not None]
+    last = max(finished, key=lambda job: job.finished) if finished else None
+    return jsonify(
+        running=sum(job.state == 'running' for job in all_jobs),
+        queued=sum(job.state == 'queued' for job in all_jobs),
+        failed=sum(job.state == 'failed' for job in all_jobs),
+        last_state=last.state if last else None,
+        last_finished=last.finished if last else None,
+    )
 
 if __name__ == '__main__':
     app.run(debug=True)
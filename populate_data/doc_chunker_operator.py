@@ -2,9 +2,7 @@
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from pathlib import Path
 
-# Read all text files
-folder = Path("output")
-docs = [f.read_text(encoding="utf8") for f in folder.glob("*.txt")]
+from maeser.ingestion.chunking import iter_corpus_chunks
 
 # Configure splitter
 splitter = RecursiveCharacterTextSplitter(
@@ -12,11 +10,11 @@ splitter = RecursiveCharacterTextSplitter(
     chunk_overlap=200,
 )
 
-# Generate chunks
-texts = []
-for doc in docs:
-    texts.extend(splitter.split_text(doc))
 
-# Save for import
+def iter_chunks(folder="output"):
+    """Stream the chunks of all text files, one window of one file in memory at a time."""
+    return iter_corpus_chunks((str(f) for f in sorted(Path(folder).glob("*.txt"))), splitter)
+
+
 if __name__ == "__main__":
-    print(f"Generated {len(texts)} chunks.")
+    print(f"Generated {sum(1 for _ in iter_chunks())} chunks.")
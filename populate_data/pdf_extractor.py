@@ -0,0 +1,18 @@
+import argparse
+import json
+
+from maeser.ingestion.pdf import extract_pdfs
+
+SOURCE_DIR = "source"
+OUTPUT_DIR = "output"
+
+# Convert every PDF in source/ to a text file in output/, in parallel.
+# Rerunning after a crash skips the PDFs that were already converted.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract the text of the PDFs in source/ into output/.")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the number of CPUs")
+    parser.add_argument("--keep-sources", action="store_true", help="keep the PDFs after converting them")
+    args = parser.parse_args()
+
+    report = extract_pdfs(SOURCE_DIR, OUTPUT_DIR, workers=args.workers, remove_sources=not args.keep_sources)
+    print(json.dumps(report))
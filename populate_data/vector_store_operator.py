@@ -1,27 +1,109 @@
+import argparse
 import os
+from pathlib import Path
 
+from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
+from maeser.graphs.bm25 import BM25Index, bm25_path
+from maeser.ingestion.chunking import iter_corpus_chunks
+from maeser.ingestion.dedup import NearDuplicateFilter
+from maeser.ingestion.embedding import EmbeddingStage, build_vectorstore
+from maeser.ingestion.incremental import sync_vectorstore
+from maeser.ingestion.indexes import INDEX_TYPES, describe_index, index_type_of, reindex_vectorstore
+
+OUTPUT_DIR = "output"
+DATA_STORE_DIR = "data_stores"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+# Chunks per embedding request; only a few batches per worker are held in memory at a time
+BATCH_SIZE = 256
+CHECKPOINT_DIR = "embedding_checkpoints"
+
+
+def text_files(output_dir):
+    """List the .txt files in the output directory."""
+    return [str(file) for file in sorted(Path(output_dir).glob("*.txt"))]
+
+
+def build_full(text_splitter, embeddings, stage, deduplicate, index_options):
+    """Re-chunk and embed every text file, overwriting the vector store."""
+    # Stream the chunks of the .txt files in the "output" directory, with their source, page and offset,
+    # and embed them batch by batch into a local FAISS vectorstore
+    chunks = iter_corpus_chunks(text_files(OUTPUT_DIR), text_splitter)
+    if deduplicate is not None:
+        # Drop repeated boilerplate, such as slide headers, before paying to embed it
+        chunks = deduplicate.filter(chunks)
+    db = build_vectorstore(chunks, embeddings, BATCH_SIZE, stage)
+    if db is None:
+        print("No text to embed.")
+        return
+    if index_options["index_type"] != "flat":
+        # Chunks are embedded into a flat index, then moved into the approximate index without re-embedding
+        reindex_vectorstore(db, **index_options)
+    print("Index:", describe_index(db.index))
+    db.save_local(DATA_STORE_DIR)
+
+    # Save a BM25 keyword index next to the vectorstore for hybrid retrieval
+    BM25Index.from_vectorstore(db).save(bm25_path(DATA_STORE_DIR))
+
+
+def build_incremental(text_splitter, embeddings, stage, deduplicate, index_options):
+    """Embed only new or changed chunks and delete the vectors of removed text files."""
+    settings = {"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP, "embedding_model": embeddings.model}
+    report = sync_vectorstore(DATA_STORE_DIR, text_files(OUTPUT_DIR), embeddings, text_splitter,
+                              settings=settings, batch_size=BATCH_SIZE, embedding_stage=stage,
+                              deduplicate=deduplicate)
+    print(", ".join(f"{name.replace('_', ' ')}: {count}" for name, count in report.items()))
+
+    # New vectors are added to the existing index; a new or rebuilt store starts out flat and is converted once
+    if not Path(DATA_STORE_DIR, "index.faiss").exists():
+        return
+    db = FAISS.load_local(DATA_STORE_DIR, embeddings, allow_dangerous_deserialization=True)
+    if index_type_of(db.index) != index_options["index_type"]:
+        reindex_vectorstore(db, **index_options)
+        db.save_local(DATA_STORE_DIR)
+    print("Index:", describe_index(db.index))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the vector store from the text files in output/.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="update the existing vector store in place, treating output/ as the complete corpus")
+    parser.add_argument("--workers", type=int, default=8, help="most concurrent embedding requests")
+    parser.add_argument("--dedup", action="store_true",
+                        help="drop duplicate and near-duplicate chunks before embedding; "
+                             "keeps about 1 KB per kept chunk in memory for the whole run")
+    parser.add_argument("--dedup-threshold", type=float, default=0.85,
+                        help="estimated word-shingle similarity above which a chunk counts as a near duplicate")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat",
+                        help="FAISS index: exact 'flat' search, or an approximate index for large corpora")
+    parser.add_argument("--nlist", type=int, help="IVF lists (default: about 4 * sqrt(chunks))")
+    parser.add_argument("--nprobe", type=int, help="IVF lists searched per query (default: nlist / 16)")
+    parser.add_argument("--pq-m", type=int, help="PQ bytes per vector for ivf_pq (default: dimension / 4)")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW neighbors per node")
+    parser.add_argument("--ef-search", type=int, help="HNSW candidates per query (default: 64)")
+    parser.add_argument("--keys-file", default="Keys.txt", help="file whose first line is the OpenAI API key")
+    args = parser.parse_args()
+    index_options = {"index_type": args.index_type, "nlist": args.nlist, "nprobe": args.nprobe, "pq_m": args.pq_m,
+                     "hnsw_m": args.hnsw_m, "ef_search": args.ef_search}
+
+    # For my sanity's sake, I am having my key be read in from a local, unsunc file.
+    # This is also to make it easier and more secure to run from inside a container, by getting the key
+    # external to the container but encrypted, when implemented.
+    os.environ["OPENAI_API_KEY"] = str(open(args.keys_file).readline().strip())
 
-# For my sanity's sake, I am having my key be read in from a local, unsunc file.
-# This is also to make it easier and more secure to run from inside a container, by getting the key
-# external to the container but encrypted, when implemented.
-os.environ["OPENAI_API_KEY"] = str(open("Keys.txt").readline().strip())
-
-# Load and combine all text from .txt files in the "output" directory
-# This will provide one unified file per upload for training data, try to make it separate data for separate sources later on?
-texts = []
-output_dir = "output"
-for filename in os.listdir(output_dir):
-    if filename.endswith(".txt"):
-        with open(os.path.join(output_dir, filename), "r", encoding="utf-8") as f:
-            texts.append(f.read())
-
-# Split all loaded texts into documents
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-documents = text_splitter.create_documents(texts)
-
-# Save the vectorized text to a local FAISS vectorstore
-db = FAISS.from_documents(documents, OpenAIEmbeddings())
-db.save_local("data_stores")
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    # Retries are left to the embedding stage, which also slows down when rate limited
+    embeddings = OpenAIEmbeddings(max_retries=0)
+    stage = EmbeddingStage(embeddings, max_workers=args.workers, checkpoint_dir=CHECKPOINT_DIR)
+    deduplicate = NearDuplicateFilter(threshold=args.dedup_threshold) if args.dedup else None
+    if args.incremental:
+        build_incremental(text_splitter, embeddings, stage, deduplicate, index_options)
+    else:
+        build_full(text_splitter, embeddings, stage, deduplicate, index_options)
+    # Completed batches were checkpointed so a failed run resumes; the vector store now holds them
+    stage.clear_checkpoints()
+    print(", ".join(f"{name.replace('_', ' ')}: {count}" for name, count in stage.stats.items()))
+    if deduplicate is not None:
+        print("Deduplication:", ", ".join(f"{name.replace('_', ' ')}: {count}" for name, count in deduplicate.report().items()))
@@ -15,11 +15,18 @@ You should have received a copy of the GNU Lesser General Public License along w
 Maeser. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import operator
+import threading
+import time
+from typing import Annotated
+
 import pytest
 from unittest.mock import MagicMock, patch
-from maeser.chat.chat_session_manager import ChatSessionManager
+from typing_extensions import TypedDict
+from maeser.chat.chat_session_manager import ChatSessionManager, QUESTIONS_IN_FLIGHT
 from maeser.chat.chat_logs import BaseChatLogsManager
 from maeser.user_manager import User
+from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph
 
 @pytest.fixture
@@ -73,7 +80,8 @@ def test_ask_question(mock_time, mock_get_openai_callback, chat_session_manager,
         "response": "Test response",
         "tokens_used": 100,
         "cost": 0.002,
-        "execution_time": 1
+        "execution_time": 1,
+        "node_metrics": []
     }
     state_graph_mock.invoke.assert_called_once_with(
         {"messages": ["Test question"]},
@@ -96,4 +104,100 @@ def test_get_conversation_history(chat_session_manager):
 def test_get_conversation_history_no_chat_logs_manager():
     chat_session_manager = ChatSessionManager()
     history = chat_session_manager.get_conversation_history("test_branch", "test_session_id")
-    assert history == {}
\ No newline at end of file
+    assert history == {}
+
+def _blocking_graph(release, calls):
+    """A graph whose single node waits for release before answering."""
+    class State(TypedDict):
+        messages: Annotated[list, operator.add]
+
+    def answer(state: State) -> dict:
+        calls.append(state["messages"][-1])
+        release.wait(5)
+        return {"messages": [f"answer {len(state['messages'])}"]}
+
+    builder = StateGraph(State)
+    builder.add_node("answer", answer)
+    builder.set_entry_point("answer")
+    builder.set_finish_point("answer")
+    return builder.compile(checkpointer=MemorySaver())
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_ask_question_coalesces_identical_first_turns(chat_logs_manager_mock):
+    release, calls = threading.Event(), []
+    manager = ChatSessionManager(chat_logs_manager=chat_logs_manager_mock, coalesce_requests=True)
+    manager.register_branch("test_branch", "Test Branch", _blocking_graph(release, calls))
+
+    responses = {}
+    def ask(session):
+        responses[session] = manager.ask_question("What is X?", "test_branch", session)
+
+    in_flight = QUESTIONS_IN_FLIGHT.value(branch="test_branch")
+    leader = threading.Thread(target=ask, args=("leader",))
+    leader.start()
+    _wait_for(lambda: calls)
+    followers = [threading.Thread(target=ask, args=(f"follower{i}",)) for i in range(3)]
+    for thread in followers:
+        thread.start()
+    # The leader and every follower waiting on it are in flight
+    _wait_for(lambda: QUESTIONS_IN_FLIGHT.value(branch="test_branch") == in_flight + 4)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert calls == ["What is X?"]
+    assert responses["follower0"]["messages"] == responses["leader"]["messages"] == ["What is X?", "answer 1"]
+    assert responses["follower0"]["tokens_used"] == 0
+    assert chat_logs_manager_mock.log.call_count == 4
+    assert not manager._flights
+
+    # The follower's session continues from the shared first turn
+    response = manager.ask_question("And Y?", "test_branch", "follower0")
+    assert response["messages"] == ["What is X?", "answer 1", "And Y?", "answer 3"]
+
+def test_ask_question_does_not_coalesce_later_turns(chat_logs_manager_mock):
+    release, calls = threading.Event(), []
+    release.set()
+    manager = ChatSessionManager(chat_logs_manager=chat_logs_manager_mock, coalesce_requests=True)
+    manager.register_branch("test_branch", "Test Branch", _blocking_graph(release, calls))
+
+    manager.ask_question("Hi", "test_branch", "a")
+    manager.ask_question("Hi", "test_branch", "b")
+    manager.ask_question("Hi", "test_branch", "a")
+
+    assert calls == ["Hi", "Hi", "Hi"]
+
+def test_register_branch_needs_graph_or_factory(chat_session_manager):
+    with pytest.raises(ValueError):
+        chat_session_manager.register_branch("empty", "Empty")
+
+def test_lazy_branch_is_built_once(chat_logs_manager_mock):
+    graph = MagicMock()
+    graph.invoke.return_value = {"messages": ["question", "answer"]}
+    factory = MagicMock(return_value=graph)
+    manager = ChatSessionManager(chat_logs_manager=chat_logs_manager_mock)
+    manager.register_branch("lazy", "Lazy", graph_factory=factory, warmup_question="Hello?")
+    assert not factory.called and not manager.ready
+
+    manager.warm_up(background=False)
+    manager.ask_question("question", "lazy", "session")
+
+    factory.assert_called_once_with()
+    assert manager.ready
+    assert graph.invoke.call_args_list[0].args == ({"messages": ["Hello?"]},)
+
+def test_failed_warm_up_question_does_not_fail_the_branch(chat_logs_manager_mock):
+    graph = MagicMock()
+    graph.invoke.side_effect = [RuntimeError("rate limited"), {"messages": ["question", "answer"]}]
+    manager = ChatSessionManager(chat_logs_manager=chat_logs_manager_mock)
+    manager.register_branch("lazy", "Lazy", graph_factory=lambda: graph, warmup_question="Hello?")
+
+    manager.warm_up(background=False)
+
+    assert manager.ready and manager.readiness == {"lazy": "ready"}
+    assert manager.ask_question("question", "lazy", "session")["messages"] == ["question", "answer"]
@@ -0,0 +1,85 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+from flask import Flask
+from maeser.blueprints import App_Manager
+from maeser.chat.chat_session_manager import ChatSessionManager
+
+
+def test_readiness_flips_once_every_branch_is_loaded():
+    loading = threading.Event()
+
+    def slow_factory():
+        loading.wait(5)
+        return MagicMock()
+
+    sessions = ChatSessionManager()
+    sessions.register_branch("ready", "Ready", MagicMock())
+    sessions.register_branch("slow", "Slow", graph_factory=slow_factory)
+    app = App_Manager(
+        app=Flask(__name__), app_name="Test", flask_secret_key="secret", chat_session_manager=sessions, warm_up=True
+    ).add_flask_blueprint()
+    client = app.test_client()
+
+    assert client.get("/healthz").get_json() == {"status": "ok"}
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json()["branches"]["slow"] in ("pending", "loading")
+
+    loading.set()
+    sessions._warmup_thread.join(5)
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ready", "branches": {"ready": "ready", "slow": "ready"}}
+
+
+def test_readiness_reports_failed_branches():
+    def broken_factory():
+        raise FileNotFoundError("no index.faiss")
+
+    sessions = ChatSessionManager()
+    sessions.register_branch("broken", "Broken", graph_factory=broken_factory)
+    app = App_Manager(
+        app=Flask(__name__), app_name="Test", flask_secret_key="secret", chat_session_manager=sessions, warm_up=False
+    ).add_flask_blueprint()
+    sessions.warm_up(background=False)
+
+    response = app.test_client().get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json()["branches"] == {"broken": "failed: FileNotFoundError: no index.faiss"}
+
+
+def test_readiness_probe_builds_lazy_branches_without_warm_up():
+    factory = MagicMock(return_value=MagicMock())
+    sessions = ChatSessionManager()
+    sessions.register_branch("eager", "Eager", MagicMock())
+    sessions.register_branch("lazy", "Lazy", graph_factory=factory)
+    app = App_Manager(
+        app=Flask(__name__), app_name="Test", flask_secret_key="secret", chat_session_manager=sessions, warm_up=False
+    ).add_flask_blueprint()
+    client = app.test_client()
+
+    deadline = time.monotonic() + 5
+    while (response := client.get("/readyz")).status_code != 200:
+        assert time.monotonic() < deadline, response.get_json()
+        time.sleep(0.01)
+    assert response.get_json() == {"status": "ready", "branches": {"eager": "ready", "lazy": "ready"}}
+    factory.assert_called_once_with()
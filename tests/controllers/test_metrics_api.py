@@ -0,0 +1,60 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+from maeser.blueprints import App_Manager
+from maeser.chat.chat_session_manager import ChatSessionManager
+
+
+def make_app(enable_metrics: bool) -> Flask:
+    sessions = ChatSessionManager()
+    graph = MagicMock()
+    graph.invoke.return_value = {"messages": ["question", "answer"], "retrieved_context": []}
+    sessions.register_branch("course", "Course", graph)
+    return App_Manager(
+        app=Flask(__name__),
+        app_name="Test",
+        flask_secret_key="secret",
+        chat_session_manager=sessions,
+        enable_metrics=enable_metrics,
+    ).add_flask_blueprint()
+
+
+@pytest.fixture
+def client():
+    return make_app(enable_metrics=True).test_client()
+
+
+def test_metrics_route_is_optional():
+    assert make_app(enable_metrics=False).test_client().get("/metrics").status_code == 404
+
+
+def test_records_requests_per_route(client):
+    session = client.post("/req_session", json={"action": "course", "type": "new"}).get_json()["response"]
+    assert client.post(f"/msg/{session}", json={"action": "course", "message": "question"}).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'maeser_http_requests_total{route="/msg/<chat_session>",method="POST",status="200"} 1' in body
+    assert 'maeser_http_request_seconds_count{route="/req_session",method="POST"} 1' in body
+    assert 'maeser_questions_in_flight{branch="course"} 0' in body
+    assert 'maeser_question_seconds_count{branch="course"} 1' in body
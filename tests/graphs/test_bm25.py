@@ -0,0 +1,88 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings.fake import DeterministicFakeEmbedding
+from maeser.graphs.bm25 import BM25Index, bm25_path, tokenize
+from maeser.graphs.retrieval import HybridRetriever, build_retriever
+
+TEXTS = [
+    "Lab 3 asks you to implement draw_line in the display driver.",
+    "ECEN 330 covers embedded systems programming in C.",
+    "The syllabus lists office hours and the late policy.",
+]
+
+
+@pytest.fixture
+def vectorstore():
+    return FAISS.from_texts(TEXTS, DeterministicFakeEmbedding(size=16))
+
+
+def test_tokenize_keeps_identifiers_and_parts():
+    assert tokenize("Call draw_line() in ECEN330") == ["call", "draw_line", "draw", "line", "in", "ecen330"]
+
+
+def test_search_ranks_exact_identifiers_first():
+    index = BM25Index.from_texts(["a", "b", "c"], TEXTS)
+    results = index.search("what does draw_line do", k=2)
+    assert results[0][0] == "a"
+    assert all(score > 0 for _, score in results)
+
+
+def test_search_ignores_unmatched_documents():
+    index = BM25Index.from_texts(["a", "b", "c"], TEXTS)
+    assert [doc_id for doc_id, _ in index.search("ecen 330")] == ["b"]
+
+
+def test_save_and_load_round_trip(tmp_path, vectorstore):
+    index = BM25Index.from_vectorstore(vectorstore)
+    file_path = bm25_path(str(tmp_path))
+    index.save(file_path)
+    loaded = BM25Index.load(file_path)
+    assert loaded.search("syllabus late policy") == index.search("syllabus late policy")
+
+
+def test_hybrid_retriever_finds_keyword_matches(vectorstore):
+    retriever = HybridRetriever(vectorstore=vectorstore, bm25=BM25Index.from_vectorstore(vectorstore), k=2)
+    documents = retriever.invoke("ECEN 330")
+    assert len(documents) == 2
+    assert documents[0].page_content == TEXTS[1]
+
+
+def test_build_retriever_loads_persisted_index(tmp_path, vectorstore):
+    vectorstore.save_local(str(tmp_path))
+    BM25Index.from_vectorstore(vectorstore).save(bm25_path(str(tmp_path)))
+    retriever = build_retriever(vectorstore, str(tmp_path), retriever_type="hybrid", k=1)
+    assert isinstance(retriever, HybridRetriever)
+    assert len(retriever.invoke("office hours")) == 1
+
+
+def test_build_retriever_builds_and_saves_missing_or_stale_index(tmp_path, vectorstore):
+    file_path = bm25_path(str(tmp_path))
+    build_retriever(vectorstore, str(tmp_path), retriever_type="hybrid")
+    assert BM25Index.load(file_path).doc_ids == list(vectorstore.index_to_docstore_id.values())
+
+    vectorstore.add_texts(["Midterm review covers interrupts."])
+    retriever = build_retriever(vectorstore, str(tmp_path), retriever_type="hybrid", k=1)
+    assert retriever.invoke("midterm interrupts")[0].page_content == "Midterm review covers interrupts."
+    assert len(BM25Index.load(file_path).doc_ids) == 4
+
+
+def test_build_retriever_rejects_unknown_type(tmp_path, vectorstore):
+    with pytest.raises(ValueError):
+        build_retriever(vectorstore, str(tmp_path), retriever_type="sparse")
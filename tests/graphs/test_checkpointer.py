@@ -0,0 +1,122 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import operator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Annotated
+
+import pytest
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import StateGraph
+from typing_extensions import TypedDict
+from maeser.graphs.checkpointer import CheckpointMaintainer, PooledSqliteSaver, get_checkpointer
+
+
+class State(TypedDict):
+    messages: Annotated[list, operator.add]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "memory.db")
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("answer", lambda state: {"messages": ["answer"]})
+    builder.set_entry_point("answer")
+    builder.set_finish_point("answer")
+    return builder.compile(checkpointer=checkpointer)
+
+
+@pytest.fixture
+def graph(db_path):
+    return build_graph(SqliteSaver.from_conn_string(db_path))
+
+
+def ask(graph, thread_id, turns=3):
+    for turn in range(turns):
+        graph.invoke({"messages": [f"question {turn}"]}, {"configurable": {"thread_id": thread_id}})
+
+
+def test_compact_keeps_latest_state(graph, db_path):
+    ask(graph, "a")
+    ask(graph, "b")
+    maintainer = CheckpointMaintainer(db_path)
+    before = maintainer.stats()
+
+    assert maintainer.compact() == before["checkpoints"] - 2
+    after = maintainer.stats()
+    assert after["threads"] == 2
+    assert after["checkpoints"] == 2
+    state = graph.get_state({"configurable": {"thread_id": "a"}})
+    assert len(state.values["messages"]) == 6
+
+    # The thread can continue from the compacted state
+    ask(graph, "a", turns=1)
+    assert len(graph.get_state({"configurable": {"thread_id": "a"}}).values["messages"]) == 8
+
+
+def test_expire_deletes_idle_threads(graph, db_path):
+    ask(graph, "a", turns=1)
+    maintainer = CheckpointMaintainer(db_path, ttl_seconds=60)
+
+    assert maintainer.expire() == 0
+    assert maintainer.expire(now=datetime.now(timezone.utc) + timedelta(minutes=5)) == 1
+    assert maintainer.stats()["threads"] == 0
+    assert not graph.get_state({"configurable": {"thread_id": "a"}}).values.get("messages")
+
+
+def test_run_once_reports_and_enables_incremental_vacuum(graph, db_path):
+    ask(graph, "a")
+    maintainer = CheckpointMaintainer(db_path, ttl_seconds=None)
+    report = maintainer.run_once()
+
+    assert report["checkpoints"] == 1
+    assert report["expired_threads"] == 0
+    assert report["deleted_checkpoints"] > 0
+    assert report["file_bytes"] > 0
+    conn = maintainer._connect()
+    try:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
+
+
+def test_invalid_vacuum_mode_raises(db_path):
+    with pytest.raises(ValueError):
+        CheckpointMaintainer(db_path, vacuum="sometimes")
+
+
+def test_get_checkpointer_is_shared_per_database(tmp_path, db_path):
+    assert get_checkpointer(db_path) is get_checkpointer(db_path)
+    assert get_checkpointer(db_path) is not get_checkpointer(str(tmp_path / "other.db"))
+    assert isinstance(get_checkpointer(db_path), PooledSqliteSaver)
+
+
+def test_pooled_checkpointer_handles_concurrent_sessions(db_path):
+    checkpointer = get_checkpointer(db_path, max_connections=4)
+    first, second = build_graph(checkpointer), build_graph(checkpointer)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda thread: ask(first if thread % 2 else second, str(thread)), range(16)))
+
+    for thread in range(16):
+        assert len(first.get_state({"configurable": {"thread_id": str(thread)}}).values["messages"]) == 6
+    assert checkpointer.pool.size <= 4
@@ -0,0 +1,71 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pytest
+from langchain_core.documents import Document
+from maeser.graphs.context import ContextPolicy, build_context, clean_text, prompt_token_counts
+from maeser.graphs.instrumentation import instrument_node, record_node_metrics
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # Count 4 characters per token whether or not tiktoken's encoding files are available
+    monkeypatch.setattr("maeser.graphs.tokens._get_encoding", lambda model: None)
+
+
+def test_documents_are_formatted_without_metadata_noise():
+    document = Document(page_content="  Lab 3\n\n\n\nuse   the\tscope  ", metadata={"source": "lab3.pdf", "page": 2, "id": "x"})
+    assert clean_text(document.page_content) == "Lab 3\n\nuse the scope"
+    assert ContextPolicy().format_document(document) == "[source: lab3.pdf]\nLab 3\n\nuse the scope"
+    assert ContextPolicy(metadata_fields=()).format_document(document) == "Lab 3\n\nuse the scope"
+
+
+def test_pack_keeps_highest_ranked_documents_within_budget():
+    documents = [Document(page_content=text) for text in ("a" * 40, "b" * 80, "a" * 40, "c" * 20, "d" * 8)]
+    policy = ContextPolicy(max_tokens=17, separator="\n\n", metadata_fields=())
+    context, packed, tokens = policy.pack(documents)
+    # a takes 10 tokens, b (20) does not fit, the second a is a duplicate, c takes 1 + 5 and d (1 + 2) no longer fits
+    assert [document.page_content[0] for document in packed] == ["a", "c"]
+    assert context == "a" * 40 + "\n\n" + "c" * 20 and tokens == 16 <= policy.max_tokens
+
+    context, packed, tokens = ContextPolicy(max_tokens=5, metadata_fields=()).pack(documents)
+    assert context == "a" * 20 and packed == documents[:1] and tokens == 5
+    assert ContextPolicy().pack(documents)[1] == [documents[0], documents[1], documents[3], documents[4]]
+    assert ContextPolicy().pack(None) == ("", [], 0)
+
+
+def test_prompt_token_counts_cover_every_part():
+    counts = prompt_token_counts("Answer from:\n{context}\n", 30, ["q1" * 4, "a1" * 4], "why?")
+    assert counts == {"system": 4, "context": 30, "history": 4, "question": 1, "total": 39}
+
+
+def test_negative_budget_raises():
+    with pytest.raises(ValueError):
+        ContextPolicy(max_tokens=-1)
+
+
+def test_build_context_packs_only_with_a_policy():
+    documents = [Document(page_content="a" * 40, metadata={"source": "a.txt"})]
+    assert build_context(None, documents, "{context}", [], "why?") is documents
+
+    def generate(state):
+        return {"context": build_context(ContextPolicy(), documents, "{context}", [], "why?")}
+
+    with record_node_metrics() as metrics:
+        result = instrument_node("generate", generate)({})
+    assert result["context"] == "[source: a.txt]\n" + "a" * 40
+    assert metrics[0]["context_documents"] == 1 and metrics[0]["prompt_tokens"]["context"] == 14
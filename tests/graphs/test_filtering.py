@@ -0,0 +1,88 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings.fake import DeterministicFakeEmbedding
+from maeser.graphs.filtering import FilteredRetriever, MetadataIndex
+from maeser.graphs.pipeline_rag import parse_topic_config
+from maeser.graphs.retrieval import HybridRetriever, build_retriever
+from maeser.graphs.topic_router import sample_topic_vector
+from maeser.ingestion.indexes import reindex_vectorstore
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=16)
+
+
+@pytest.fixture
+def store():
+    texts = [f"unit {i % 3} chunk {i}" for i in range(300)]
+    metadatas = [{"unit": i % 3, "kind": "lab" if i % 2 else "slides"} for i in range(300)]
+    return FAISS.from_texts(texts, EMBEDDINGS, metadatas=metadatas)
+
+
+def exact_filtered(store, query, predicate, k):
+    """The k nearest chunks matching a predicate, by brute force over every stored chunk."""
+    query_vector = np.asarray(EMBEDDINGS.embed_query(query))
+    documents = [store.docstore.search(doc_id) for doc_id in store.index_to_docstore_id.values()]
+    matching = [document for document in documents if predicate(document.metadata)]
+    matching.sort(key=lambda document: np.sum((np.asarray(EMBEDDINGS.embed_query(document.page_content)) - query_vector) ** 2))
+    return [document.page_content for document in matching[:k]]
+
+
+def test_filtered_search_returns_the_best_matching_chunks(store):
+    index = MetadataIndex(store)
+    # The query is a unit 2 chunk, so an unfiltered search would rank it first
+    found = index.similarity_search("unit 2 chunk 5", {"unit": 1}, k=4)
+    assert [document.page_content for document in found] == exact_filtered(store, "unit 2 chunk 5", lambda m: m["unit"] == 1, 4)
+
+    both = index.similarity_search("question", {"unit": [0, "1"], "kind": "lab"}, k=300)
+    assert len(both) == 100 and all(d.metadata["unit"] in (0, 1) and d.metadata["kind"] == "lab" for d in both)
+    assert index.similarity_search("question", {"unit": 7}, k=4) == []
+    assert index.values("unit") == ["0", "1", "2"]
+
+
+def test_filter_runs_inside_approximate_indexes_and_follows_updates(store):
+    reindex_vectorstore(store, "ivf_flat", nlist=4, nprobe=4)
+    retriever = build_retriever(store, "unused", k=5, metadata_filter={"kind": "slides"})
+    assert isinstance(retriever, FilteredRetriever)
+    assert all(document.metadata["kind"] == "slides" for document in retriever.invoke("chunk 3"))
+
+    # The metadata index picks up chunks added after it was built
+    store.add_texts(["new handout"], metadatas=[{"kind": "handout"}])
+    retriever.filter = {"kind": "handout"}
+    assert [document.page_content for document in retriever.invoke("x")] == ["new handout"]
+
+
+def test_hybrid_retriever_filters_both_rankings(store, tmp_path):
+    retriever = build_retriever(store, str(tmp_path), retriever_type="hybrid", k=10, metadata_filter={"unit": 2})
+    assert isinstance(retriever, HybridRetriever)
+    # "chunk 4" is a unit 1 chunk that BM25 would rank first without the filter
+    found = retriever.invoke("chunk 4")
+    assert len(found) == 10 and all(document.metadata["unit"] == 2 for document in found)
+
+
+def test_topics_can_share_a_filtered_vectorstore(store):
+    assert parse_topic_config("labs", "stores/labs") == ("stores/labs", None)
+    assert parse_topic_config("unit 1", {"path": "stores/course", "filter": {"unit": 1}}) == ("stores/course", {"unit": 1})
+    with pytest.raises(ValueError):
+        parse_topic_config("unit 1", {"filter": {"unit": 1}})
+
+    positions = MetadataIndex(store).positions({"unit": 1})
+    vectors = np.vstack([store.index.reconstruct(int(position)) for position in positions])
+    expected = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).mean(axis=0)
+    assert np.allclose(sample_topic_vector(store, sample_size=1000, positions=positions), expected / np.linalg.norm(expected), atol=1e-5)
@@ -0,0 +1,128 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import operator
+from typing import Annotated
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import SystemMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph
+from typing_extensions import TypedDict
+from maeser.graphs.history import (
+    HistoryPolicy, ReplaceMessages, append_messages, history_with_summary, message_count_update,
+    repair_duplicated_history, summarize_history,
+)
+
+HISTORY = ["q1", "a1", "q2", "a2", "q3", "a3"]
+
+
+def test_window_keeps_last_turns():
+    policy = HistoryPolicy("window", max_turns=2)
+    assert policy.split(HISTORY) == (["q1", "a1"], ["q2", "a2", "q3", "a3"])
+
+
+def test_pending_question_is_never_trimmed():
+    policy = HistoryPolicy("window", max_turns=0)
+    assert policy.trim(HISTORY + ["q4"]) == HISTORY + ["q4"]
+    assert policy.trim(HISTORY) == []
+
+
+def test_reducer_appends_then_trims():
+    reducer = HistoryPolicy("window", max_turns=1).reducer()
+    state = reducer([], ["q1"])
+    state = reducer(state, ["a1"])
+    state = reducer(state, ["q2"])
+    assert state == ["q1", "a1", "q2"]
+    assert reducer(state, ["a2"]) == ["q2", "a2"]
+
+
+def test_token_budget_drops_whole_turns(monkeypatch):
+    monkeypatch.setattr(
+        "maeser.graphs.history.count_message_tokens",
+        lambda messages, model: sum(len(message.split()) for message in messages),
+    )
+    policy = HistoryPolicy("tokens", max_tokens=5)
+    history = ["one two", "three", "four", "five six", "seven", "eight"]
+    assert policy.split(history) == (history[:2], history[2:])
+
+
+def test_invalid_strategy_raises():
+    with pytest.raises(ValueError):
+        HistoryPolicy("forever")
+
+
+def test_summary_is_prepended_to_history():
+    assert history_with_summary(["q1"], None) == ["q1"]
+    history = history_with_summary(["q1"], "Student asked about labs.")
+    assert isinstance(history[0], SystemMessage)
+    assert "Student asked about labs." in history[0].content
+    assert history[1:] == ["q1"]
+
+
+def test_summarize_history_uses_llm():
+    llm = FakeListChatModel(responses=["Student asked about lab 1."])
+    assert summarize_history(llm, None, ["what is lab 1?", "Lab 1 is about GPIO."]) == "Student asked about lab 1."
+
+
+def test_message_count_starts_from_stored_history():
+    assert message_count_update(None, ["q1"]) == 2
+    assert message_count_update(0, HISTORY + ["q4"]) == 8
+    assert message_count_update(6, ["q4"]) == 2
+
+
+def test_duplicated_history_is_repaired():
+    # What the old pipeline generate node stored after each turn
+    duplicated = []
+    for question, answer in (("q1", "a1"), ("q2", "a2"), ("q3", "a3")):
+        asked = duplicated + [question]
+        duplicated = asked + asked + [answer]
+    assert len(duplicated) == 21
+    assert repair_duplicated_history(duplicated) == HISTORY
+    assert repair_duplicated_history(HISTORY) is None
+    assert repair_duplicated_history([]) is None
+    assert repair_duplicated_history(["q1", "q2", "a1"]) is None
+
+
+def test_replace_messages_overwrites_stored_history():
+    class State(TypedDict):
+        messages: Annotated[list, append_messages]
+        message_count: Annotated[int, operator.add]
+
+    def generate(state):
+        messages = state["messages"]
+        repaired = None if state.get("message_count") else repair_duplicated_history(messages[:-1])
+        if repaired is not None:
+            messages = repaired + messages[-1:]
+        answer = "a" + messages[-1][1:]
+        return {
+            "messages": [answer] if repaired is None else ReplaceMessages(messages + [answer]),
+            "message_count": message_count_update(state.get("message_count"), messages),
+        }
+
+    graph = StateGraph(State)
+    graph.add_node("generate", generate)
+    graph.set_entry_point("generate")
+    graph.set_finish_point("generate")
+    app = graph.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "legacy"}}
+    app.update_state(config, {"messages": ["q1", "q1", "a1"]})
+
+    assert app.invoke({"messages": ["q2"]}, config) == {"messages": ["q1", "a1", "q2", "a2"], "message_count": 4}
+    assert app.invoke({"messages": ["q3"]}, config) == {"messages": HISTORY, "message_count": 6}
+    assert HistoryPolicy("window", max_turns=1).reducer()(HISTORY, ReplaceMessages(["q1", "a1"])) == ["q1", "a1"]
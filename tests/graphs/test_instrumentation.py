@@ -0,0 +1,79 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import operator
+from typing import Annotated, List
+
+from langchain_community.callbacks import get_openai_callback
+from langchain_community.callbacks.manager import openai_callback_var
+from langchain_core.documents import Document
+from langgraph.graph import StateGraph
+from typing_extensions import TypedDict
+from maeser.graphs.instrumentation import (
+    NODE_SECONDS, PROMPT_TOKENS, instrument_node, observe_node_metrics, record_node_metrics, record_node_values,
+)
+
+
+class State(TypedDict):
+    messages: Annotated[list, operator.add]
+    retrieved_context: List[Document]
+
+
+def retrieve(state: State) -> dict:
+    return {"retrieved_context": [Document(page_content="a"), Document(page_content="b")]}
+
+
+def generate(state: State) -> dict:
+    # Stands in for an LLM call reported to the OpenAI callback
+    openai_callback_var.get().total_tokens += 42
+    record_node_values(prompt_tokens={"context": 30, "total": 40})
+    return {"messages": ["answer"]}
+
+
+def build_graph():
+    builder = StateGraph(State)
+    builder.add_node("retrieve", instrument_node("retrieve", retrieve))
+    builder.add_node("generate", instrument_node("generate", generate))
+    builder.add_edge("retrieve", "generate")
+    builder.set_entry_point("retrieve")
+    builder.set_finish_point("generate")
+    return builder.compile()
+
+
+def test_records_each_node():
+    with get_openai_callback() as callback, record_node_metrics() as metrics:
+        build_graph().invoke({"messages": ["question"]})
+
+    assert [entry["node"] for entry in metrics] == ["retrieve", "generate"]
+    assert metrics[0]["documents"] == 2
+    assert "documents" not in metrics[1]
+    assert metrics[1]["prompt_tokens"] == {"context": 30, "total": 40} and "prompt_tokens" not in metrics[0]
+    assert metrics[1]["tokens"] == 42 == callback.total_tokens
+    assert all(entry["seconds"] >= 0 for entry in metrics)
+
+
+def test_nodes_are_not_measured_outside_a_recording():
+    assert instrument_node("retrieve", retrieve)({})["retrieved_context"][0].page_content == "a"
+    record_node_values(prompt_tokens={"total": 1})
+
+
+def test_observe_updates_histograms():
+    before = NODE_SECONDS.snapshot(branch="test", node="generate")["count"]
+    prompt_before = PROMPT_TOKENS.snapshot(branch="test", part="context")["count"]
+    observe_node_metrics("test", [{"node": "generate", "seconds": 0.2, "tokens": 10, "prompt_tokens": {"context": 300}}])
+    assert NODE_SECONDS.snapshot(branch="test", node="generate")["count"] == before + 1
+    assert PROMPT_TOKENS.snapshot(branch="test", part="context")["count"] == prompt_before + 1
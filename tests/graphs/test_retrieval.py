@@ -0,0 +1,133 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings.fake import DeterministicFakeEmbedding
+from langchain_core.runnables import RunnableLambda
+from maeser.graphs.retrieval import (
+    CachedQueryEmbeddings, CachedRetriever, build_retriever, parallel_retrieve, reciprocal_rank_fusion,
+)
+from maeser.metrics import CACHE_REQUESTS
+
+
+def docs(*contents: str) -> list[Document]:
+    return [Document(page_content=content) for content in contents]
+
+
+def test_rrf_prefers_documents_ranked_by_several_lists():
+    fused = reciprocal_rank_fusion([docs("a", "b", "c"), docs("b", "d")])
+    assert [d.page_content for d in fused] == ["b", "a", "d", "c"]
+
+
+def test_rrf_dedupes_identical_chunks():
+    fused = reciprocal_rank_fusion([docs("a", "b"), docs("a", "b")])
+    assert [d.page_content for d in fused] == ["a", "b"]
+
+
+def test_rrf_limit_and_weights():
+    fused = reciprocal_rank_fusion([docs("a"), docs("b")], weights=[1.0, 2.0], limit=1)
+    assert [d.page_content for d in fused] == ["b"]
+
+
+def test_rrf_weights_must_match_lists():
+    with pytest.raises(ValueError):
+        reciprocal_rank_fusion([docs("a")], weights=[1.0, 1.0])
+
+
+def test_parallel_retrieve_runs_concurrently():
+    def slow(content: str):
+        def retrieve(question: str) -> list[Document]:
+            time.sleep(0.2)
+            return docs(f"{content}:{question}")
+        return RunnableLambda(retrieve)
+
+    retrievers = {name: slow(name) for name in ("one", "two", "three")}
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        start = time.perf_counter()
+        results = parallel_retrieve(retrievers, "q", executor)
+        elapsed = time.perf_counter() - start
+
+    assert list(results) == ["one", "two", "three"]
+    assert results["two"][0].page_content == "two:q"
+    assert elapsed < 0.5
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    queries: int = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+
+@pytest.fixture
+def cached():
+    embeddings = CountingEmbeddings(size=8)
+    store = FAISS.from_texts([f"chunk {i}" for i in range(20)], embeddings)
+    return build_retriever(store, "unused", k=2, cache_size=2), embeddings, store
+
+
+def test_cache_hit_skips_embedding_and_search(cached):
+    retriever, embeddings, _ = cached
+    assert isinstance(retriever, CachedRetriever)
+    hits = CACHE_REQUESTS.value(cache="retrieval", result="hit")
+
+    first = retriever.invoke("What is  a pointer?")
+    assert retriever.invoke("what is a POINTER?") == first
+    assert embeddings.queries == 1
+    assert CACHE_REQUESTS.value(cache="retrieval", result="hit") == hits + 1
+
+
+def test_cache_evicts_least_recently_used(cached):
+    retriever, embeddings, _ = cached
+    for question in ("a", "b", "a", "c", "a", "b"):
+        retriever.invoke(question)
+    # "b" was evicted by "c", while "a" stayed in use
+    assert embeddings.queries == 4 and retriever.size == 2
+
+
+def test_cache_is_invalidated_when_the_index_changes(cached):
+    retriever, embeddings, store = cached
+    retriever.invoke("pointer")
+    store.add_texts(["pointer"])
+    assert retriever.invoke("pointer")[0].page_content == "pointer"
+
+    store.index = store.index.__class__(store.index.d)
+    assert retriever.invoke("pointer") == []
+    assert embeddings.queries == 3
+
+
+def test_query_embeddings_are_shared_by_router_and_retrievers():
+    embeddings = CountingEmbeddings(size=8)
+    shared = CachedQueryEmbeddings(embeddings, max_entries=1)
+    stores = {name: FAISS.from_texts([f"{name} {i}" for i in range(5)], shared) for name in ("one", "two", "three")}
+    retrievers = {name: store.as_retriever(search_kwargs={"k": 1}) for name, store in stores.items()}
+
+    # The router embeds the question first, then every retriever searches with it
+    assert len(shared.embed_query("q")) == 8
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        parallel_retrieve(retrievers, "q", executor)
+        parallel_retrieve(retrievers, "other", executor)
+    assert embeddings.queries == 2
+
+    # Only the latest query is kept
+    shared.embed_query("q")
+    assert embeddings.queries == 3
@@ -0,0 +1,94 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+from maeser.graphs.topic_router import EmbeddingTopicRouter, sample_topic_vector
+
+VOCABULARY = ["cats", "purr", "kittens", "cars", "engines", "wheels", "weather"]
+
+
+class KeywordEmbeddings(Embeddings):
+    """Embeds text as a bag of known keywords."""
+
+    def _embed(self, text: str) -> list[float]:
+        words = text.lower().split()
+        return [float(words.count(word)) for word in VOCABULARY]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+@pytest.fixture
+def embeddings():
+    return KeywordEmbeddings()
+
+
+@pytest.fixture
+def vectorstores(embeddings):
+    return {
+        "pets": FAISS.from_texts(["cats purr", "kittens purr", "cats"], embeddings),
+        "vehicles": FAISS.from_texts(["cars engines", "wheels cars"], embeddings),
+    }
+
+
+def test_sample_topic_vector_is_normalized(vectorstores):
+    vector = sample_topic_vector(vectorstores["pets"])
+    assert vector is not None
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+
+
+def test_route_from_sampled_vectors(embeddings, vectorstores):
+    router = EmbeddingTopicRouter.from_vectorstores(embeddings, vectorstores)
+    assert router.route("do cats purr") == "pets"
+    assert router.route("cars with big engines") == "vehicles"
+
+
+def test_route_uses_topic_descriptions(embeddings, vectorstores):
+    router = EmbeddingTopicRouter.from_vectorstores(
+        embeddings, vectorstores, topic_descriptions={"vehicles": "weather"}
+    )
+    assert router.route("weather") == "vehicles"
+
+
+def test_route_returns_none_when_margin_is_small(embeddings, vectorstores):
+    router = EmbeddingTopicRouter.from_vectorstores(embeddings, vectorstores, margin=0.5)
+    assert router.route("cats cars") is None
+
+
+def test_route_keeps_the_current_topic_when_unclear(embeddings, vectorstores):
+    router = EmbeddingTopicRouter.from_vectorstores(embeddings, vectorstores, margin=0.5)
+    assert router.route("cats cars", current_topic="vehicles") == "vehicles"
+    assert router.route("cats cars", current_topic="pets") == "pets"
+    assert router.route("do cats purr", current_topic="vehicles") == "pets"
+
+
+def test_scores_are_sorted(embeddings, vectorstores):
+    router = EmbeddingTopicRouter.from_vectorstores(embeddings, vectorstores)
+    scores = router.score("kittens")
+    assert [topic for topic, _ in scores] == ["pets", "vehicles"]
+    assert scores[0][1] >= scores[1][1]
+
+
+def test_router_requires_topics(embeddings):
+    with pytest.raises(ValueError):
+        EmbeddingTopicRouter(embeddings, {})
@@ -0,0 +1,67 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import random
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from maeser.ingestion.chunking import batched, iter_corpus_chunks, iter_file_chunks
+
+SPLITTER = RecursiveCharacterTextSplitter(chunk_size=200, chunk_overlap=20)
+
+
+def textbook(pages=5, words_per_page=400, seed=0):
+    rng = random.Random(seed)
+    words = "pointer array stack queue recursion loop function variable".split()
+    return "\f".join(" ".join(rng.choice(words) for _ in range(words_per_page)) for _ in range(pages)) + "\f"
+
+
+def test_chunks_carry_source_page_and_offset(tmp_path):
+    text = textbook()
+    (tmp_path / "book.txt").write_text(text, encoding="utf-8")
+    chunks = list(iter_file_chunks(str(tmp_path / "book.txt"), SPLITTER))
+
+    assert {chunk.metadata["source"] for chunk in chunks} == {"book.txt"}
+    assert [chunk.metadata["page"] for chunk in chunks] == sorted(chunk.metadata["page"] for chunk in chunks)
+    assert chunks[-1].metadata["page"] == 5
+    for chunk in chunks:
+        offset = chunk.metadata["offset"]
+        assert text[offset:offset + len(chunk.page_content)] == chunk.page_content
+        assert text[:offset].count("\f") + 1 == chunk.metadata["page"]
+
+
+def test_small_windows_cover_long_pages(tmp_path):
+    text = textbook(pages=1, words_per_page=3000).rstrip("\f")
+    (tmp_path / "long.txt").write_text(text, encoding="utf-8")
+    chunks = list(iter_file_chunks(str(tmp_path / "long.txt"), SPLITTER, window_chars=1000))
+
+    assert all(len(chunk.page_content) <= 200 for chunk in chunks)
+    covered = set()
+    for chunk in chunks:
+        offset = chunk.metadata["offset"]
+        assert text[offset:offset + len(chunk.page_content)] == chunk.page_content
+        covered.update(range(offset, offset + len(chunk.page_content)))
+    assert all(index in covered for index, character in enumerate(text) if not character.isspace())
+
+
+def test_corpus_is_streamed_in_bounded_batches(tmp_path):
+    for i in range(3):
+        (tmp_path / f"{i}.txt").write_text(textbook(pages=2, seed=i), encoding="utf-8")
+    files = [str(tmp_path / f"{i}.txt") for i in range(3)]
+    batches = list(batched(iter_corpus_chunks(files, SPLITTER), 16))
+
+    assert all(len(batch) <= 16 for batch in batches)
+    assert sum(len(batch) for batch in batches) == len(list(iter_corpus_chunks(files, SPLITTER)))
+    assert [chunk.metadata["source"] for chunk in batches[0][:1]] == ["0.txt"]
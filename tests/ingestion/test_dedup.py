@@ -0,0 +1,83 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import random
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings.fake import DeterministicFakeEmbedding
+from langchain_text_splitters import CharacterTextSplitter
+from maeser.ingestion.dedup import NearDuplicateFilter
+from maeser.ingestion.incremental import sync_vectorstore
+
+WORDS = "pointer array stack queue recursion loop function variable heap tree graph hash".split()
+
+
+def paragraph(seed, words=80):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randrange(50)) for _ in range(words))
+
+
+def test_drops_exact_and_near_duplicates():
+    base = paragraph(1)
+    near = base.replace(base.split()[40], "edited", 1)
+    documents = [Document(base), Document(base.upper() + "!"), Document(near), Document(paragraph(2))]
+    dedup = NearDuplicateFilter()
+    kept = list(dedup.filter(documents))
+
+    assert [document.page_content for document in kept] == [base, paragraph(2)]
+    report = dedup.report()
+    assert (report["exact_duplicates"], report["near_duplicates"]) == (1, 1)
+    assert report["removed_percent"] == 50.0
+    assert report["estimated_tokens_saved"] == (len(base) + 1 + len(near)) // 4
+
+
+def test_keeps_chunks_that_only_share_a_header():
+    header = "ECEN 330 Lab Manual Brigham Young University"
+    documents = [Document(f"{header} {paragraph(seed)}") for seed in range(20)]
+    assert len(list(NearDuplicateFilter().filter(documents))) == 20
+
+
+def write(corpus, files):
+    for file in corpus.iterdir():
+        file.unlink()
+    for name, text in files.items():
+        (corpus / name).write_text(text, encoding="utf-8")
+    return [str(file) for file in sorted(corpus.iterdir())]
+
+
+def stored_sources(path, embeddings):
+    store = FAISS.load_local(str(path), embeddings, allow_dangerous_deserialization=True)
+    return sorted(store.docstore.search(doc_id).metadata["source"] for doc_id in store.index_to_docstore_id.values())
+
+
+def test_incremental_sync_reingests_duplicates_of_deleted_chunks(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    embeddings = DeterministicFakeEmbedding(size=8)
+    splitter = CharacterTextSplitter(separator="\n", chunk_size=600, chunk_overlap=0)
+    handout = paragraph(1) + "\n" + paragraph(2)
+    files = {"lab1.txt": handout, "lab2.txt": handout + "\n" + paragraph(3)}
+
+    report = sync_vectorstore(str(tmp_path), write(corpus, files), embeddings, splitter, deduplicate=NearDuplicateFilter())
+    assert report["duplicate_chunks"] == 2 and report["embedded_chunks"] == 3
+    assert stored_sources(tmp_path, embeddings) == ["lab1.txt", "lab1.txt", "lab2.txt"]
+
+    # Without lab1.txt, the shared paragraphs of lab2.txt are no longer duplicates
+    report = sync_vectorstore(str(tmp_path), write(corpus, {"lab2.txt": files["lab2.txt"]}), embeddings, splitter,
+                              deduplicate=NearDuplicateFilter())
+    assert report["removed_documents"] == 1 and report["embedded_chunks"] == 2
+    assert stored_sources(tmp_path, embeddings) == ["lab2.txt"] * 3
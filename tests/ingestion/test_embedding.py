@@ -0,0 +1,164 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_openai import OpenAIEmbeddings
+from maeser.ingestion.embedding import AdaptiveConcurrency, EmbeddingStage, build_vectorstore
+
+DIMENSIONS = 8
+
+
+class FakeEmbeddingServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the OpenAI embeddings endpoint that answers 429 when more than
+    ``capacity`` requests are in flight, or for the first ``fail_first`` requests.
+    """
+
+    def __init__(self, capacity=2, delay_seconds=0.02, fail_first=0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.capacity = capacity
+        self.delay_seconds = delay_seconds
+        self.fail_first = fail_first
+        self.in_flight = 0
+        self.requests = 0
+        self.embedded = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            self.send_header("Retry-After", "0.01")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests += 1
+            throttled = server.requests <= server.fail_first or server.in_flight >= server.capacity
+            if not throttled:
+                server.in_flight += 1
+        if throttled:
+            self._send(429, {"error": {"message": "Rate limit reached", "type": "requests"}})
+            return
+        try:
+            time.sleep(server.delay_seconds)
+            # langchain_openai sends one text per request when check_embedding_ctx_length is off
+            inputs = request["input"] if isinstance(request["input"], list) else [request["input"]]
+            data = []
+            for index, text in enumerate(inputs):
+                vector = np.full(DIMENSIONS, len(text), dtype=np.float32)
+                embedding = base64.b64encode(vector.tobytes()).decode() if request.get("encoding_format") == "base64" else vector.tolist()
+                data.append({"object": "embedding", "index": index, "embedding": embedding})
+            with server.lock:
+                server.embedded += len(data)
+            self._send(200, {"object": "list", "data": data, "model": request["model"],
+                             "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(**kwargs):
+        instance = FakeEmbeddingServer(**kwargs)
+        threading.Thread(target=instance.serve_forever, daemon=True).start()
+        servers.append(instance)
+        return instance
+
+    yield start
+    for instance in servers:
+        instance.shutdown()
+        instance.server_close()
+
+
+def openai_embeddings(server):
+    return OpenAIEmbeddings(base_url=server.url, api_key="test", max_retries=0, check_embedding_ctx_length=False)
+
+
+def documents(count):
+    return [Document("x" * (i + 1), metadata={"chunk": i}) for i in range(count)]
+
+
+def test_rate_limits_shrink_concurrency_without_losing_batches(server):
+    fake = server(capacity=2)
+    stage = EmbeddingStage(openai_embeddings(fake), max_workers=8, initial_workers=8, backoff_seconds=0.01)
+    store = build_vectorstore(documents(40), stage.embeddings, batch_size=2, stage=stage)
+
+    assert fake.embedded == 40 and len(store.index_to_docstore_id) == 40
+    assert stage.stats["rate_limited"] > 0 and stage.stats["batches"] == 20
+    assert stage.concurrency.limit < 8
+    vector = store.index.reconstruct(0)
+    assert vector[0] == len(store.docstore.search(store.index_to_docstore_id[0]).page_content)
+
+
+def test_checkpoints_skip_finished_batches_on_rerun(server, tmp_path):
+    fake = server(capacity=8)
+    stage = EmbeddingStage(openai_embeddings(fake), max_workers=2, checkpoint_dir=str(tmp_path))
+    build_vectorstore(documents(10), stage.embeddings, batch_size=5, stage=stage)
+    assert fake.embedded == 10
+
+    # A rerun over the same chunks, plus new ones, only sends the new chunks
+    rerun = EmbeddingStage(openai_embeddings(fake), max_workers=2, checkpoint_dir=str(tmp_path))
+    store = build_vectorstore(documents(15), rerun.embeddings, batch_size=5, stage=rerun)
+    assert fake.embedded == 15 and rerun.stats["checkpoint_hits"] == 2
+    assert len(store.index_to_docstore_id) == 15
+
+
+def test_gives_up_after_max_retries(server):
+    fake = server(fail_first=100)
+    stage = EmbeddingStage(openai_embeddings(fake), max_retries=2, backoff_seconds=0.001)
+    with pytest.raises(Exception) as error:
+        build_vectorstore(documents(3), stage.embeddings, stage=stage)
+    assert getattr(error.value, "status_code", None) == 429
+    assert fake.requests == 3
+
+
+def test_adaptive_concurrency_halves_and_grows():
+    limit = AdaptiveConcurrency(initial=8, maximum=8)
+    limit.acquire()
+    limit.release(throttled=True)
+    assert limit.limit == 4
+    for _ in range(4):
+        limit.acquire()
+        limit.release()
+    # About one more slot after a full round of requests
+    assert 4.5 < limit.limit < 5
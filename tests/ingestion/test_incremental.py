@@ -0,0 +1,109 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings.fake import DeterministicFakeEmbedding
+from langchain_text_splitters import CharacterTextSplitter
+from maeser.graphs.bm25 import BM25Index, bm25_path
+from maeser.ingestion.incremental import IngestionManifest, chunk_entries, manifest_path, sync_vectorstore
+
+SETTINGS = {"chunk_size": 40}
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    embedded: int = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def sync(path, documents, embeddings, settings=SETTINGS):
+    corpus = path / "corpus"
+    corpus.mkdir(exist_ok=True)
+    for file in corpus.iterdir():
+        file.unlink()
+    for name, text in documents.items():
+        (corpus / name).write_text(text, encoding="utf-8")
+    splitter = CharacterTextSplitter(separator="\n", chunk_size=40, chunk_overlap=0)
+    return sync_vectorstore(str(path), [str(file) for file in sorted(corpus.iterdir())], embeddings, splitter, settings=settings)
+
+
+def stored_texts(path, embeddings):
+    store = FAISS.load_local(str(path), embeddings, allow_dangerous_deserialization=True)
+    return sorted(store.docstore.search(doc_id).page_content for doc_id in store.index_to_docstore_id.values())
+
+
+CORPUS = {
+    "syllabus.txt": "Office hours are on Monday.\nThe late policy is strict.",
+    "lab3.txt": "Lab 3 implements draw_line.\nUse the display driver.",
+}
+
+
+def test_first_run_embeds_every_chunk(tmp_path):
+    embeddings = CountingEmbeddings(size=8)
+    report = sync(tmp_path, CORPUS, embeddings)
+    assert report["added_documents"] == 2
+    assert embeddings.embedded == report["embedded_chunks"] == 4
+    assert len(IngestionManifest.load(manifest_path(str(tmp_path))).chunk_ids()) == 4
+    assert len(BM25Index.load(bm25_path(str(tmp_path))).doc_ids) == 4
+
+
+def test_unchanged_corpus_embeds_nothing(tmp_path):
+    sync(tmp_path, CORPUS, CountingEmbeddings(size=8))
+    embeddings = CountingEmbeddings(size=8)
+    report = sync(tmp_path, CORPUS, embeddings)
+    assert embeddings.embedded == 0
+    assert report["unchanged_documents"] == 2 and report["kept_chunks"] == 4
+
+
+def test_changed_and_removed_documents_update_in_place(tmp_path):
+    sync(tmp_path, CORPUS, CountingEmbeddings(size=8))
+    embeddings = CountingEmbeddings(size=8)
+    report = sync(tmp_path, {"syllabus.txt": "Office hours are on Monday.\nThe late policy is lenient."}, embeddings)
+    assert embeddings.embedded == 1
+    assert report["changed_documents"] == 1 and report["removed_documents"] == 1
+    assert report["kept_chunks"] == 1 and report["deleted_chunks"] == 3
+    assert stored_texts(tmp_path, embeddings) == ["Office hours are on Monday.", "The late policy is lenient."]
+
+
+def test_changed_settings_rebuild_from_scratch(tmp_path):
+    sync(tmp_path, CORPUS, CountingEmbeddings(size=8))
+    embeddings = CountingEmbeddings(size=8)
+    report = sync(tmp_path, CORPUS, embeddings, settings={"chunk_size": 80})
+    assert report["added_documents"] == 2 and embeddings.embedded == 4
+    assert len(stored_texts(tmp_path, embeddings)) == 4
+
+
+def test_interrupted_run_is_repaired(tmp_path):
+    sync(tmp_path, CORPUS, CountingEmbeddings(size=8))
+    # Simulate a crash after the vectorstore was saved without one chunk, before the manifest was written
+    embeddings = CountingEmbeddings(size=8)
+    store = FAISS.load_local(str(tmp_path), embeddings, allow_dangerous_deserialization=True)
+    store.delete([chunk_entries("lab3.txt", ["Use the display driver."])[0]["id"]])
+    store.save_local(str(tmp_path))
+
+    report = sync(tmp_path, CORPUS, embeddings)
+    assert embeddings.embedded == 1
+    assert report["changed_documents"] == 1
+    assert len(stored_texts(tmp_path, embeddings)) == 4
+
+
+def test_duplicate_chunks_get_distinct_ids():
+    entries = chunk_entries("notes.txt", ["same", "same"])
+    assert entries[0]["hash"] == entries[1]["hash"]
+    assert entries[0]["id"] != entries[1]["id"]
@@ -0,0 +1,88 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings.fake import DeterministicFakeEmbedding
+from langchain_text_splitters import CharacterTextSplitter
+from maeser.ingestion.indexes import (
+    INDEX_TYPES, configure_search, delete_vectors, describe_index, index_factory_string, reindex_vectorstore,
+)
+from maeser.ingestion.incremental import sync_vectorstore
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=16)
+TEXTS = [f"chunk {i}" for i in range(600)]
+
+
+def store_of(texts):
+    return FAISS.from_texts(texts, EMBEDDINGS, ids=texts)
+
+
+def finds_itself(store, text):
+    return store.similarity_search(text, k=1)[0].page_content == text
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_reindexed_store_finds_documents_and_keeps_settings(tmp_path, index_type):
+    store = reindex_vectorstore(store_of(TEXTS), index_type, nlist=8, nprobe=8, ef_search=40)
+    assert describe_index(store.index)["index_type"] == index_type
+    assert all(finds_itself(store, text) for text in TEXTS[:20])
+
+    store.save_local(str(tmp_path))
+    loaded = FAISS.load_local(str(tmp_path), EMBEDDINGS, allow_dangerous_deserialization=True)
+    assert describe_index(loaded.index) == describe_index(store.index)
+
+
+@pytest.mark.parametrize("index_type", ["ivf_flat", "hnsw"])
+def test_delete_keeps_positions_consistent(index_type):
+    store = reindex_vectorstore(store_of(TEXTS), index_type, nlist=8, nprobe=8)
+    delete_vectors(store, TEXTS[:300:3])
+    store.add_texts(["new chunk"], ids=["new chunk"])
+
+    remaining = [text for text in TEXTS if text not in TEXTS[:300:3]] + ["new chunk"]
+    assert store.index.ntotal == len(store.index_to_docstore_id) == len(remaining)
+    assert all(finds_itself(store, text) for text in remaining[::25] + ["new chunk"])
+    assert sorted(store.index_to_docstore_id.values()) == sorted(remaining)
+
+
+def test_incremental_sync_updates_an_ivf_store(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    for name in ("lab1.txt", "lab2.txt"):
+        (corpus / name).write_text("\n".join(f"{name} line {i}" for i in range(150)), encoding="utf-8")
+    splitter = CharacterTextSplitter(separator="\n", chunk_size=20, chunk_overlap=0)
+    sync_vectorstore(str(tmp_path), [str(file) for file in sorted(corpus.iterdir())], EMBEDDINGS, splitter)
+    store = FAISS.load_local(str(tmp_path), EMBEDDINGS, allow_dangerous_deserialization=True)
+    reindex_vectorstore(store, "ivf_flat", nlist=4, nprobe=4).save_local(str(tmp_path))
+
+    (corpus / "lab1.txt").unlink()
+    report = sync_vectorstore(str(tmp_path), [str(corpus / "lab2.txt")], EMBEDDINGS, splitter)
+    store = FAISS.load_local(str(tmp_path), EMBEDDINGS, allow_dangerous_deserialization=True)
+    assert report["deleted_chunks"] == 150 and describe_index(store.index)["index_type"] == "ivf_flat"
+    assert all(store.docstore.search(doc_id).metadata["source"] == "lab2.txt" for doc_id in store.index_to_docstore_id.values())
+    assert finds_itself(store, "lab2.txt line 42")
+
+
+def test_configure_search_ignores_settings_of_other_index_types():
+    store = reindex_vectorstore(store_of(TEXTS), "hnsw", ef_search=40)
+    configure_search(store.index, nprobe=16, ef_search=99)
+    assert describe_index(store.index)["ef_search"] == 99
+
+    with pytest.raises(ValueError):
+        index_factory_string("ivf_pq", dimension=12, vectors=1000, pq_m=5)
+    with pytest.raises(ValueError):
+        reindex_vectorstore(store_of(TEXTS[:100]), "ivf_pq")
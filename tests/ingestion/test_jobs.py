@@ -0,0 +1,140 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+from maeser.ingestion.jobs import IngestionJobQueue, replace_directory
+
+# Copies the uploaded files to output/, failing while a "fail" file exists in the job directory
+CONVERT = [sys.executable, "-c",
+           "import os, shutil, sys\n"
+           "if os.path.exists('fail'): sys.exit('conversion failed')\n"
+           "shutil.copytree('source', 'output')\n"
+           "print('converted', len(os.listdir('output')))"]
+
+
+def wait_for(queue, job_id, *states, timeout=30):
+    deadline = time.monotonic() + timeout
+    while queue.get(job_id).state not in states:
+        assert time.monotonic() < deadline, queue.progress(job_id)
+        time.sleep(0.02)
+    return queue.get(job_id)
+
+
+def test_jobs_run_stages_in_isolated_directories(tmp_path):
+    published = {}
+    queue = IngestionJobQueue(str(tmp_path / "jobs"), [
+        ("convert", CONVERT),
+        ("publish", lambda job: published.setdefault(job.name, sorted(os.listdir(os.path.join(job.workdir, "output"))))),
+    ], max_workers=2)
+    jobs = []
+    for name in ("physics", "chemistry"):
+        job = queue.create(name)
+        (tmp_path / "jobs" / job.id / "source" / f"{name}.pdf").write_text(name)
+        jobs.append(queue.start(job.id))
+    for job in jobs:
+        assert wait_for(queue, job.id, "succeeded", "failed").state == "succeeded"
+        assert not os.path.exists(job.workdir)
+    assert published == {"physics": ["physics.pdf"], "chemistry": ["chemistry.pdf"]}
+    assert jobs[0].to_dict()["completed_stages"] == 2 and set(jobs[0].stage_seconds) == {"convert", "publish"}
+    with pytest.raises(ValueError):
+        queue.start(jobs[0].id)
+    queue.shutdown()
+
+
+def test_failed_stage_can_be_retried(tmp_path):
+    queue = IngestionJobQueue(str(tmp_path), [("convert", CONVERT), ("count", [sys.executable, "-c", "print('done')"])])
+    job = queue.create("course")
+    open(os.path.join(job.workdir, "fail"), "w").close()
+    queue.start(job.id)
+    assert wait_for(queue, job.id, "succeeded", "failed").state == "failed"
+    progress = queue.progress(job.id)
+    assert progress["stage"] == "convert" and progress["percent"] == 0 and "conversion failed" in progress["log_tail"]
+    assert "exited with code 1" in progress["error"]
+    assert queue.progress(job.id, lines=0)["log_tail"] == []
+
+    os.remove(os.path.join(job.workdir, "fail"))
+    queue.retry(job.id)
+    assert wait_for(queue, job.id, "succeeded", "failed").state == "succeeded"
+    assert job.attempts == 2 and job.error is None
+    with pytest.raises(ValueError):
+        queue.retry(job.id)
+    queue.shutdown()
+
+
+def test_cancel_stops_running_and_queued_jobs(tmp_path):
+    queue = IngestionJobQueue(str(tmp_path), [("sleep", [sys.executable, "-c", "import time; time.sleep(60)"])],
+                              max_workers=1)
+    running, queued = queue.create(), queue.create()
+    queue.start(running.id)
+    queue.start(queued.id)
+    wait_for(queue, running.id, "running")
+    assert queue.cancel(queued.id).state == "cancelled"
+
+    queue.cancel(running.id)
+    wait_for(queue, running.id, "cancelled", timeout=10)
+    # The cancelled queued job is skipped, and can be run again with its stage still pending
+    assert queued.attempts == 0 and queue.progress(queued.id)["stage"] == "sleep"
+    with pytest.raises(ValueError):
+        queue.cancel(running.id)
+    with pytest.raises(KeyError):
+        queue.get("missing")
+    queue.retry(queued.id)
+    wait_for(queue, queued.id, "running")
+    queue.cancel(queued.id)
+    queue.shutdown()
+
+
+def test_one_unfinished_job_per_dataset(tmp_path):
+    queue = IngestionJobQueue(str(tmp_path), [("count", [sys.executable, "-c", "print('done')"])])
+    barrier, created, rejected = threading.Barrier(8), [], []
+
+    def upload():
+        barrier.wait()
+        try:
+            created.append(queue.create("course"))
+        except ValueError:
+            rejected.append(True)
+
+    threads = [threading.Thread(target=upload) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(created) == 1 and len(rejected) == 7
+    assert os.listdir(tmp_path) == [created[0].id]
+
+    # A job whose upload failed is cancelled before it starts, which frees the name
+    queue.cancel(created[0].id)
+    created[0] = queue.create("course")
+    queue.start(created[0].id)
+    wait_for(queue, created[0].id, "succeeded", "failed")
+    assert queue.create("course").name == "course"
+    queue.shutdown()
+
+
+def test_replace_directory(tmp_path):
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new" / "index.faiss").write_text("new")
+    (tmp_path / "stores" / "course").mkdir(parents=True)
+    (tmp_path / "stores" / "course" / "stale.faiss").write_text("old")
+    replace_directory(str(tmp_path / "new"), str(tmp_path / "stores" / "course"))
+    assert os.listdir(tmp_path / "stores") == ["course"] and os.listdir(tmp_path / "stores" / "course") == ["index.faiss"]
@@ -0,0 +1,79 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from langchain_core.embeddings.fake import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+from langchain_text_splitters import CharacterTextSplitter
+from maeser.ingestion.incremental import sync_vectorstore
+from maeser.ingestion.files import split_pages
+from maeser.ingestion.pdf import extract_pdfs, output_name
+
+
+def fake_extract(pdf_path):
+    """Treat the 'PDF' as text with one page per line; 'broken' files fail."""
+    with open(pdf_path, encoding="utf-8") as file:
+        content = file.read()
+    if content == "broken":
+        raise ValueError("not a PDF")
+    return content.splitlines()
+
+
+def write_pdfs(directory, files):
+    directory.mkdir(exist_ok=True)
+    for name, content in files.items():
+        (directory / name).write_text(content, encoding="utf-8")
+
+
+def test_split_pages_drops_trailing_form_feed():
+    assert split_pages("one\ftwo\f") == ["one", "two"]
+    assert split_pages("no pages") == ["no pages"]
+
+
+def test_output_name_is_shell_safe():
+    assert output_name("Lab 3 Slides.pdf") == "Lab_3_Slides.txt"
+
+
+def test_extracts_in_parallel_and_reports_throughput(tmp_path):
+    write_pdfs(tmp_path / "source", {"a.pdf": "page one\npage two", "b b.pdf": "only page", "c.pdf": "broken"})
+    report = extract_pdfs(str(tmp_path / "source"), str(tmp_path / "output"), workers=2, extract=fake_extract)
+
+    assert (report["files"], report["failed"], report["pages"]) == (2, 1, 3)
+    assert report["pages_per_second"] > 0
+    assert split_pages((tmp_path / "output" / "a.txt").read_text()) == ["page one", "page two"]
+    assert (tmp_path / "output" / "b_b.txt").exists()
+
+
+def test_resumes_without_reextracting(tmp_path):
+    write_pdfs(tmp_path / "source", {"a.pdf": "page one", "b.pdf": "page two"})
+    extract_pdfs(str(tmp_path / "source"), str(tmp_path / "output"), workers=1, extract=fake_extract)
+    write_pdfs(tmp_path / "source", {"c.pdf": "page three", "b.pdf": "page two, edited"})
+
+    report = extract_pdfs(str(tmp_path / "source"), str(tmp_path / "output"), workers=1, extract=fake_extract, remove_sources=True)
+    assert (report["files"], report["skipped"]) == (2, 1)
+    assert (tmp_path / "output" / "b.txt").read_text() == "page two, edited"
+    assert list((tmp_path / "source").iterdir()) == []
+
+
+def test_page_numbers_become_chunk_metadata(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=8)
+    splitter = CharacterTextSplitter(separator="\n", chunk_size=40, chunk_overlap=0)
+    (tmp_path / "slides.txt").write_text("Intro\fPointers\fRecursion", encoding="utf-8")
+    sync_vectorstore(str(tmp_path), [str(tmp_path / "slides.txt")], embeddings, splitter)
+
+    store = FAISS.load_local(str(tmp_path), embeddings, allow_dangerous_deserialization=True)
+    pages = {doc.page_content: doc.metadata["page"] for doc in store.docstore._dict.values()}  # type: ignore
+    assert pages == {"Intro": 1, "Pointers": 2, "Recursion": 3}
@@ -0,0 +1,81 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy dependencies that must only load when the feature that needs them is used
+HEAVY_MODULES = {"flask", "ldap3", "requests", "langchain_core", "langchain_community", "langgraph", "markdown", "faiss", "numpy"}
+# Heavy dependencies of the web app, which building a graph for a terminal script must not load
+WEB_MODULES = {"flask", "ldap3", "markdown"}
+
+
+def import_profile(module: str) -> tuple[float, set[str]]:
+    """Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple[float, set[str]]: The cumulative import time of the module in seconds, and the top-level
+            names of every module imported along with it.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=REPO_ROOT, check=True,
+    )
+    cumulative = 0.0
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if not total.strip().isdigit():
+            continue  # header line
+        imported.add(name.strip().split(".")[0])
+        if name.strip() == module:
+            cumulative = int(total) / 1_000_000
+    return cumulative, imported
+
+
+@pytest.mark.parametrize("module, budget_seconds", [
+    ("maeser.chat", 0.5),
+    ("maeser.chat.chat_session_manager", 0.5),
+    # Graph helpers imported by the chat session manager
+    ("maeser.graphs.instrumentation", 0.5),
+    ("maeser.graphs.tokens", 0.5),
+    ("maeser.user_manager", 0.5),
+    # Imported by every PDF extraction worker process
+    ("maeser.ingestion.pdf", 0.5),
+])
+def test_import_time_budget(module, budget_seconds):
+    seconds, imported = import_profile(module)
+    assert not imported & HEAVY_MODULES, f"{module} imports {sorted(imported & HEAVY_MODULES)}"
+    assert seconds < budget_seconds, f"importing {module} took {seconds:.3f}s"
+
+
+@pytest.mark.parametrize("module, budget_seconds", [
+    ("maeser.graphs.simple_rag", 4.0),
+    ("maeser.graphs.pipeline_rag", 4.0),
+])
+def test_graph_import_time_budget(module, budget_seconds):
+    # Graph builders need LangChain, FAISS and numpy, but not the web app
+    seconds, imported = import_profile(module)
+    assert not imported & WEB_MODULES, f"{module} imports {sorted(imported & WEB_MODULES)}"
+    assert seconds < budget_seconds, f"importing {module} took {seconds:.3f}s"
@@ -0,0 +1,47 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from maeser.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("request_seconds", "Request time.", buckets=(0.1, 1), label_names=("route",))
+    histogram.observe(0.05, route="/")
+    histogram.observe(0.5, route="/")
+    histogram.observe(5, route="/")
+
+    assert registry.render().splitlines() == [
+        "# HELP request_seconds Request time.",
+        "# TYPE request_seconds histogram",
+        'request_seconds_bucket{route="/",le="0.1"} 1',
+        'request_seconds_bucket{route="/",le="1"} 2',
+        'request_seconds_bucket{route="/",le="+Inf"} 3',
+        'request_seconds_sum{route="/"} 5.55',
+        'request_seconds_count{route="/"} 3',
+    ]
+
+
+def test_registry_returns_existing_metric():
+    registry = MetricsRegistry()
+    assert registry.histogram("a", "A.") is registry.histogram("a", "A.")
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.histogram("a", "A.", buckets=(1,), label_names=("path",)).observe(1, path='say "hi"')
+    assert 'path="say \\"hi\\""' in registry.render()
@@ -0,0 +1,73 @@
+"""
+© 2026 Maeser Contributors
+
+This file is part of the Maeser unit test suite.
+
+Maeser is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Maeser is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with
+Maeser. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+
+import pytest
+from maeser.sqlite_pool import SQLitePool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLitePool(str(tmp_path / "pool.db"), max_connections=2, busy_timeout_seconds=0.5)
+    yield pool
+    pool.close()
+
+
+def test_connections_use_wal(pool):
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_connections_are_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert pool.size == 1
+
+
+def test_uncommitted_changes_are_rolled_back(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE items (name TEXT)")
+        conn.execute("INSERT INTO items VALUES ('kept')")
+        conn.commit()
+        conn.execute("INSERT INTO items VALUES ('discarded')")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT name FROM items").fetchall() == [("kept",)]
+
+
+def test_waits_for_a_free_connection(pool):
+    released = threading.Event()
+
+    def hold():
+        with pool.connection():
+            released.wait()
+
+    holders = [threading.Thread(target=hold) for _ in range(2)]
+    for holder in holders:
+        holder.start()
+    while pool.size < 2:
+        pass
+    with pytest.raises(TimeoutError):
+        with pool.connection():
+            pass
+    released.set()
+    for holder in holders:
+        holder.join()
+    with pool.connection():
+        assert pool.size == 2
@@ -15,8 +15,11 @@ You should have received a copy of the GNU Lesser General Public License along w
 Maeser. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import pytest
+from maeser.metrics import CACHE_REQUESTS
 from maeser.user_manager import UserManager, GithubAuthenticator
 
 @pytest.fixture
@@ -121,3 +124,98 @@ def test_get_requests_remaining(user_manager: UserManager, github_authenticator:
     user_manager._create_or_update_user("github", "test_user", "Test User", "guest")
     remaining_requests = user_manager.get_requests_remaining("github", "test_user")
     assert remaining_requests == 10
+
+def test_connections_are_reused_with_wal(user_manager: UserManager):
+    """Test that operations share long-lived WAL connections."""
+    user_manager._create_or_update_user("github", "test_user", "Test User", "guest")
+    with user_manager.db_connection as first:
+        assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    for _ in range(5):
+        user_manager.get_user("github", "test_user")
+    with user_manager.db_connection as second:
+        assert second is first
+    assert user_manager._pool.size == 1
+
+def test_failed_block_is_rolled_back(user_manager: UserManager):
+    """Test that changes made in a failing connection block are not committed."""
+    user_manager._create_or_update_user("github", "test_user", "Test User", "guest")
+    with pytest.raises(RuntimeError):
+        with user_manager.db_connection as db:
+            db.execute('UPDATE githubUsers SET admin=1')
+            raise RuntimeError("failed request")
+    assert user_manager.get_user("github", "test_user").admin is False
+
+def test_concurrent_request_accounting(user_manager: UserManager):
+    """Test that concurrent users decreasing their requests never lose an update."""
+    users = [f"user{i}" for i in range(20)]
+    for user in users:
+        user_manager._create_or_update_user("github", user, user, "guest")
+
+    def ask(user: str):
+        for _ in range(3):
+            user_manager.get_user("github", user)
+            user_manager.decrease_requests("github", user)
+
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        list(executor.map(ask, users * 2))
+    assert {user_manager.get_requests_remaining("github", user) for user in users} == {4}
+    assert user_manager._pool.size <= user_manager._pool.max_connections
+
+def test_in_memory_database_persists_between_operations(github_authenticator: GithubAuthenticator):
+    """Test that temporary storage keeps its data across operations."""
+    user_manager = UserManager(":memory:")
+    user_manager.register_authenticator("github", github_authenticator)
+    user_manager._create_or_update_user("github", "test_user", "Test User", "guest")
+    assert user_manager.get_user("github", "test_user") is not None
+    user_manager.close()
+
+def test_user_lookups_are_cached(user_manager: UserManager, monkeypatch: pytest.MonkeyPatch):
+    """Test that repeated lookups of a user are answered without the database."""
+    user_manager._create_or_update_user("github", "test_user", "Test User", "guest")
+    reads = []
+    read_user = user_manager._get_user
+    monkeypatch.setattr(user_manager, "_get_user", lambda *args: reads.append(args) or read_user(*args))
+    hits = CACHE_REQUESTS.value(cache="user", result="hit")
+
+    for _ in range(10):
+        user = user_manager.get_user("github", "test_user")
+    assert len(reads) == 1 and CACHE_REQUESTS.value(cache="user", result="hit") == hits + 9
+    # Changing a returned user does not change the cached one
+    user.requests_remaining = 0
+    assert user_manager.get_user("github", "test_user").requests_remaining == 10
+
+def test_changes_invalidate_cached_users(user_manager: UserManager):
+    """Test that changes made through the UserManager are seen at once."""
+    assert user_manager.get_user("github", "test_user") is None
+    user_manager._create_or_update_user("github", "test_user", "Test User", "guest")
+    assert user_manager.get_user("github", "test_user") is not None
+
+    user_manager.update_banned_status("github", "test_user", True)
+    assert user_manager.get_user("github", "test_user").is_active is False
+    user_manager.update_admin_status("github", "test_user", True)
+    assert user_manager.get_user("github", "test_user").admin is True
+    user_manager.decrease_requests("github", "test_user", 4)
+    assert user_manager.get_requests_remaining("github", "test_user") == 6
+    user_manager.increase_requests("github", "test_user", 1)
+    assert user_manager.get_requests_remaining("github", "test_user") == 7
+    user_manager.refresh_requests(10)
+    assert user_manager.get_requests_remaining("github", "test_user") == 10
+    user_manager.remove_user_from_cache("github", "test_user")
+    assert user_manager.get_user("github", "test_user") is None
+
+def test_external_changes_are_seen_after_the_ttl(db_path: Path, github_authenticator: GithubAuthenticator):
+    """Test that changes made by another process are seen once the cached user expires."""
+    user_manager = UserManager(str(db_path), user_cache_ttl=0.2)
+    user_manager.register_authenticator("github", github_authenticator)
+    other_process = UserManager(str(db_path))
+    other_process.register_authenticator("github", github_authenticator)
+    user_manager._create_or_update_user("github", "test_user", "Test User", "guest")
+    assert user_manager.get_user("github", "test_user").admin is False
+
+    other_process.update_admin_status("github", "test_user", True)
+    assert user_manager.get_user("github", "test_user").admin is False
+    time.sleep(0.25)
+    assert user_manager.get_user("github", "test_user").admin is True
+    user_manager.close()
+    other_process.close()
+